@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Query
 from sqlalchemy.orm import Session
 from models.models import User
-from Authentication.functions import hash_password, verify_password, create_access_token, decode_token,send_email
+from Authentication.functions import hash_password_async, verify_password_async, create_access_token, decode_token
+from Authentication.mailer import queue_email, wake_outbox_sender
 from Authentication.inputs import UserCreate, ForgotPasswordRequest, ResetPasswordRequest
 from database.database import get_db
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -9,7 +10,9 @@ from datetime import timedelta
 import logging
 import random
 from fastapi.responses import JSONResponse
-from Currentuser.currentUser import get_current_user
+from fastapi.concurrency import run_in_threadpool
+from Currentuser.currentUser import get_current_user, principal_cache
+from Currentuser.userDirectory import user_directory
 from logger.logger import get_logger
 
 
@@ -21,12 +24,30 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/taskmanager/api/v1/auth/login")
 
 
 
+# bcrypt runs with the DB connection handed back (the pool is smaller than a login burst). Each DB
+# step and the close() that returns its connection share one threadpool call: the connection must go
+# back before the thread does, or requests blocked on the pool can hold every thread while the
+# sessions that hold connections wait for a thread to close them.
+def _first_and_release(db, query):
+    row = query.first()
+    db.close()  # detaches `row` with its attributes loaded
+    return row
+
+
+def _commit_and_release(db, obj):
+    db.commit()
+    db.refresh(obj)
+    db.close()
+
+
 @router.post("/signup")
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: Session = Depends(get_db)):
     logger = get_logger("auth", "auth.log")
     logger.info(f"Signup attempt for username='{user.username}', email='{user.email}'")
 
-    existing = db.query(User).filter((User.username == user.username) | (User.email == user.email)).first()
+    existing = await run_in_threadpool(
+        _first_and_release, db, db.query(User).filter((User.username == user.username) | (User.email == user.email))
+    )
     if existing:
         logger.warning(f"Signup failed: Username or email already exists - {user.username} / {user.email}")
         raise HTTPException(status_code=400, detail="Username or email already exists")
@@ -34,23 +55,25 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
     new_user = User(
         username=user.username,
         email=user.email,
-        password_hash=hash_password(user.password),
+        password_hash=await hash_password_async(user.password),
         designation=user.designation
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_commit_and_release, db, new_user)
+    user_directory.invalidate()
     logger.info(f"New user created: user_id={new_user.employee_id}, username={new_user.username}")
     return {"message": "User created successfully"}
 
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     logger = get_logger("auth", "auth.log")
     logger.info(f"Login attempt for username='{form_data.username}'")
 
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user = await run_in_threadpool(
+        _first_and_release, db, db.query(User).filter(User.username == form_data.username)
+    )
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         logger.warning(f"Login failed for username='{form_data.username}'")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -84,14 +107,16 @@ def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db
     token = create_access_token(payload, expires_delta=timedelta(minutes=10))
 
     email_body = f"Hi {user.username},\n\nYour OTP for password reset is: {otp}\n\nThis OTP is valid for 10 minutes."
-    send_email(user.email, "Your OTP for Password Reset", email_body)
-    logger.info(f"OTP sent to email={user.email}, OTP={otp} (masked in logs)")
+    queue_email(db, user.email, "Your OTP for Password Reset", email_body)
+    db.commit()
+    wake_outbox_sender()
+    logger.info(f"OTP queued for email={user.email}, OTP={otp} (masked in logs)")
 
     return {"message": "OTP has been sent to your email", "token": token}
 
 
 @router.post("/reset-password")
-def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
     logger = get_logger("auth", "auth.log")
     logger.info(f"Reset password attempt for email='{data.email}'")
 
@@ -107,13 +132,17 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
         logger.warning("Reset password failed: email or OTP mismatch")
         raise HTTPException(status_code=400, detail="Invalid email or OTP")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await run_in_threadpool(_first_and_release, db, db.query(User).filter(User.email == email))
     if not user:
         logger.warning("Reset password failed: user not found")
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password_hash = hash_password(data.new_password)
-    db.commit()
+    password_hash = await hash_password_async(data.new_password)
+    db.add(user)
+    user.password_hash = password_hash
+    await run_in_threadpool(_commit_and_release, db, user)
+    user_directory.invalidate()
+    principal_cache.invalidate_user(user.employee_id)
     logger.info(f"Password reset successful for user_id={user.employee_id}, email={user.email}")
     return {"message": "Password reset successful"}
 
@@ -142,14 +171,14 @@ def read_current_user(
     logger = get_logger("auth", "auth.log")
     logger.info(f"Fetching all users for user_id={current_user.employee_id}")
 
-    all_users = db.query(User).all()
+    user_map = user_directory.snapshot(db)
 
     people = [
         {
-            "employee_id": user.employee_id,
-            "username": user.username
+            "employee_id": employee_id,
+            "username": username
         }
-        for user in all_users
+        for employee_id, username in sorted(user_map.items())
     ]
 
     logger.debug(f"{len(people)} users fetched by user_id={current_user.employee_id}")
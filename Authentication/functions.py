@@ -2,13 +2,15 @@ from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 from enum import Enum
-from fastapi import Depends
+from fastapi import Depends, HTTPException
 from sqlalchemy import select, or_, update
-import smtplib
-from email.mime.text import MIMEText
 import os
 from dotenv import load_dotenv
 import logging
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -34,6 +36,64 @@ def hash_password(password: str):
 def verify_password(plain: str, hashed: str):
     return pwd_context.verify(plain, hashed)
 
+# bcrypt runs in a small dedicated process pool so a login burst cannot tie up
+# the request threadpool (or the event loop) for ~250ms per call.
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", "2"))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "64"))
+
+_password_pool = None
+_password_lock = threading.Lock()
+_password_stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "in_flight": 0, "max_in_flight": 0}
+
+def _get_password_pool():
+    global _password_pool
+    with _password_lock:
+        if _password_pool is None:
+            _password_pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_POOL_SIZE,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _password_pool
+
+async def _run_password_job(fn, *args):
+    with _password_lock:
+        if _password_stats["in_flight"] >= PASSWORD_QUEUE_LIMIT:
+            _password_stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Too many authentication requests, please retry")
+        _password_stats["submitted"] += 1
+        _password_stats["in_flight"] += 1
+        _password_stats["max_in_flight"] = max(_password_stats["max_in_flight"], _password_stats["in_flight"])
+    outcome = "failed"
+    try:
+        result = await asyncio.wrap_future(_get_password_pool().submit(fn, *args))
+        outcome = "completed"
+        return result
+    finally:
+        with _password_lock:
+            _password_stats["in_flight"] -= 1
+            _password_stats[outcome] += 1
+
+async def hash_password_async(password: str):
+    return await _run_password_job(hash_password, password)
+
+async def verify_password_async(plain: str, hashed: str):
+    return await _run_password_job(verify_password, plain, hashed)
+
+def password_pool_stats():
+    with _password_lock:
+        stats = dict(_password_stats)
+    stats["workers"] = PASSWORD_POOL_SIZE
+    stats["queue_limit"] = PASSWORD_QUEUE_LIMIT
+    stats["queued"] = max(0, stats["in_flight"] - PASSWORD_POOL_SIZE)
+    return stats
+
+def shutdown_password_pool():
+    global _password_pool
+    with _password_lock:
+        pool, _password_pool = _password_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
 def create_access_token(data: dict, expires_delta=None):
     to_encode = data.copy()
     if expires_delta is None:
@@ -47,28 +107,3 @@ def decode_token(token: str):
         return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
-
-EMAIL_USER = os.getenv("EMAIL_USER")
-EMAIL_PASS = os.getenv("EMAIL_PASS")
-
-def send_email(to_email: str, subject: str, body: str):
-    
-
-    if not EMAIL_USER or not EMAIL_PASS:
-        print("❌ Email credentials not loaded. Check your .env file.")
-        return
-
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = EMAIL_USER
-    msg["To"] = to_email
-
-    try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(EMAIL_USER, EMAIL_PASS)
-            server.sendmail(EMAIL_USER, to_email, msg.as_string())
-            print("✅ Email sent successfully!")
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")  
\ No newline at end of file
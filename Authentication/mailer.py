@@ -0,0 +1,269 @@
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from dotenv import load_dotenv
+from sqlalchemy import update
+from models.models import EmailOutbox, EmailStatus
+from database import database
+from logger.logger import get_logger
+
+load_dotenv()
+
+EMAIL_USER = os.getenv("EMAIL_USER")
+EMAIL_PASS = os.getenv("EMAIL_PASS")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = int(os.getenv("SMTP_TIMEOUT", "30"))
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "5"))
+EMAIL_IDLE_DISCONNECT = float(os.getenv("EMAIL_IDLE_DISCONNECT", "60"))
+# A claimed row is pushed this far into the future while it is being sent, so a
+# worker that dies mid-batch only delays its messages instead of losing them
+EMAIL_LEASE_SECONDS = int(os.getenv("EMAIL_LEASE_SECONDS", "300"))
+EMAIL_BACKOFF_BASE = 10   # seconds, doubled on every failed attempt
+EMAIL_BACKOFF_MAX = 900
+
+
+def queue_email(db, to_email: str, subject: str, body: str):
+    """Add a message to the outbox; it is sent after the caller commits."""
+    now = datetime.now()
+    email = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        status=EmailStatus.Pending,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    )
+    db.add(email)
+    return email
+
+
+class OutboxSender(threading.Thread):
+    """
+    Background sender for `email_outbox`.
+
+    Keeps a single authenticated SMTP connection open between batches (it is
+    dropped after EMAIL_IDLE_DISCONNECT seconds without work), claims due rows
+    with SKIP LOCKED so several workers can run side by side, and reschedules
+    failures with exponential backoff until EMAIL_MAX_ATTEMPTS.
+
+    Claiming leases the rows (next_attempt_at = now + EMAIL_LEASE_SECONDS) and
+    commits before anything is sent, so no lock or transaction is held while
+    talking to the relay; each result is then written in its own short
+    transaction, guarded by the lease.
+    """
+
+    def __init__(self):
+        super().__init__(name="email-outbox", daemon=True)
+        self.logger = get_logger("mailer", "mailer.log")
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._smtp = None
+        self._last_used = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {"sent": 0, "retried": 0, "failed": 0, "connections": 0,
+                       "last_latency": None, "max_latency": None, "total_latency": 0.0}
+
+    # ---------- lifecycle ----------
+    def wake(self):
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 10):
+        self._stopping.set()
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+        self._disconnect()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                sent = self.process_batch()
+            except Exception:
+                self.logger.exception("Outbox batch failed")
+                sent = 0
+            if sent < EMAIL_BATCH_SIZE:
+                if self._smtp is not None and time.monotonic() - self._last_used > EMAIL_IDLE_DISCONNECT:
+                    self._disconnect()
+                self._wakeup.wait(EMAIL_POLL_INTERVAL)
+                self._wakeup.clear()
+
+    # ---------- SMTP connection ----------
+    def _connect(self):
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        smtp.ehlo()
+        if SMTP_STARTTLS:
+            smtp.starttls()
+            smtp.ehlo()
+        # Local stand-in relays usually don't offer AUTH; only log in when advertised
+        if EMAIL_USER and EMAIL_PASS and smtp.has_extn("auth"):
+            smtp.login(EMAIL_USER, EMAIL_PASS)
+        with self._stats_lock:
+            self._stats["connections"] += 1
+        self.logger.info(f"SMTP connection opened to {SMTP_HOST}:{SMTP_PORT}")
+        return smtp
+
+    def _connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._disconnect()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _deliver(self, email):
+        msg = MIMEText(email.body)
+        msg["Subject"] = email.subject
+        msg["From"] = EMAIL_USER or "no-reply@localhost"
+        msg["To"] = email.to_email
+        try:
+            self._connection().sendmail(msg["From"], [email.to_email], msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # The relay dropped an idle connection; reconnect once and retry
+            self._disconnect()
+            self._connection().sendmail(msg["From"], [email.to_email], msg.as_string())
+        self._last_used = time.monotonic()
+
+    # ---------- batch processing ----------
+    def process_batch(self) -> int:
+        """Send one batch of due messages; returns how many rows were claimed."""
+        batch, lease_until = self._claim()
+        for email in batch:
+            try:
+                self._deliver(email)
+            except Exception as e:
+                self._record_failure(email, lease_until, e)
+                continue
+            self._record_sent(email, lease_until)
+        return len(batch)
+
+    def _claim(self):
+        db = database.SessionLocal()
+        try:
+            now = datetime.now()
+            batch = db.query(EmailOutbox).filter(
+                EmailOutbox.status == EmailStatus.Pending,
+                EmailOutbox.next_attempt_at <= now
+            ).order_by(EmailOutbox.email_id).limit(EMAIL_BATCH_SIZE).with_for_update(skip_locked=True).all()
+
+            # TIMESTAMP columns drop fractional seconds; keep the lease comparable
+            lease_until = (now + timedelta(seconds=EMAIL_LEASE_SECONDS)).replace(microsecond=0)
+            for email in batch:
+                email.next_attempt_at = lease_until
+            db.flush()
+            db.expunge_all()  # keep the loaded rows usable after the commit
+            db.commit()
+            return batch, lease_until
+        finally:
+            db.close()
+
+    def _record(self, email, lease_until, **values) -> bool:
+        """Apply `values` to a claimed row unless its lease expired and another worker took it over."""
+        db = database.SessionLocal()
+        try:
+            updated = db.execute(
+                update(EmailOutbox).where(
+                    EmailOutbox.email_id == email.email_id,
+                    EmailOutbox.status == EmailStatus.Pending,
+                    EmailOutbox.next_attempt_at == lease_until
+                ).values(attempts=EmailOutbox.attempts + 1, **values)
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        if not updated:
+            self.logger.warning(f"Lease on email {email.email_id} expired before its result was recorded")
+        return bool(updated)
+
+    def _record_sent(self, email, lease_until):
+        email.sent_at = datetime.now()
+        if self._record(email, lease_until, status=EmailStatus.Sent, sent_at=email.sent_at):
+            self._record_latency(email)
+
+    def _record_failure(self, email, lease_until, error):
+        attempts = email.attempts + 1
+        last_error = str(error)[:1000]
+        if attempts >= EMAIL_MAX_ATTEMPTS:
+            if self._record(email, lease_until, status=EmailStatus.Failed, last_error=last_error):
+                with self._stats_lock:
+                    self._stats["failed"] += 1
+                self.logger.error(f"Email {email.email_id} to {email.to_email} failed permanently: {error}")
+        else:
+            delay = min(EMAIL_BACKOFF_BASE * 2 ** (attempts - 1), EMAIL_BACKOFF_MAX)
+            next_attempt_at = datetime.now() + timedelta(seconds=delay)
+            if self._record(email, lease_until, next_attempt_at=next_attempt_at, last_error=last_error):
+                with self._stats_lock:
+                    self._stats["retried"] += 1
+                self.logger.warning(f"Email {email.email_id} attempt {attempts} failed, retrying in {delay}s: {error}")
+        self._disconnect()
+
+    def _record_latency(self, email):
+        latency = (email.sent_at - email.created_at).total_seconds() if email.created_at else None
+        with self._stats_lock:
+            self._stats["sent"] += 1
+            if latency is not None:
+                self._stats["last_latency"] = latency
+                self._stats["total_latency"] += latency
+                self._stats["max_latency"] = max(self._stats["max_latency"] or 0, latency)
+
+    def stats(self, db=None) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total = stats.pop("total_latency")
+        stats["avg_latency"] = round(total / stats["sent"], 3) if stats["sent"] else None
+        stats["running"] = self.is_alive()
+        if db is not None:
+            stats["pending"] = db.query(EmailOutbox).filter(EmailOutbox.status == EmailStatus.Pending).count()
+            oldest = db.query(EmailOutbox.created_at).filter(
+                EmailOutbox.status == EmailStatus.Pending
+            ).order_by(EmailOutbox.email_id).first()
+            stats["oldest_pending_age"] = (datetime.now() - oldest[0]).total_seconds() if oldest else None
+        return stats
+
+
+_sender = None
+
+
+def start_outbox_sender():
+    global _sender
+    if _sender is None or not _sender.is_alive():
+        _sender = OutboxSender()
+        _sender.start()
+    return _sender
+
+
+def stop_outbox_sender():
+    global _sender
+    if _sender is not None:
+        _sender.stop()
+        _sender = None
+
+
+def wake_outbox_sender():
+    if _sender is not None:
+        _sender.wake()
+
+
+def outbox_stats(db=None) -> dict:
+    if _sender is None:
+        return {"running": False}
+    return _sender.stats(db)
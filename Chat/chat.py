@@ -2,55 +2,69 @@ from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPExce
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional
-from models.models import ChatMessage, ChatRoom, ChatMessageRead,Task,TaskType,User
-from database.database import get_db, SessionLocal
+from models.models import ChatMessage, ChatRoom, ChatMessageRead,Task,TaskType
+from database.database import get_async_db, run_db
 from Chat.chat_manager import ChatManager
+from Currentuser.userDirectory import user_directory
+from Tasks.hierarchy import get_root_normal_task
 
 def get_original_normal_task(db: Session, task_id: int):
-    current_task = db.query(Task).filter(Task.task_id == task_id).first()
-    if not current_task:
-        return None
-
-    # Traverse up the parent chain until you reach a Normal task
-    while current_task.task_type == TaskType.Review and current_task.parent_task_id:
-        parent = db.query(Task).filter(Task.task_id == current_task.parent_task_id).first()
-        if not parent:
-            break
-        current_task = parent
-
-    return current_task
+    # Nearest Normal task up the review chain, resolved from task_closure in one query
+    return get_root_normal_task(db, task_id)
 
 router = APIRouter()
 chat_manager = ChatManager()
 
 
+def _find_chat_room_id(db: Session, task_id: int):
+    task = db.query(Task).filter(Task.task_id==task_id).first()
+    if task.task_type == TaskType.Review:
+        original_task = get_original_normal_task(db, task_id)
+        task_ids = original_task.task_id
+    else:
+        task_ids = task.task_id
+    print("task",task_ids)
+
+    chat_room = db.query(ChatRoom).filter(ChatRoom.task_id == task_ids).first()
+    return chat_room.chat_room_id if chat_room else None
+
+
+def _save_chat_message(db: Session, chat_room_id: int, sender_id: int, message_text: str, visible_to):
+    chat_message = ChatMessage(
+        chat_room_id=chat_room_id,
+        sender_id=sender_id,
+        message=message_text,
+        visible_to=visible_to
+    )
+    db.add(chat_message)
+    db.commit()
+    db.refresh(chat_message)
+
+    return {
+        "message_id": chat_message.message_id,
+        "sender_id": sender_id,
+        "sender_name" : user_directory.names_for(db, [sender_id]).get(sender_id),
+        "message": message_text,
+        "visible_to": visible_to,
+        "timestamp": chat_message.timestamp.isoformat()
+    }
+
+
 @router.websocket("/chat")
 async def chat_websocket(
     websocket: WebSocket,
     task_id: int,
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_async_db)
 ):
     await websocket.accept()
+    chat_room_id = None
     try:
-        user_map = {}
-        users = db.query(User).filter().all()
-        user_map = {u.employee_id: u.username for u in users}
-        
-        task = db.query(Task).filter(Task.task_id==task_id).first()
-        if task.task_type == TaskType.Review:
-            original_task = get_original_normal_task(db, task_id)
-            task_ids = original_task.task_id
-        else:
-            task_ids = task.task_id
-        print("task",task_ids)
-
-        chat_room = db.query(ChatRoom).filter(ChatRoom.task_id == task_ids).first()
-        if not chat_room:
+        chat_room_id = await run_db(db, _find_chat_room_id, task_id)
+        if chat_room_id is None:
             await websocket.close(code=1008)  # Policy Violation
             return
 
-        chat_room_id = chat_room.chat_room_id
         websocket.scope["user_id"] = user_id
         await chat_manager.connect(websocket, chat_room_id)
 
@@ -61,24 +75,7 @@ async def chat_websocket(
             visible_to = data.get("visible_to")
 
             # Save message to DB
-            chat_message = ChatMessage(
-                chat_room_id=chat_room_id,
-                sender_id=sender_id,
-                message=message_text,
-                visible_to=visible_to
-            )
-            db.add(chat_message)
-            db.commit()
-            db.refresh(chat_message)
-
-            message_payload = {
-                "message_id": chat_message.message_id,
-                "sender_id": sender_id,
-                "sender_name" : user_map.get(sender_id),
-                "message": message_text,
-                "visible_to": visible_to,
-                "timestamp": chat_message.timestamp.isoformat()
-            }
+            message_payload = await run_db(db, _save_chat_message, chat_room_id, sender_id, message_text, visible_to)
 
             # Broadcast to users
             if not visible_to:
@@ -91,62 +88,58 @@ async def chat_websocket(
     except Exception as e:
         print("❌ WebSocket error:", e)
         chat_manager.disconnect(websocket, chat_room_id)
-    finally:
-        db.close()
 
 
 @router.get("/chat_history")
-def get_chat_history(
+async def get_chat_history(
     task_id: int,
     user_id: int,
     limit: int = 30,
     before_timestamp: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_async_db)
 ):
-    user_map = {}
-    users = db.query(User).filter().all()
-    user_map = {u.employee_id: u.username for u in users}
-    task = db.query(Task).filter(Task.task_id==task_id).first()
-    if task.task_type == TaskType.Review:
-        original_task = get_original_normal_task(db, task_id)
-        task_ids = original_task.task_id
-    else:
-        task_ids = task.task_id
-    chat_room = db.query(ChatRoom).filter(ChatRoom.task_id == task_ids).first()
-    if not chat_room:
-        raise HTTPException(status_code=404, detail="Chat room not found")
-
-    chat_room_id = chat_room.chat_room_id
-    query = db.query(ChatMessage).filter(ChatMessage.chat_room_id == chat_room_id)
-    if before_timestamp:
-        query = query.filter(ChatMessage.timestamp < before_timestamp)
-
-    messages = query.order_by(ChatMessage.timestamp.desc()).limit(limit).all()
-    messages.reverse()
-
-    read_message_ids = {
-        r.message_id for r in db.query(ChatMessageRead.message_id)
-        .filter_by(user_id=user_id)
-        .all()
-    }
-    user_map = {}
-    users = db.query(User).filter().all()
-    user_map = {u.employee_id: u.username for u in users}
-
-    visible_messages = []
-    for msg in messages:
-        if not msg.visible_to or user_id in msg.visible_to:
-            visible_messages.append({
-                "message_id": msg.message_id,
-                "sender_id": msg.sender_id,
-                "sender_name" : user_map.get(msg.sender_id),
-                "message": msg.message,
-                "timestamp": msg.timestamp.isoformat(),
-                "seen": msg.message_id in read_message_ids
-            })
-
-            if msg.message_id not in read_message_ids and msg.sender_id != user_id:
-                db.add(ChatMessageRead(message_id=msg.message_id, user_id=user_id))
+    def _load(db: Session):
+        task = db.query(Task).filter(Task.task_id==task_id).first()
+        if task.task_type == TaskType.Review:
+            original_task = get_original_normal_task(db, task_id)
+            task_ids = original_task.task_id
+        else:
+            task_ids = task.task_id
+        chat_room = db.query(ChatRoom).filter(ChatRoom.task_id == task_ids).first()
+        if not chat_room:
+            raise HTTPException(status_code=404, detail="Chat room not found")
 
-    db.commit()
-    return visible_messages
+        chat_room_id = chat_room.chat_room_id
+        query = db.query(ChatMessage).filter(ChatMessage.chat_room_id == chat_room_id)
+        if before_timestamp:
+            query = query.filter(ChatMessage.timestamp < before_timestamp)
+
+        messages = query.order_by(ChatMessage.timestamp.desc()).limit(limit).all()
+        messages.reverse()
+
+        read_message_ids = {
+            r.message_id for r in db.query(ChatMessageRead.message_id)
+            .filter_by(user_id=user_id)
+            .all()
+        }
+        user_map = user_directory.names_for(db, {msg.sender_id for msg in messages})
+
+        visible_messages = []
+        for msg in messages:
+            if not msg.visible_to or user_id in msg.visible_to:
+                visible_messages.append({
+                    "message_id": msg.message_id,
+                    "sender_id": msg.sender_id,
+                    "sender_name" : user_map.get(msg.sender_id),
+                    "message": msg.message,
+                    "timestamp": msg.timestamp.isoformat(),
+                    "seen": msg.message_id in read_message_ids
+                })
+
+                if msg.message_id not in read_message_ids and msg.sender_id != user_id:
+                    db.add(ChatMessageRead(message_id=msg.message_id, user_id=user_id))
+
+        db.commit()
+        return visible_messages
+
+    return await run_db(db, _load)
@@ -3,6 +3,15 @@ from sqlalchemy.orm import Session
 from fastapi import WebSocket
 from typing import Dict, List
 from sqlalchemy.exc import IntegrityError
+from database.database import run_db
+
+
+def _mark_read(db: Session, message_id: int, user_id: int):
+    try:
+        db.add(ChatMessageRead(message_id=message_id, user_id=user_id))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
 
 class ChatManager:
     def __init__(self):
@@ -29,11 +38,7 @@ class ChatManager:
                 await connection.send_json(message)
 
                 if db and user_id:
-                    try:
-                        db.add(ChatMessageRead(message_id=message["message_id"], user_id=user_id))
-                        db.commit()
-                    except IntegrityError:
-                        db.rollback()
+                    await run_db(db, _mark_read, message["message_id"], user_id)
             except Exception:
                 to_remove.append(connection)
 
@@ -51,11 +56,7 @@ class ChatManager:
                     await connection.send_json(message)
 
                     if db and user_id:
-                        try:
-                            db.add(ChatMessageRead(message_id=message["message_id"], user_id=user_id))
-                            db.commit()
-                        except IntegrityError:
-                            db.rollback()
+                        await run_db(db, _mark_read, message["message_id"], user_id)
             except Exception:
                 to_remove.append(connection)
 
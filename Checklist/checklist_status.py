@@ -1,19 +1,102 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import or_, desc
-from models.models import Task, TaskStatus, Checklist, TaskChecklistLink, TaskType, TaskTimeLog
+from sqlalchemy import select, exists
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import or_
+from models.models import Task, TaskStatus, Checklist, TaskChecklistLink, TaskType, TaskTimeLog, ActiveTimer, TaskClosure
 from Logs.functions import log_task_field_change, log_checklist_field_change
 from database.database import get_db
 from Currentuser.currentUser import get_current_user
-from Checklist.inputs import UpdateStatus
-from Checklist.functions import update_parent_task_status, propagate_incomplete_upwards
+from Checklist.inputs import UpdateStatus, BulkUpdateStatus
+from Checklist.functions import update_parent_task_status, update_parent_tasks_status, propagate_incomplete_upwards
+from Checklist.progress import progress_label
+from Tasks.timers import open_timer, latest_time_log, session_info
 from logger.logger import get_logger
 
 
 router = APIRouter()
 
 
+def settle_parent_task(db, parent_task, completed, reopened, Current_user, logger):
+    """
+    Status propagation for `parent_task` after its checklists `completed` were
+    ticked and `reopened` were unticked.
+    """
+    parent_task_id = parent_task.task_id
+    if parent_task.task_type == TaskType.Normal:
+        logger.debug(f"Normal task - Propagating checklist change for parent_task_id={parent_task_id}")
+
+        if completed:
+            update_parent_task_status(parent_task_id, db, Current_user)
+        if reopened:
+            propagate_incomplete_upwards(reopened[0], db, Current_user)
+
+    elif parent_task.task_type == TaskType.Review:
+        logger.debug(f"Review task - Processing checklist change for parent_task_id={parent_task_id}")
+        review_checklists = db.query(Checklist).join(
+            TaskChecklistLink,
+            TaskChecklistLink.checklist_id == Checklist.checklist_id
+        ).filter(
+            TaskChecklistLink.parent_task_id == parent_task_id,
+            Checklist.is_delete == False
+        ).all()
+
+        all_complete = all(c.is_completed for c in review_checklists)
+        logger.info(f"All review checklists completed: {all_complete}")
+
+        # Child task is the task being reviewed
+        child_task = db.query(Task).filter(
+            Task.parent_task_id == parent_task_id,
+            Task.is_delete == False
+        ).first()
+
+        if child_task:
+            if completed and all_complete:
+                parent_task.status = TaskStatus.In_Review
+                old_status = child_task.status
+                if child_task.previous_status != old_status:
+                    child_task.previous_status = old_status
+                child_task.status = TaskStatus.To_Do
+                child_task.is_reviewed = False
+                logger.info(f"All review checklists done, setting child_task {child_task.task_id} status to To_Do")
+                log_task_field_change(db, child_task.task_id, "status", old_status, TaskStatus.To_Do, 2)
+
+
+            elif reopened:
+                logger.info(f"Checklist marked incomplete, reverting parent_task and child_task statuses")
+                log_task_field_change(db, parent_task.task_id, "status", parent_task.status, parent_task.previous_status, Current_user.employee_id)
+                parent_task.status = "To_Do"
+                db.flush()
+
+                child_task.status = child_task.previous_status
+                log_task_field_change(db, child_task.task_id, "status", child_task.status, child_task.previous_status, 2)
+                logger.info(f"Child task {child_task.task_id} marked as {child_task.previous_status}")
+
+                db.flush()
+
+
+
+def settle_parent_tasks(db, groups, Current_user, logger):
+    """
+    settle_parent_task for every (parent_task, completed, reopened) of a bulk
+    update. Completion is settled for all Normal parents together, so their
+    shared ancestors are settled once each, bottom-up; the reopen walks then
+    share one visited set, so each ancestor checklist is reopened once.
+    """
+    update_parent_tasks_status(
+        [parent.task_id for parent, completed, _ in groups if completed and parent.task_type == TaskType.Normal],
+        db, Current_user
+    )
+    visited = set()
+    for parent, completed, reopened in groups:
+        if parent.task_type == TaskType.Normal:
+            if reopened:
+                logger.debug(f"Normal task - Propagating checklist change for parent_task_id={parent.task_id}")
+                propagate_incomplete_upwards(reopened[0], db, Current_user, visited)
+        else:
+            settle_parent_task(db, parent, completed, reopened, Current_user, logger)
+
 
 @router.post("/mark_checklist_complete")
 def update_Status(data: UpdateStatus, db: Session = Depends(get_db), Current_user: int = Depends(get_current_user)):
@@ -61,11 +144,11 @@ def update_Status(data: UpdateStatus, db: Session = Depends(get_db), Current_use
         ).first()
 
         if data.is_completed:
-            time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == parent_task.task_id,TaskTimeLog.end_time == None).order_by(desc(TaskTimeLog.start_time)).first()
+            time = open_timer(db, parent_task.task_id)
             if time is None:
                 return {"Start time": "No active time tracking found for this task."}
         if data.is_completed == False:
-            time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == parent_task.task_id).order_by(desc(TaskTimeLog.start_time)).first()
+            time = latest_time_log(db, parent_task.task_id)
             if not time:
                 return {"End time": "No active time tracking found for this task."}
 
@@ -101,99 +184,19 @@ def update_Status(data: UpdateStatus, db: Session = Depends(get_db), Current_use
         logger.info(f"Checklist {data.checklist_id} marked as {'completed' if data.is_completed else 'incomplete'}")
          
         
-        if parent_task.task_type == TaskType.Normal:
-            logger.debug(f"Normal task - Propagating checklist change for parent_task_id={parent_task_id}")
-            
-            if data.is_completed:
-                update_parent_task_status(parent_task_id, db, Current_user)
-            else:
-                
-                propagate_incomplete_upwards(data.checklist_id, db, Current_user)
-
-        elif parent_task.task_type == TaskType.Review:
-            logger.debug(f"Review task - Processing checklist change for parent_task_id={parent_task_id}")
-            review_checklists = db.query(Checklist).join(
-                TaskChecklistLink,
-                TaskChecklistLink.checklist_id == Checklist.checklist_id
-            ).filter(
-                TaskChecklistLink.parent_task_id == parent_task_id,
-                Checklist.is_delete == False
-            ).all()
-
-            all_complete = all(c.is_completed for c in review_checklists)
-            logger.info(f"All review checklists completed: {all_complete}")
-
-            # Child task is the task being reviewed
-            child_task = db.query(Task).filter(
-                Task.parent_task_id == parent_task_id,
-                Task.is_delete == False
-            ).first()
-
-            if child_task:
-                if data.is_completed and all_complete:
-                    parent_task.status = TaskStatus.In_Review
-                    old_status = child_task.status
-                    if child_task.previous_status != old_status:
-                        child_task.previous_status = old_status
-                    child_task.status = TaskStatus.To_Do
-                    child_task.is_reviewed = False
-                    logger.info(f"All review checklists done, setting child_task {child_task.task_id} status to To_Do")
-                    log_task_field_change(db, child_task.task_id, "status", old_status, TaskStatus.To_Do, 2)
-
-
-                elif not data.is_completed:
-                    logger.info(f"Checklist marked incomplete, reverting parent_task and child_task statuses")
-                    log_task_field_change(db, parent_task.task_id, "status", parent_task.status, parent_task.previous_status, Current_user.employee_id)
-                    parent_task.status = "To_Do"
-                    db.flush()
-
-                    child_task.status = child_task.previous_status
-                    log_task_field_change(db, child_task.task_id, "status", child_task.status, child_task.previous_status, 2)
-                    logger.info(f"Child task {child_task.task_id} marked as {child_task.previous_status}")
-
-                    db.flush()
+        completed, reopened = ([data.checklist_id], []) if data.is_completed else ([], [data.checklist_id])
+        settle_parent_task(db, parent_task, completed, reopened, Current_user, logger)
 
         db.commit()
-        # Step 6: Calculate checklist progress for the parent task
-        parent_checklist_links = db.query(TaskChecklistLink).filter(
-            TaskChecklistLink.parent_task_id == parent_task_id
-        ).all()
-
-        parent_checklist_ids = [link.checklist_id for link in parent_checklist_links if link.checklist_id]
-
-        parent_checklists = db.query(Checklist).filter(
-            Checklist.checklist_id.in_(parent_checklist_ids),
-            Checklist.is_delete == False
-        ).all()
-
-        completed_count = sum(1 for c in parent_checklists if c.is_completed)
-        total_count = len(parent_checklists)
-        parent_checklist_progress = f"{completed_count}/{total_count}" if total_count > 0 else "0/0"
-        
         logger.info(f"Checklist status updated and committed successfully")
         # ⏱️ Add ongoing time details for the parent task (if any)
-        latest_time_log = db.query(TaskTimeLog).filter(
-            TaskTimeLog.task_id == parent_task_id,
-            TaskTimeLog.user_id == Current_user.employee_id
-        ).order_by(TaskTimeLog.start_time.desc()).first()
-
-        if latest_time_log:
-            is_ongoing = latest_time_log.end_time is None
-            ongoing_start_time = latest_time_log.start_time.isoformat()
-            ongoing_end_time = latest_time_log.end_time.isoformat() if latest_time_log.end_time else None
-        else:
-            is_ongoing = None
-            ongoing_start_time = None
-            ongoing_end_time = None
         return {
             "message": f"Checklist marked as {'complete' if data.is_completed else 'incomplete'} successfully",
             "checklist_id": data.checklist_id,
             "parent_task_id": parent_task_id,
             "status": parent_task.status,
-            "checklist_progress": parent_checklist_progress,
-            "is_ongoing": is_ongoing,
-            "ongoing_start_time": ongoing_start_time,
-            "ongoing_end_time": ongoing_end_time
+            "checklist_progress": progress_label(parent_task),
+            **session_info(db, parent_task_id, Current_user.employee_id)
         }
 
     except HTTPException:
@@ -203,8 +206,119 @@ def update_Status(data: UpdateStatus, db: Session = Depends(get_db), Current_use
         db.rollback()
         logger.exception(f"Unexpected error while updating checklist {data.checklist_id}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    
 
 
+BULK_MARK_LIMIT = 500
+
+
+def _load_bulk_targets(db, checklist_ids, user_id):
+    """(Checklist, parent task id, parent Task or None when not permitted, has subtasks) for every live checklist in one query."""
+    subtask_link = aliased(TaskChecklistLink)
+    has_subtasks = exists().where(
+        subtask_link.checklist_id == Checklist.checklist_id,
+        subtask_link.sub_task_id.isnot(None)
+    )
+    return db.query(Checklist, TaskChecklistLink.parent_task_id, Task, has_subtasks).outerjoin(
+        TaskChecklistLink,
+        (TaskChecklistLink.checklist_id == Checklist.checklist_id) & TaskChecklistLink.parent_task_id.isnot(None)
+    ).outerjoin(
+        Task,
+        (Task.task_id == TaskChecklistLink.parent_task_id)
+        & (Task.is_delete == False)
+        & or_(Task.created_by == user_id, Task.assigned_to == user_id)
+    ).filter(
+        Checklist.checklist_id.in_(checklist_ids),
+        Checklist.is_delete == False
+    ).all()
+
+
+@router.post("/bulk_mark")
+def bulk_mark_checklists(data: BulkUpdateStatus, db: Session = Depends(get_db), Current_user: int = Depends(get_current_user)):
+    """
+    Tick / untick many checklists at once. Every checklist is checked first
+    (same rules as /mark_checklist_complete; nothing changes if one fails),
+    then all flips are applied and each parent task is settled once.
+    """
+    logger = get_logger('mark_checklist_complete', 'checklist_status.log')
+    logger.info(f"POST /bulk_mark called by user_id={Current_user.employee_id} with {len(data.items)} items")
+    if len(data.items) > BULK_MARK_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MARK_LIMIT} checklists per request")
 
+    # Last entry wins when a checklist is listed twice
+    wanted = {item.checklist_id: item.is_completed for item in data.items}
+    try:
+        rows = _load_bulk_targets(db, list(wanted), Current_user.employee_id)
+        found = {checklist.checklist_id: (checklist, parent_id, parent, has_subtasks) for checklist, parent_id, parent, has_subtasks in rows}
+
+        missing = sorted(set(wanted) - found.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Checklists not found: {missing}")
+        unlinked = sorted(c for c, (_, parent_id, _, _) in found.items() if parent_id is None)
+        if unlinked:
+            raise HTTPException(status_code=404, detail=f"Checklists not linked to any parent task: {unlinked}")
+        forbidden = sorted(c for c, (_, _, parent, _) in found.items() if parent is None)
+        if forbidden:
+            raise HTTPException(status_code=403, detail=f"You don't have permission to update checklists: {forbidden}")
+        with_subtasks = sorted(c for c, (_, _, _, has_subtasks) in found.items() if has_subtasks)
+        if with_subtasks:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Checklists have sub-tasks and cannot be marked as complete/incomplete directly: {with_subtasks}"
+            )
 
+        # Same time-tracking rules as the single endpoint, per parent task
+        completing = {found[c][1] for c, done in wanted.items() if done}
+        reopening = {found[c][1] for c, done in wanted.items() if not done}
+        running = set(db.execute(select(ActiveTimer.task_id).where(ActiveTimer.task_id.in_(completing))).scalars()) if completing else set()
+        tracked = set(db.execute(select(TaskTimeLog.task_id).where(TaskTimeLog.task_id.in_(reopening)).distinct()).scalars()) if reopening else set()
+        untimed = sorted((completing - running) | (reopening - tracked))
+        if untimed:
+            raise HTTPException(status_code=400, detail=f"No active time tracking found for tasks: {untimed}")
+
+        # Apply every flip, grouped by parent task
+        groups = {}  # parent task id -> (parent, completed ids, reopened ids)
+        for checklist_id, done in wanted.items():
+            checklist, parent_id, parent, _ = found[checklist_id]
+            if checklist.is_completed == done:
+                continue
+            log_checklist_field_change(db, checklist_id, "is_completed", checklist.is_completed, done, Current_user.employee_id)
+            checklist.is_completed = done
+            group = groups.setdefault(parent_id, (parent, [], []))
+            (group[1] if done else group[2]).append(checklist_id)
+        db.flush()
+
+        settle_parent_tasks(db, list(groups.values()), Current_user, logger)
+
+        db.commit()
+        logger.info(f"Bulk checklist update committed: {sum(len(g[1]) + len(g[2]) for g in groups.values())} changed, {len(groups)} parent tasks")
+
+        # Every task whose status or progress may have moved: the parents and their ancestors
+        parent_ids = {parent_id for _, parent_id, _, _ in found.values()}
+        touched = db.query(Task).join(
+            TaskClosure, TaskClosure.ancestor_id == Task.task_id
+        ).filter(TaskClosure.descendant_id.in_(parent_ids)).distinct().order_by(Task.task_id).all()
+        return {
+            "message": "Checklists updated successfully",
+            "checklists": [
+                {"checklist_id": c, "parent_task_id": found[c][1], "is_completed": found[c][0].is_completed}
+                for c in wanted
+            ],
+            "tasks": [
+                {
+                    "task_id": task.task_id,
+                    "task_name": task.task_name,
+                    "task_type": task.task_type,
+                    "status": task.status,
+                    "checklist_progress": progress_label(task)
+                }
+                for task in touched
+            ]
+        }
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.exception("Unexpected error while bulk updating checklists")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
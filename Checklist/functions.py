@@ -1,8 +1,13 @@
 from passlib.context import CryptContext
-from models.models import Task, Checklist, TaskChecklistLink, TaskStatus, TaskType, TaskTimeLog
-from sqlalchemy import desc
+from sqlalchemy import insert, select, func
+from sqlalchemy.orm import aliased
+from models.models import Task, Checklist, TaskChecklistLink, TaskStatus, TaskType, TaskClosure
 from Logs.functions import log_task_field_change, log_checklist_field_change
-from datetime import datetime
+from Tasks.timers import stop_timer, reopen_latest
+from Checklist.progress import mark_progress_dirty
+from Tasks.tree_versions import touch_trees
+from Tasks.hierarchy import VIA_CHECKLIST
+from database.bulk import insert_returning_ids
 from logger.logger import get_logger
 
 def update_task_status(task, new_status, db, current_user_id):
@@ -16,11 +21,8 @@ def update_task_status(task, new_status, db, current_user_id):
         db.flush()
 
 
-def update_parent_task_status(task_id, db, Current_user):
-   
-    if not task_id:
-        return
-
+def _settle_task_status(task_id, db):
+    """Status of `task_id` (and its review task) from its own checklists; False when the task is gone."""
     task_checklists = db.query(Checklist).join(
         TaskChecklistLink, Checklist.checklist_id == TaskChecklistLink.checklist_id
     ).filter(
@@ -30,19 +32,13 @@ def update_parent_task_status(task_id, db, Current_user):
 
     task = db.query(Task).filter(Task.task_id == task_id, Task.is_delete == False).first()
     if not task:
-        return
+        return False
 
     if all(cl.is_completed for cl in task_checklists):
         new_status = TaskStatus.In_Review if task.is_review_required else TaskStatus.Completed
         update_task_status(task, new_status, db, 1)
 
-        time = db.query(TaskTimeLog).filter(
-            TaskTimeLog.task_id == task.task_id,
-            TaskTimeLog.end_time == None
-        ).first()
-        if time is not None:
-            time.end_time = datetime.now()
-            db.flush()
+        stop_timer(db, task.task_id)
 
         if task.is_review_required:
             review_task = db.query(Task).filter(Task.parent_task_id == task.task_id).first()
@@ -57,8 +53,17 @@ def update_parent_task_status(task_id, db, Current_user):
     else:
         if task.status != TaskStatus.In_Progress:
             update_task_status(task, TaskStatus.In_Progress, db, 1)
+    return True
 
 
+def update_parent_task_status(task_id, db, Current_user):
+   
+    if not task_id:
+        return
+
+    if not _settle_task_status(task_id, db):
+        return
+
     parent_checklists = db.query(TaskChecklistLink.checklist_id).filter(
         TaskChecklistLink.sub_task_id == task_id
     ).all()
@@ -67,9 +72,54 @@ def update_parent_task_status(task_id, db, Current_user):
         update_checklist_for_subtask_completion(parent_checklist[0], db, Current_user)
 
 
-def update_checklist_for_subtask_completion(checklist_id, db, Current_user):
-    
-
+def update_parent_tasks_status(task_ids, db, Current_user):
+    """
+    update_parent_task_status for several tasks at once (bulk checklist
+    updates). Each task is settled once; then their checklist ancestors are
+    visited once each, deepest first, so a checklist shared by several of
+    the tasks is checked after all of them and an ancestor task is settled
+    once after every checklist of it that completed.
+    """
+    task_ids = sorted({t for t in task_ids if t})
+    if not task_ids:
+        return
+    ancestors = set(db.execute(
+        select(TaskClosure.ancestor_id).where(
+            TaskClosure.descendant_id.in_(task_ids),
+            TaskClosure.via == VIA_CHECKLIST,
+            TaskClosure.depth > 0
+        )
+    ).scalars())
+    # A task that is also an ancestor of another one is settled in the walk, after its subtasks
+    reached = {t for t in task_ids if t not in ancestors and _settle_task_status(t, db)}
+    if not ancestors:
+        return
+    # A task is always deeper below its root than the task its checklist belongs to
+    height = dict(db.execute(
+        select(TaskClosure.descendant_id, func.max(TaskClosure.depth))
+        .where(TaskClosure.descendant_id.in_(ancestors))
+        .group_by(TaskClosure.descendant_id)
+    ).all())
+
+    parent_link = aliased(TaskChecklistLink)
+    sub_link = aliased(TaskChecklistLink)
+    for task_id in sorted(ancestors, key=lambda t: (-height[t], t)):
+        # Checklists of this task that one of the settled tasks hangs from
+        checklist_ids = db.execute(
+            select(parent_link.checklist_id).join(
+                sub_link, sub_link.checklist_id == parent_link.checklist_id
+            ).where(
+                parent_link.parent_task_id == task_id,
+                sub_link.sub_task_id.in_(reached)
+            ).distinct().order_by(parent_link.checklist_id)
+        ).scalars().all()
+        completed = [c for c in checklist_ids if _complete_checklist_if_done(c, db, Current_user)]
+        if (completed or task_id in task_ids) and _settle_task_status(task_id, db):
+            reached.add(task_id)
+
+
+def _complete_checklist_if_done(checklist_id, db, Current_user):
+    """Tick `checklist_id` when every live subtask under it is Completed; True when it was ticked."""
     subtask_ids = db.query(TaskChecklistLink.sub_task_id).filter(
         TaskChecklistLink.checklist_id == checklist_id,
         TaskChecklistLink.sub_task_id.isnot(None)
@@ -77,7 +127,7 @@ def update_checklist_for_subtask_completion(checklist_id, db, Current_user):
     subtask_ids = [st_id[0] for st_id in subtask_ids if st_id[0] is not None]
 
     if not subtask_ids:
-        return
+        return False
 
     subtask_statuses = db.query(Task.status).filter(
         Task.task_id.in_(subtask_ids),
@@ -97,14 +147,22 @@ def update_checklist_for_subtask_completion(checklist_id, db, Current_user):
             log_checklist_field_change(db, checklist_id, "is_completed", checklist.is_completed, True, Current_user.employee_id)
             checklist.is_completed = True
             db.flush()
+            return True
+    return False
 
-            parent_tasks = db.query(TaskChecklistLink.parent_task_id).filter(
-                TaskChecklistLink.checklist_id == checklist_id,
-                TaskChecklistLink.parent_task_id.isnot(None)
-            ).all()
 
-            for parent in parent_tasks:
-                update_parent_task_status(parent[0], db, Current_user)
+def update_checklist_for_subtask_completion(checklist_id, db, Current_user):
+    
+    if not _complete_checklist_if_done(checklist_id, db, Current_user):
+        return
+
+    parent_tasks = db.query(TaskChecklistLink.parent_task_id).filter(
+        TaskChecklistLink.checklist_id == checklist_id,
+        TaskChecklistLink.parent_task_id.isnot(None)
+    ).all()
+
+    for parent in parent_tasks:
+        update_parent_task_status(parent[0], db, Current_user)
 
 
 def propagate_incomplete_upwards(checklist_id, db, Current_user, visited_checklists=None):
@@ -152,34 +210,25 @@ def propagate_incomplete_upwards(checklist_id, db, Current_user, visited_checkli
 
             old_status = task.status
             if old_status in [TaskStatus.Completed, TaskStatus.In_Review]:
-                time = db.query(TaskTimeLog).filter(
-                    TaskTimeLog.task_id == task.task_id
-                ).order_by(desc(TaskTimeLog.start_time)).first()
-
-                if time:
-                    time.end_time = None
-                    db.flush()
+                reopen_latest(db, task.task_id)
 
                 new_status = TaskStatus.To_Do if completed_count == 0 else TaskStatus.In_Progress
                 update_task_status(task, new_status, db, Current_user.employee_id)
 
-            if task.is_review_required:
-                review_task = db.query(Task).filter(Task.parent_task_id == task.task_id).first()
-                if review_task and review_task.previous_status:
-                    cur = review_task.status
-                    old = review_task.previous_status
-                    review_task.status = old
-                    review_task.previous_status = cur
-                    log_task_field_change(db, task.task_id, "status", cur, old, Current_user.employee_id)
-                    db.flush()
-
-                    if old in [TaskStatus.Completed, TaskStatus.In_Review]:
-                        time = db.query(TaskTimeLog).filter(
-                            TaskTimeLog.task_id == task.task_id
-                        ).order_by(desc(TaskTimeLog.start_time)).first()
-                        if time:
-                            time.end_time = None
-                            db.flush()
+                # Only when the task itself reopens: the swap is not idempotent, and a
+                # second reopened checklist further down must not swap it back
+                if task.is_review_required:
+                    review_task = db.query(Task).filter(Task.parent_task_id == task.task_id).first()
+                    if review_task and review_task.previous_status:
+                        cur = review_task.status
+                        old = review_task.previous_status
+                        review_task.status = old
+                        review_task.previous_status = cur
+                        log_task_field_change(db, task.task_id, "status", cur, old, Current_user.employee_id)
+                        db.flush()
+
+                        if old in [TaskStatus.Completed, TaskStatus.In_Review]:
+                            reopen_latest(db, task.task_id)
 
         parent_checklists = db.query(TaskChecklistLink.checklist_id).filter(
             TaskChecklistLink.sub_task_id == parent_task_id
@@ -189,5 +238,35 @@ def propagate_incomplete_upwards(checklist_id, db, Current_user, visited_checkli
             propagate_incomplete_upwards(pcl[0], db, Current_user, visited_checklists)
 
 
-
-
+def create_checklists(db, parent_task_id, names, created_by):
+    """
+    Create one checklist per name under `parent_task_id` with a multi-row
+    insert for the checklists and one for their links.
+
+    Returns the new checklists as dicts (checklist_id, checklist_name,
+    created_by, is_completed), in the order of `names`.
+    """
+    rows = [{
+        "checklist_name": name,
+        "is_completed": False,
+        "is_delete": False,
+        "created_by": created_by
+    } for name in names]
+    checklist_ids = insert_returning_ids(db, Checklist, rows)
+    if not checklist_ids:
+        return []
+    db.execute(insert(TaskChecklistLink), [
+        {"parent_task_id": parent_task_id, "checklist_id": checklist_id, "sub_task_id": None}
+        for checklist_id in checklist_ids
+    ])
+    mark_progress_dirty(db, task_ids=[parent_task_id])
+    touch_trees(db, task_ids=[parent_task_id])
+    return [
+        {
+            "checklist_id": checklist_id,
+            "checklist_name": row["checklist_name"],
+            "created_by": row["created_by"],
+            "is_completed": row["is_completed"]
+        }
+        for checklist_id, row in zip(checklist_ids, rows)
+    ]
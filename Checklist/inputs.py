@@ -10,6 +10,10 @@ class UpdateStatus(BaseModel):
     checklist_id: int
     is_completed: bool 
 
+
+class BulkUpdateStatus(BaseModel):
+    items: List[UpdateStatus]
+
 class UpdateChecklistRequest(BaseModel):
     checklist_id: int
     checklist_name: str
@@ -0,0 +1,172 @@
+import argparse
+from sqlalchemy import event, select, update, func, inspect
+from sqlalchemy.orm import Session
+from models.models import Task, Checklist, TaskChecklistLink
+from logger.logger import get_logger
+
+# Denormalized `tasks.checklist_total` / `tasks.checklist_completed`.
+#
+# ORM changes to checklists and links are picked up automatically from the
+# flush; code that changes checklists with Core update()/insert() must call
+# mark_progress_dirty(). Affected tasks are recounted in one UPDATE right
+# before the transaction commits, so the counters commit (or roll back)
+# together with the change that caused them.
+
+_DIRTY_TASKS = "progress_dirty_tasks"
+_DIRTY_CHECKLISTS = "progress_dirty_checklists"
+RECOUNT_CHUNK = 500
+
+
+def _checklist_count(completed_only=False):
+    query = select(func.count()).select_from(TaskChecklistLink).join(
+        Checklist, Checklist.checklist_id == TaskChecklistLink.checklist_id
+    ).where(
+        TaskChecklistLink.parent_task_id == Task.task_id,
+        Checklist.is_delete == False
+    )
+    if completed_only:
+        query = query.where(Checklist.is_completed == True)
+    return query.scalar_subquery()
+
+
+def progress_label(task) -> str:
+    return f"{task.checklist_completed or 0}/{task.checklist_total or 0}"
+
+
+def recount_progress(db, task_ids):
+    """Recompute the counters for `task_ids` from the checklist rows (db: Session or Connection)."""
+    task_ids = sorted({t for t in task_ids if t is not None})
+    for i in range(0, len(task_ids), RECOUNT_CHUNK):
+        chunk = task_ids[i:i + RECOUNT_CHUNK]
+        db.execute(
+            update(Task)
+            .where(Task.task_id.in_(chunk))
+            .values(
+                checklist_total=_checklist_count(),
+                checklist_completed=_checklist_count(completed_only=True),
+                updated_at=Task.updated_at  # bookkeeping, not an edit: keep onupdate (and MySQL's ON UPDATE) off it
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if isinstance(db, Session) and task_ids:
+        ids = set(task_ids)
+        for obj in list(db.identity_map.values()):
+            if isinstance(obj, Task) and obj.task_id in ids:
+                db.expire(obj, ["checklist_total", "checklist_completed"])
+
+
+def mark_progress_dirty(db: Session, task_ids=(), checklist_ids=()):
+    """Schedule a recount for tasks changed outside the ORM unit of work (bulk Core statements)."""
+    db.info.setdefault(_DIRTY_TASKS, set()).update(t for t in task_ids if t is not None)
+    db.info.setdefault(_DIRTY_CHECKLISTS, set()).update(c for c in checklist_ids if c is not None)
+
+
+def flush_progress(db: Session):
+    """Recount everything pending now instead of waiting for commit (for reads inside the transaction)."""
+    db.flush()
+    task_ids = db.info.pop(_DIRTY_TASKS, set())
+    checklist_ids = db.info.pop(_DIRTY_CHECKLISTS, set())
+    if checklist_ids:
+        task_ids |= set(db.execute(
+            select(TaskChecklistLink.parent_task_id).where(
+                TaskChecklistLink.checklist_id.in_(checklist_ids),
+                TaskChecklistLink.parent_task_id.isnot(None)
+            )
+        ).scalars())
+    if task_ids:
+        recount_progress(db, task_ids)
+
+
+def _changed(obj, *attrs):
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_progress_changes(session, flush_context):
+    tasks = set()
+    checklists = set()
+    for obj in session.new | session.deleted:
+        if isinstance(obj, TaskChecklistLink):
+            tasks.add(obj.parent_task_id)
+    for obj in session.dirty:
+        if isinstance(obj, TaskChecklistLink) and _changed(obj, "parent_task_id", "checklist_id"):
+            history = inspect(obj).attrs.parent_task_id.history
+            tasks.update(history.added or ())
+            tasks.update(history.deleted or ())
+            tasks.update(history.unchanged or ())
+        elif isinstance(obj, Checklist) and _changed(obj, "is_completed", "is_delete"):
+            checklists.add(obj.checklist_id)
+    if tasks or checklists:
+        mark_progress_dirty(session, tasks, checklists)
+
+
+@event.listens_for(Session, "before_commit")
+def _recount_before_commit(session):
+    flush_progress(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_progress_changes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_DIRTY_TASKS, None)
+        session.info.pop(_DIRTY_CHECKLISTS, None)
+
+
+# ---------- backfill / repair ----------
+def find_drift(db, limit=100):
+    """Tasks whose stored counters disagree with their checklist rows."""
+    total, completed = _checklist_count(), _checklist_count(completed_only=True)
+    return db.execute(
+        select(Task.task_id, Task.checklist_total, total, Task.checklist_completed, completed)
+        .where((Task.checklist_total != total) | (Task.checklist_completed != completed))
+        .limit(limit)
+    ).all()
+
+
+def repair_all(db, batch_size=5000):
+    """Recount every task, committing per batch; returns the number of tasks processed."""
+    logger = get_logger("checklist_progress", "checklist_progress.log")
+    last_id, processed = 0, 0
+    while True:
+        ids = db.execute(
+            select(Task.task_id).where(Task.task_id > last_id).order_by(Task.task_id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        recount_progress(db, ids)
+        db.commit()
+        last_id = ids[-1]
+        processed += len(ids)
+        logger.info(f"Recounted checklist progress for {processed} tasks (up to task_id={last_id})")
+    return processed
+
+
+def main(argv=None):
+    from database.database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m Checklist.progress")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("check", help="list tasks whose counters have drifted")
+    repair = sub.add_parser("repair", help="recount counters (all tasks, or --task-id)")
+    repair.add_argument("--task-id", type=int, action="append", default=[])
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "check":
+            rows = find_drift(db)
+            for task_id, stored_total, total, stored_completed, completed in rows:
+                print(f"task {task_id}: stored {stored_completed}/{stored_total}, actual {completed}/{total}")
+            print(f"{len(rows)} drifted task(s)")
+        elif args.task_id:
+            recount_progress(db, args.task_id)
+            db.commit()
+        else:
+            print(f"Recounted {repair_all(db)} tasks")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
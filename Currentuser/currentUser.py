@@ -1,15 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
 from fastapi import HTTPException,Depends, Request
+from sqlalchemy import event
 from database.database import get_db
 from Authentication.functions import decode_token
 from sqlalchemy.orm import Session
 from models.models import User  # Adjust the import path based on your project structure
 
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "2048"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))  # seconds
+
+
+class UserSnapshot:
+    """Detached, read-only copy of the User columns handlers need from the principal."""
+
+    __slots__ = ("employee_id", "username", "email", "designation", "department", "role", "is_active")
+
+    def __init__(self, user: User):
+        for name in self.__slots__:
+            setattr(self, name, getattr(user, name))
+
+
+class PrincipalCache:
+    """Bounded LRU of sha256(access_token) -> (decoded payload, UserSnapshot) with a TTL."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, payload: dict, user: UserSnapshot):
+        expires_at = time.time() + self.ttl
+        # Never outlive the token itself
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+        with self._lock:
+            self._entries[key] = (payload, user, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_user(self, employee_id: int):
+        with self._lock:
+            stale = [k for k, entry in self._entries.items() if entry[1].employee_id == employee_id]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _drop_cached_principal(mapper, connection, target):
+    # Any change to a user row (password, role, name...) drops its cached principals
+    principal_cache.invalidate_user(target.employee_id)
+
+
 def get_current_user(request: Request,
     db: Session = Depends(get_db)):
     token = request.cookies.get("access_token")  # Make sure this matches the actual cookie name!
     if token is None:
         raise HTTPException(status_code=401, detail="Not authenticated (token missing)")
 
+    cache_key = PrincipalCache.key_for(token)
+    cached = principal_cache.get(cache_key)
+    if cached is not None:
+        return cached[1]
+
     payload = decode_token(token)
     if payload is None:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
@@ -21,4 +123,7 @@ def get_current_user(request: Request,
     user = db.query(User).filter(User.employee_id == employee_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+
+    snapshot = UserSnapshot(user)
+    principal_cache.put(cache_key, payload, snapshot)
+    return snapshot
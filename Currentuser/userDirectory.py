@@ -0,0 +1,74 @@
+import threading
+import time
+from sqlalchemy import select
+from models.models import User
+
+
+class UserDirectory:
+    """
+    Process-wide employee_id -> username map.
+
+    The first lookup loads every user once; after that only rows whose
+    `updated_at` is at or past the last seen value are re-read, so a refresh
+    costs one indexed range query instead of a full `users` scan.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self._names = {}
+        self._watermark = None
+        self._loaded_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self, full: bool = False):
+        """Force a refresh on the next lookup (a full reload when `full` is set)."""
+        with self._lock:
+            self._stale = True
+            if full:
+                self._watermark = None
+
+    def _refresh(self, db):
+        stmt = select(User.employee_id, User.username, User.updated_at)
+        if self._watermark is None:
+            rows = db.execute(stmt).all()
+            names = {}
+        else:
+            rows = db.execute(stmt.where(User.updated_at >= self._watermark)).all()
+            names = dict(self._names)
+
+        for row in rows:
+            names[row.employee_id] = row.username
+            if row.updated_at is not None and (self._watermark is None or row.updated_at > self._watermark):
+                self._watermark = row.updated_at
+
+        # Swap rather than mutate so callers holding the previous map are unaffected
+        self._names = names
+        self._loaded_at = time.monotonic()
+        self._stale = False
+
+    def _ensure_fresh(self, db, ids=()):
+        with self._lock:
+            expired = time.monotonic() - self._loaded_at > self.refresh_interval
+            missing = any(i is not None and i not in self._names for i in ids)
+            if self._stale or expired or missing:
+                self._refresh(db)
+            return self._names
+
+    @property
+    def watermark(self):
+        """Latest `users.updated_at` seen; it moves whenever a loaded name may have changed."""
+        return self._watermark
+
+    def names_for(self, db, ids) -> dict:
+        """Return {employee_id: username} for the given ids (unknown ids are omitted)."""
+        ids = set(ids)
+        names = self._ensure_fresh(db, ids)
+        return {i: names[i] for i in ids if i in names}
+
+    def snapshot(self, db) -> dict:
+        """Return the whole (read-only) employee_id -> username map."""
+        return self._ensure_fresh(db)
+
+
+user_directory = UserDirectory()
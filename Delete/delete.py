@@ -12,6 +12,10 @@ from Logs.functions import log_checklist_field_change,log_task_field_change
 from logger.logger import get_logger
 from datetime import datetime
 from Tasks.functions import update_parent_task_status
+from Checklist.progress import mark_progress_dirty, progress_label
+from Tasks.tree_versions import touch_trees
+from Tasks.hierarchy import prune_tasks
+from Tasks.status_counts import remove_from_counts
 
 router = APIRouter()
 
@@ -56,8 +60,11 @@ def delete_related_items(
     logger.debug(f"Tasks to delete: {tasks_to_delete}")
     logger.debug(f"Checklists to delete: {checklists_to_delete}")
 
+    touch_trees(db, task_ids=tasks_to_delete, checklist_ids=checklists_to_delete)
+
     # Bulk mark tasks as deleted
     if tasks_to_delete:
+        remove_from_counts(db, tasks_to_delete)
         db.execute(
             update(Task)
             .where(Task.task_id.in_(tasks_to_delete))
@@ -72,6 +79,7 @@ def delete_related_items(
             "updated_at": datetime.now()
         } for t_id in tasks_to_delete]
         db.bulk_insert_mappings(TaskUpdateLog, logs)
+        prune_tasks(db, tasks_to_delete)
         logger.info(f"Marked tasks as deleted: {tasks_to_delete}")
 
     # Bulk mark checklists as deleted
@@ -91,6 +99,7 @@ def delete_related_items(
         } for c_id in checklists_to_delete]
         
         db.bulk_insert_mappings(ChecklistUpdateLog, logs)
+        mark_progress_dirty(db, checklist_ids=checklists_to_delete)
         
     db.flush()
     if delete_request.task_id:
@@ -99,6 +108,8 @@ def delete_related_items(
         if link:
             update_parent_task_status(link.checklist_id,db,Current_user)
 
+    parent_task = None  # ✅ Ensure variable is always defined
+    checklist_progress = None
     if delete_request.checklist_id:
         update_parent_task_status(delete_request.checklist_id, db, Current_user)
         db.flush()
@@ -115,21 +126,10 @@ def delete_related_items(
             Task.is_delete == False
         ).first()
 
-        parent_task_checklists = db.query(TaskChecklistLink).filter(
-                TaskChecklistLink.parent_task_id == parent_task.task_id,
-                TaskChecklistLink.checklist_id.isnot(None)).all()
-
-        checklist_ids = [link.checklist_id for link in parent_task_checklists]
-        checklists = db.query(Checklist).filter(Checklist.checklist_id.in_(checklist_ids),Checklist.is_delete == False).all()
-
-        completed = sum(1 for c in checklists if c.is_completed)
-        total = len(checklists)
-        checklist_progress = f"{completed}/{total}" if total > 0 else "0/0"
-
     db.commit()
     logger.info("Deletion process completed successfully.")
-    parent_task = None  # ✅ Ensure variable is always defined
-    checklist_progress = None
+    if parent_task:
+        checklist_progress = progress_label(parent_task)
     return {
         "message": "Related tasks and checklists marked as deleted",
         "tasks": list(tasks_to_delete),
@@ -1,86 +1,82 @@
-from sqlalchemy import select
+from sqlalchemy import Integer, select, literal, union, union_all
+from sqlalchemy.orm import aliased
 from models.models import Task, TaskChecklistLink, TaskType
 
+
 def get_related_tasks_checklists_logic(session, task_id, checklist_id):
-    tasks_to_process = set()
-    processed_tasks = set()
-    processed_checklists = set()
+    """
+    Everything a delete of `task_id` (or `checklist_id`) cascades to, resolved
+    in a single WITH RECURSIVE statement (MySQL 8 / SQLite):
 
+    - the task, and every subtask reachable through its checklists;
+    - the live review chain under each of those tasks;
+    - the checklists of those tasks, plus the checklists review tasks hang from.
+    """
     if task_id:
-        tasks_to_process.add(task_id)
+        anchor = select(literal(task_id, Integer).label("task_id"))
+        checklist_ids = []
     elif checklist_id:
-        results = session.execute(
-            select(TaskChecklistLink.sub_task_id)
-            .where(TaskChecklistLink.checklist_id == checklist_id)
-        ).scalars().all()
-        results = [task for task in results if task is not None]
-        if results:
-            tasks_to_process.update(results)
-            processed_checklists.add(checklist_id)
-        else:
+        anchor = select(TaskChecklistLink.sub_task_id.label("task_id")).where(
+            TaskChecklistLink.checklist_id == checklist_id,
+            TaskChecklistLink.sub_task_id.isnot(None)
+        )
+        if session.execute(anchor.limit(1)).first() is None:
             return {"tasks": [], "checklists": [checklist_id]}
+        checklist_ids = [checklist_id]
+    else:
+        return {"tasks": [], "checklists": []}
 
-    while tasks_to_process:
-        new_tasks = set()
-        new_checklists = set()
-
-        for tid in tasks_to_process:
-            if tid in processed_tasks:
-                continue
-            processed_tasks.add(tid)
-
-            # 👇 RECURSIVELY process all review tasks linked to this task
-            review_stack = [tid]
-            while review_stack:
-                current = review_stack.pop()
-                review_tasks = session.execute(
-                    select(Task.task_id)
-                    .where(
-                        Task.parent_task_id == current,
-                        Task.task_type == TaskType.Review,
-                        Task.is_delete == False
-                    )
-                ).scalars().all()
-
-                for review_task_id in review_tasks:
-                    if review_task_id not in processed_tasks:
-                        processed_tasks.add(review_task_id)
-                        review_stack.append(review_task_id)  # continue recursive review traversal
-
-                        # Checklists linked to review task
-                        review_checklists = session.execute(
-                            select(TaskChecklistLink.checklist_id)
-                            .where(TaskChecklistLink.sub_task_id == review_task_id)
-                        ).scalars().all()
-                        for cid in review_checklists:
-                            if cid and cid not in processed_checklists:
-                                processed_checklists.add(cid)
+    # Task -> subtask edges: through one of its checklists, or linked directly
+    parent_link = aliased(TaskChecklistLink)
+    sub_link = aliased(TaskChecklistLink)
+    edges = union_all(
+        select(parent_link.parent_task_id.label("parent_id"), sub_link.sub_task_id.label("child_id"))
+        .join(sub_link, sub_link.checklist_id == parent_link.checklist_id)
+        .where(parent_link.parent_task_id.isnot(None), sub_link.sub_task_id.isnot(None)),
+        select(TaskChecklistLink.parent_task_id, TaskChecklistLink.sub_task_id)
+        .where(TaskChecklistLink.parent_task_id.isnot(None), TaskChecklistLink.sub_task_id.isnot(None))
+    ).subquery("edges")
 
-            # 👇 Existing logic: get child checklists/subtasks
-            results = session.execute(
-                select(TaskChecklistLink.checklist_id, TaskChecklistLink.sub_task_id)
-                .where(TaskChecklistLink.parent_task_id == tid)
-            ).all()
+    # UNION (not UNION ALL) so a malformed cycle terminates
+    subtree = anchor.cte("subtree", recursive=True)
+    subtree = subtree.union(
+        select(edges.c.child_id).join(subtree, edges.c.parent_id == subtree.c.task_id)
+    )
 
-            for checklist_id, sub_task_id in results:
-                if checklist_id and checklist_id not in processed_checklists:
-                    new_checklists.add(checklist_id)
-                    processed_checklists.add(checklist_id)
-                if sub_task_id and sub_task_id not in processed_tasks:
-                    new_tasks.add(sub_task_id)
+    review_task = aliased(Task)
+    reviews = select(review_task.task_id.label("task_id")).join(
+        subtree, review_task.parent_task_id == subtree.c.task_id
+    ).where(
+        review_task.task_type == TaskType.Review,
+        review_task.is_delete == False
+    ).cte("reviews", recursive=True)
+    next_review = aliased(Task)
+    reviews = reviews.union(
+        select(next_review.task_id).join(reviews, next_review.parent_task_id == reviews.c.task_id).where(
+            next_review.task_type == TaskType.Review,
+            next_review.is_delete == False
+        )
+    )
 
-        for checklist_id in new_checklists:
-            results = session.execute(
-                select(TaskChecklistLink.sub_task_id)
-                .where(TaskChecklistLink.checklist_id == checklist_id)
-            ).scalars().all()
-            for sub_task_id in results:
-                if sub_task_id and sub_task_id not in processed_tasks:
-                    new_tasks.add(sub_task_id)
+    related = union(
+        select(literal("task").label("kind"), subtree.c.task_id.label("id")),
+        select(literal("task"), reviews.c.task_id),
+        select(literal("checklist"), TaskChecklistLink.checklist_id)
+        .join(subtree, TaskChecklistLink.parent_task_id == subtree.c.task_id)
+        .where(TaskChecklistLink.checklist_id.isnot(None)),
+        select(literal("checklist"), TaskChecklistLink.checklist_id)
+        .join(reviews, TaskChecklistLink.sub_task_id == reviews.c.task_id)
+        .where(TaskChecklistLink.checklist_id.isnot(None)),
+    )
 
-        tasks_to_process = new_tasks
+    task_ids = []
+    for kind, item_id in session.execute(related):
+        if kind == "task":
+            task_ids.append(item_id)
+        elif item_id not in checklist_ids:
+            checklist_ids.append(item_id)
 
     return {
-        "tasks": list(processed_tasks),
-        "checklists": list(processed_checklists)
+        "tasks": task_ids,
+        "checklists": checklist_ids
     }
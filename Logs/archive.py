@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+from itertools import groupby
+from sqlalchemy import select, insert, delete, func
+from models.models import (
+    Task, TaskStatus, TaskClosure, TaskChecklistLink,
+    TaskUpdateLog, ChecklistUpdateLog, TaskUpdateLogArchive, ChecklistUpdateLogArchive
+)
+from logger.logger import get_logger
+
+# Hot/cold storage for task_update_logs and checklist_update_logs.
+#
+# `python -m Logs.archive run` moves log rows older than LOG_ARCHIVE_AFTER_DAYS
+# out of the hot tables once the task tree they belong to is finished: the task
+# was soft-deleted, or every live task of its tree (task_closure) is Completed.
+# Rows are packed per task / checklist into zlib-compressed JSON chunks of at
+# most LOG_ARCHIVE_CHUNK_ROWS rows; each batch of tasks commits on its own, so
+# the job can be stopped and rerun at any point.
+#
+# Readers go through task_logs() / checklist_logs(), which merge both stores.
+# Archived rows come back as detached TaskUpdateLog / ChecklistUpdateLog objects.
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("LOG_ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_CHUNK_ROWS = int(os.getenv("LOG_ARCHIVE_CHUNK_ROWS", "500"))
+ARCHIVE_BATCH_TASKS = int(os.getenv("LOG_ARCHIVE_BATCH_TASKS", "200"))
+DELETE_CHUNK = 1000
+
+# (hot model, archive model, owner column)
+TASK_LOGS = (TaskUpdateLog, TaskUpdateLogArchive, "task_id")
+CHECKLIST_LOGS = (ChecklistUpdateLog, ChecklistUpdateLogArchive, "checklist_id")
+
+
+def _pack(rows) -> bytes:
+    data = [
+        [log_id, field_name, old_value, new_value, updated_by, updated_at.isoformat() if updated_at else None]
+        for log_id, _, field_name, old_value, new_value, updated_by, updated_at in rows
+    ]
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(log_model, owner, owner_id, payload):
+    for log_id, field_name, old_value, new_value, updated_by, updated_at in json.loads(zlib.decompress(payload)):
+        yield log_model(**{
+            "log_id": log_id,
+            owner: owner_id,
+            "field_name": field_name,
+            "old_value": old_value,
+            "new_value": new_value,
+            "updated_by": updated_by,
+            "updated_at": datetime.fromisoformat(updated_at) if updated_at else None,
+        })
+
+
+# ---------- reads ----------
+def _read(db, kind, owner_ids, field_names=None):
+    log_model, archive_model, owner = kind
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return []
+    hot = db.query(log_model).filter(getattr(log_model, owner).in_(owner_ids))
+    if field_names is not None:
+        hot = hot.filter(log_model.field_name.in_(field_names))
+    logs = hot.all()
+
+    chunks = db.execute(
+        select(getattr(archive_model, owner), archive_model.payload).where(
+            getattr(archive_model, owner).in_(owner_ids)
+        )
+    ).all()
+    for owner_id, payload in chunks:
+        logs.extend(
+            log for log in _unpack(log_model, owner, owner_id, payload)
+            if field_names is None or log.field_name in field_names
+        )
+    logs.sort(key=lambda log: (log.updated_at or datetime.min, log.log_id))
+    return logs
+
+
+def task_logs(db, task_ids, field_names=None):
+    """TaskUpdateLog rows of one or more tasks from hot and archived storage, oldest first."""
+    if isinstance(task_ids, int):
+        task_ids = [task_ids]
+    return _read(db, TASK_LOGS, task_ids, field_names)
+
+
+def checklist_logs(db, checklist_ids, field_names=None):
+    """ChecklistUpdateLog rows of the given checklists from hot and archived storage, oldest first."""
+    return _read(db, CHECKLIST_LOGS, checklist_ids, field_names)
+
+
+# ---------- archival ----------
+def finished_task_ids(db, task_ids) -> list:
+    """The tasks among `task_ids` whose logs may be archived: deleted, or in a fully Completed tree."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return []
+    deleted = dict(db.execute(select(Task.task_id, Task.is_delete).where(Task.task_id.in_(task_ids))).all())
+
+    # Root of each live task = its farthest ancestor (the task itself when it has none)
+    live = [task_id for task_id, is_delete in deleted.items() if not is_delete]
+    roots = {task_id: (task_id, 0) for task_id in live}
+    if live:
+        rows = db.execute(
+            select(TaskClosure.descendant_id, TaskClosure.ancestor_id, TaskClosure.depth).where(
+                TaskClosure.descendant_id.in_(live)
+            )
+        ).all()
+        for task_id, ancestor_id, depth in rows:
+            if depth > roots[task_id][1]:
+                roots[task_id] = (ancestor_id, depth)
+
+    open_roots = set()
+    root_ids = {root for root, _ in roots.values()}
+    if root_ids:
+        open_roots = set(db.execute(
+            select(TaskClosure.ancestor_id).join(Task, Task.task_id == TaskClosure.descendant_id).where(
+                TaskClosure.ancestor_id.in_(root_ids),
+                Task.is_delete == False,
+                Task.status != TaskStatus.Completed
+            ).distinct()
+        ).scalars())
+
+    return [
+        task_id for task_id in task_ids
+        if task_id in deleted and (deleted[task_id] or roots[task_id][0] not in open_roots)
+    ]
+
+
+def _move(db, kind, owner_ids, cutoff, chunk_rows) -> int:
+    """Pack the rows of `owner_ids` older than `cutoff` into archive chunks and delete them from the hot table."""
+    log_model, archive_model, owner = kind
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return 0
+    owner_col = getattr(log_model, owner)
+    rows = db.execute(
+        select(
+            log_model.log_id, owner_col, log_model.field_name, log_model.old_value,
+            log_model.new_value, log_model.updated_by, log_model.updated_at
+        ).where(
+            owner_col.in_(owner_ids),
+            log_model.updated_at < cutoff
+        ).order_by(owner_col, log_model.log_id)
+    ).all()
+    if not rows:
+        return 0
+
+    chunks = []
+    for owner_id, owned in groupby(rows, key=lambda row: row[1]):
+        owned = list(owned)
+        for start in range(0, len(owned), chunk_rows):
+            chunk = owned[start:start + chunk_rows]
+            times = [row[6] for row in chunk if row[6] is not None]
+            chunks.append({
+                owner: owner_id,
+                "row_count": len(chunk),
+                "first_updated_at": min(times) if times else None,
+                "last_updated_at": max(times) if times else None,
+                "payload": _pack(chunk),
+            })
+    db.execute(insert(archive_model), chunks)
+
+    log_ids = [row[0] for row in rows]
+    for start in range(0, len(log_ids), DELETE_CHUNK):
+        db.execute(
+            delete(log_model).where(log_model.log_id.in_(log_ids[start:start + DELETE_CHUNK]))
+            .execution_options(synchronize_session=False)
+        )
+    return len(rows)
+
+
+def archive_logs(db, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_TASKS, chunk_rows=ARCHIVE_CHUNK_ROWS):
+    """Archive old logs of finished task trees, committing per batch of tasks; returns (task rows, checklist rows) moved."""
+    logger = get_logger("log_archive", "log_archive.log")
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    last_id, moved_tasks, moved_checklists = 0, 0, 0
+    while True:
+        ids = db.execute(
+            select(Task.task_id).where(Task.task_id > last_id).order_by(Task.task_id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        last_id = ids[-1]
+        finished = finished_task_ids(db, ids)
+        if not finished:
+            continue
+        checklist_ids = db.execute(
+            select(TaskChecklistLink.checklist_id).where(
+                TaskChecklistLink.parent_task_id.in_(finished),
+                TaskChecklistLink.checklist_id.isnot(None)
+            ).distinct()
+        ).scalars().all()
+        task_rows = _move(db, TASK_LOGS, finished, cutoff, chunk_rows)
+        checklist_rows = _move(db, CHECKLIST_LOGS, checklist_ids, cutoff, chunk_rows)
+        db.commit()
+        if task_rows or checklist_rows:
+            moved_tasks += task_rows
+            moved_checklists += checklist_rows
+            logger.info(
+                f"Archived {task_rows} task / {checklist_rows} checklist log rows (tasks up to task_id={last_id})"
+            )
+    return moved_tasks, moved_checklists
+
+
+def storage_stats(db) -> dict:
+    stats = {}
+    for name, (log_model, archive_model, _) in (("task", TASK_LOGS), ("checklist", CHECKLIST_LOGS)):
+        hot = db.execute(select(func.count()).select_from(log_model)).scalar()
+        chunks, cold = db.execute(
+            select(func.count(), func.coalesce(func.sum(archive_model.row_count), 0))
+        ).one()
+        stats[name] = {"hot_rows": hot, "archived_rows": cold, "archive_chunks": chunks}
+    return stats
+
+
+def main(argv=None):
+    from database.database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m Logs.archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="archive old logs of completed / deleted task trees")
+    run.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    run.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_TASKS)
+    run.add_argument("--chunk-rows", type=int, default=ARCHIVE_CHUNK_ROWS)
+    sub.add_parser("stats", help="row counts in hot and archived storage")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "run":
+            task_rows, checklist_rows = archive_logs(db, args.days, args.batch_size, args.chunk_rows)
+            print(f"Archived {task_rows} task log rows and {checklist_rows} checklist log rows")
+        else:
+            for name, counts in storage_stats(db).items():
+                print(f"{name}: {counts['hot_rows']} hot, {counts['archived_rows']} archived in {counts['archive_chunks']} chunks")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
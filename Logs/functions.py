@@ -1,7 +1,40 @@
 from enum import Enum
 from datetime import datetime
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
 from models.models import TaskUpdateLog,ChecklistUpdateLog
 
+# Log entries are buffered on the session (db.info) and written with one
+# multi-row INSERT per table right before the transaction commits, instead of
+# a flush per entry. They commit or roll back with the change they describe.
+_PENDING = {TaskUpdateLog: "pending_task_update_logs", ChecklistUpdateLog: "pending_checklist_update_logs"}
+
+
+def _queue(db, model, row):
+    # Queueing runs no SQL; without a transaction a rollback() would not reach _forget_pending_logs
+    if not db.in_transaction():
+        db.begin()
+    db.info.setdefault(_PENDING[model], []).append(row)
+
+
+@event.listens_for(Session, "before_commit")
+def _write_pending_logs(session):
+    if not any(key in session.info for key in _PENDING.values()):
+        return
+    session.flush()  # rows the logs point at (new tasks / checklists) go first
+    for model, key in _PENDING.items():
+        rows = session.info.pop(key, None)
+        if rows:
+            session.execute(insert(model).values(rows))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_pending_logs(session, previous_transaction):
+    if not session.in_transaction():
+        for key in _PENDING.values():
+            session.info.pop(key, None)
+
+
 def log_task_field_change(db, task_id: int, field_name: str, old_value, new_value, user_id):
     """
     Generic logger for any field change in a task.
@@ -24,16 +57,14 @@ def log_task_field_change(db, task_id: int, field_name: str, old_value, new_valu
         if old_str == new_str:
             return
 
-        log = TaskUpdateLog(
-            task_id=task_id,
-            field_name=field_name,
-            old_value=old_str,
-            new_value=new_str,
-            updated_by=user_id,
-            updated_at=datetime.now()
-        )
-        db.add(log)
-        db.flush()  # Let the main transaction handle commit
+        _queue(db, TaskUpdateLog, {
+            "task_id": task_id,
+            "field_name": field_name,
+            "old_value": old_str,
+            "new_value": new_str,
+            "updated_by": user_id,
+            "updated_at": datetime.now()
+        })
 
     except Exception as e:
         import logging
@@ -60,16 +91,14 @@ def log_checklist_field_change(db, checklist_id: int, field_name: str, old_value
         old_str = old_value.name if isinstance(old_value, Enum) else str(old_value)
         new_str = new_value.name if isinstance(new_value, Enum) else str(new_value)
 
-        log = ChecklistUpdateLog(
-            checklist_id=checklist_id,
-            field_name=field_name,
-            old_value=old_str,
-            new_value=new_str,
-            updated_by=user_id,
-            updated_at=datetime.now()
-        )
-        db.add(log)
-        db.flush()
+        _queue(db, ChecklistUpdateLog, {
+            "checklist_id": checklist_id,
+            "field_name": field_name,
+            "old_value": old_str,
+            "new_value": new_str,
+            "updated_by": user_id,
+            "updated_at": datetime.now()
+        })
 
     except Exception as e:
         import logging
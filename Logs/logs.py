@@ -1,33 +1,34 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from database.database import get_db
+from database.database import get_read_db
 from models.models import (
-    Task, User, TaskUpdateLog, Checklist, ChecklistUpdateLog,
+    Task, User, Checklist,
     TaskChecklistLink, TaskType
 )
+from Logs.archive import task_logs, checklist_logs
 from Currentuser.currentUser import get_current_user
+from Currentuser.userDirectory import user_directory
 
 router = APIRouter()
 
 @router.get("/log_summary")
-def get_task_log_summary(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_task_log_summary(task_id: int, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     task = db.query(Task).filter(Task.task_id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
     logs = []
 
-    creator = db.query(User).filter(User.employee_id == task.created_by).first()
-    assignee = db.query(User).filter(User.employee_id == task.assigned_to).first()
+    user_map = user_directory.snapshot(db)
 
-    logs.append(f"Task '{task.task_name}' was created by {creator.username if creator else 'Unknown'} on {task.created_at.strftime('%Y-%m-%d %H:%M:%S')}.")
+    logs.append(f"Task '{task.task_name}' was created by {user_map.get(task.created_by, 'Unknown')} on {task.created_at.strftime('%Y-%m-%d %H:%M:%S')}.")
 
     if task.due_date:
         logs.append(f"Due date set to {task.due_date.strftime('%Y-%m-%d')}.")
 
-    if assignee:
-        logs.append(f"Assigned to {assignee.username} (ID: {assignee.employee_id}).")
+    if task.assigned_to in user_map:
+        logs.append(f"Assigned to {user_map[task.assigned_to]} (ID: {task.assigned_to}).")
 
     # Checklist creation logs
     checklist_links = db.query(TaskChecklistLink).filter(TaskChecklistLink.parent_task_id == task_id).all()
@@ -59,27 +60,19 @@ def get_task_log_summary(task_id: int, db: Session = Depends(get_db), current_us
 
             # Subtask deletion log
             if sub_task.is_delete:
-                delete_log = db.query(TaskUpdateLog).filter(
-                    TaskUpdateLog.task_id == sub_task.task_id,
-                    TaskUpdateLog.field_name == 'is_delete',
-                    TaskUpdateLog.new_value == 'True'
-                ).order_by(TaskUpdateLog.updated_at.desc()).first()
+                delete_logs = [log for log in task_logs(db, sub_task.task_id, ["is_delete"]) if log.new_value == 'True']
+                delete_log = delete_logs[-1] if delete_logs else None
 
                 if delete_log:
-                    deleter = db.query(User).filter(User.employee_id == delete_log.updated_by).first()
-                    deleter_name = deleter.username if deleter else "Unknown"
+                    deleter_name = user_map.get(delete_log.updated_by, "Unknown")
                     logs.append(
                         f"❌ Subtask '{sub_task.task_name}' was marked as deleted by {deleter_name} (ID: {delete_log.updated_by}) on {delete_log.updated_at.strftime('%Y-%m-%d %H:%M:%S')}."
                     )
 
             # Subtask field updates (output, due_date, assigned_to)
-            sub_updates = db.query(TaskUpdateLog).filter(
-                TaskUpdateLog.task_id == sub_task.task_id,
-                TaskUpdateLog.field_name.in_(["output", "due_date", "assigned_to"])
-            ).all()
+            sub_updates = task_logs(db, sub_task.task_id, ["output", "due_date", "assigned_to"])
             for log in sub_updates:
-                updater = db.query(User).filter(User.employee_id == log.updated_by).first()
-                uname = updater.username if updater else "Unknown"
+                uname = user_map.get(log.updated_by, "Unknown")
                 logs.append(
                     f"{uname} updated subtask '{sub_task.task_name}' field '{log.field_name}': '{log.old_value}' → '{log.new_value}' on {log.updated_at.strftime('%Y-%m-%d %H:%M:%S')}."
                 )
@@ -91,28 +84,23 @@ def get_task_log_summary(task_id: int, db: Session = Depends(get_db), current_us
             Task.task_type == TaskType.Review
         ).first()
         if review_task:
-            reviewer = db.query(User).filter(User.employee_id == review_task.assigned_to).first()
-            reviewer_info = f"{reviewer.username} (ID: {reviewer.employee_id})" if reviewer else f"User {review_task.assigned_to}"
+            reviewer_name = user_map.get(review_task.assigned_to)
+            reviewer_info = f"{reviewer_name} (ID: {review_task.assigned_to})" if reviewer_name else f"User {review_task.assigned_to}"
             logs.append(f"Review required. A review task (ID: {review_task.task_id}) was created and assigned to {reviewer_info}.")
 
             # Review task field updates
-            review_updates = db.query(TaskUpdateLog).filter(
-                TaskUpdateLog.task_id == review_task.task_id,
-                TaskUpdateLog.field_name.in_(["output", "due_date", "assigned_to"])
-            ).all()
+            review_updates = task_logs(db, review_task.task_id, ["output", "due_date", "assigned_to"])
             for log in review_updates:
-                updater = db.query(User).filter(User.employee_id == log.updated_by).first()
-                uname = updater.username if updater else "Unknown"
+                uname = user_map.get(log.updated_by, "Unknown")
                 logs.append(
                     f"{uname} updated review task '{review_task.task_name}' field '{log.field_name}': '{log.old_value}' → '{log.new_value}' on {log.updated_at.strftime('%Y-%m-%d %H:%M:%S')}."
                 )
 
     # Main task field update logs
-    task_updates = db.query(TaskUpdateLog).filter(TaskUpdateLog.task_id == task_id).order_by(TaskUpdateLog.updated_at).all()
+    task_updates = task_logs(db, task_id)
     initial_status_logged = False
     for log in task_updates:
-        user = db.query(User).filter(User.employee_id == log.updated_by).first()
-        username = user.username if user else "Unknown"
+        username = user_map.get(log.updated_by, "Unknown")
 
         if log.field_name == "status" and log.old_value in [None, "None"] and not initial_status_logged:
             logs.append(f"Status was initially set to '{log.new_value}' by {username} on {log.updated_at.strftime('%Y-%m-%d %H:%M:%S')}.")
@@ -124,12 +112,11 @@ def get_task_log_summary(task_id: int, db: Session = Depends(get_db), current_us
         )
 
     # Checklist updates
-    checklist_updates = db.query(ChecklistUpdateLog).filter(ChecklistUpdateLog.checklist_id.in_(checklist_ids)).order_by(ChecklistUpdateLog.updated_at).all()
+    checklist_updates = checklist_logs(db, checklist_ids)
     for log in checklist_updates:
         checklist = db.query(Checklist).filter(Checklist.checklist_id == log.checklist_id).first()
-        user = db.query(User).filter(User.employee_id == log.updated_by).first()
         checklist_name = checklist.checklist_name if checklist else f"Checklist {log.checklist_id}"
-        username = user.username if user else "Unknown"
+        username = user_map.get(log.updated_by, "Unknown")
         logs.append(
             f"{username} changed checklist '{checklist_name}' field '{log.field_name}': '{log.old_value}' → '{log.new_value}' on {log.updated_at.strftime('%Y-%m-%d %H:%M:%S')}."
         )
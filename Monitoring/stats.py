@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from database.database import get_db, pool_stats, replica_set, POOL_OPTIONS
+from models.models import User
+from Currentuser.currentUser import get_current_user, principal_cache
+from Authentication.functions import password_pool_stats
+from Authentication.mailer import outbox_stats
+from Tasks.detail_cache import detail_cache
+
+router = APIRouter()
+
+
+# Internal runtime counters; kept out of the public OpenAPI schema
+@router.get("/stats", include_in_schema=False)
+def get_internal_stats(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return {
+        "db_pool": {"config": POOL_OPTIONS, **pool_stats()},
+        "db_replicas": replica_set.stats(),
+        "principal_cache": principal_cache.stats(),
+        "task_detail_cache": detail_cache.stats(),
+        "password_pool": password_pool_stats(),
+        "email_outbox": outbox_stats(db),
+    }
@@ -0,0 +1,229 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, insert, or_
+from sqlalchemy.orm import Session
+from models.models import Task, TaskStatus, TaskType, Checklist, TaskChecklistLink, ChatRoom, ActiveTimer, User
+from Logs.functions import log_task_field_change
+from database.database import get_db
+from database.bulk import insert_returning_ids
+from Currentuser.currentUser import get_current_user
+from Tasks.inputs import BatchCreateTasks
+from Tasks.hierarchy import add_tasks, link_new_tasks, VIA_REVIEW, VIA_CHECKLIST
+from Tasks.status_counts import add_to_counts
+from Tasks.search import index_tasks
+from Tasks.tree_versions import touch_trees
+from Checklist.functions import propagate_incomplete_upwards
+from Checklist.progress import mark_progress_dirty
+from logger.logger import get_logger
+
+router = APIRouter()
+
+BATCH_CREATE_LIMIT = 1000
+
+
+class ItemError(Exception):
+    def __init__(self, status_code, detail):
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _existing_parents(db, checklist_ids, user_id):
+    """{checklist_id: parent Task} for checklists the user may add subtasks to."""
+    if not checklist_ids:
+        return {}
+    rows = db.query(TaskChecklistLink.checklist_id, Task).join(
+        Task, Task.task_id == TaskChecklistLink.parent_task_id
+    ).filter(
+        TaskChecklistLink.checklist_id.in_(checklist_ids),
+        Task.is_delete == False,
+        or_(Task.created_by == user_id, Task.assigned_to == user_id)
+    ).all()
+    return dict(rows)
+
+
+def _validate(db, items, user_id):
+    """
+    Check every item's assignee and parent checklist. Returns ({index: ItemError}
+    for the items that can't be created, {checklist_id: parent Task} of the
+    existing checklists referenced).
+    """
+    errors = {}
+    known_users = set(db.execute(
+        select(User.employee_id).where(User.employee_id.in_({item.assigned_to for item in items}))
+    ).scalars())
+    existing_ids = {item.checklist_id for item in items if item.checklist_id is not None}
+    linked = set(db.execute(
+        select(TaskChecklistLink.checklist_id).where(
+            TaskChecklistLink.checklist_id.in_(existing_ids),
+            TaskChecklistLink.parent_task_id.isnot(None)
+        )
+    ).scalars()) if existing_ids else set()
+    parents = _existing_parents(db, existing_ids, user_id)
+    timed = set(db.execute(
+        select(ActiveTimer.task_id).where(ActiveTimer.task_id.in_({t.task_id for t in parents.values()}))
+    ).scalars()) if parents else set()
+
+    for index, item in enumerate(items):
+        try:
+            if item.assigned_to not in known_users:
+                raise ItemError(404, f"User {item.assigned_to} not found")
+            ref = item.parent_checklist
+            if ref is not None and item.checklist_id is not None:
+                raise ItemError(400, "Give either checklist_id or parent_checklist, not both")
+            if ref is not None:
+                if not 0 <= ref.item < index:
+                    raise ItemError(400, "parent_checklist must refer to an earlier task in the batch")
+                if not 0 <= ref.checklist < len(items[ref.item].checklist_names):
+                    raise ItemError(400, f"Task {ref.item} of the batch has no checklist {ref.checklist}")
+                if ref.item in errors:
+                    raise ItemError(424, f"Parent task {ref.item} of the batch was not created")
+            elif item.checklist_id is not None:
+                if item.checklist_id not in linked:
+                    raise ItemError(404, "Checklist not found")
+                parent = parents.get(item.checklist_id)
+                if parent is None:
+                    raise ItemError(403, "Task not found or unauthorized")
+                if parent.task_id not in timed:
+                    raise ItemError(400, "No active time tracking found for this task.")
+                if parent.task_type == TaskType.Review:
+                    raise ItemError(400, "Cannot add subtask to a review task")
+        except ItemError as e:
+            errors[index] = e
+    return errors, parents
+
+
+@router.post("/batch_create")
+def batch_create_tasks(
+    data: BatchCreateTasks,
+    db: Session = Depends(get_db),
+    Current_user: int = Depends(get_current_user)
+):
+    """
+    Create many tasks (with their checklists, review tasks and chat rooms) in
+    one transaction. A task can be the subtask of an existing checklist
+    (`checklist_id`, same rules as Create_Task) or of a checklist created by an
+    earlier task of the batch (`parent_checklist`). Items that fail validation
+    are reported and skipped, together with the subtasks that depend on them.
+    """
+    logger = get_logger('create_task', 'create_task.log')
+    logger.info(f"Batch create endpoint hit by user_id={Current_user.employee_id} with {len(data.tasks)} tasks")
+    if len(data.tasks) > BATCH_CREATE_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_CREATE_LIMIT} tasks per batch")
+
+    user_id = Current_user.employee_id
+    try:
+        items = data.tasks
+        errors, existing_parents = _validate(db, items, user_id)
+        created = [i for i in range(len(items)) if i not in errors]
+
+        # Tasks
+        task_rows = [{
+            "task_name": items[i].task_name,
+            "description": items[i].description,
+            "due_date": items[i].due_date,
+            "assigned_to": items[i].assigned_to,
+            "status": TaskStatus.To_Do,
+            "previous_status": TaskStatus.To_Do,
+            "task_type": TaskType.Normal,
+            "created_by": user_id,
+            "is_review_required": items[i].is_review_required,
+            "is_reviewed": False,
+            "is_delete": False,
+        } for i in created]
+        task_ids = dict(zip(created, insert_returning_ids(db, Task, task_rows)))
+
+        review_items = [i for i in created if items[i].is_review_required]
+        review_rows = [{
+            "task_name": f"Review - {items[i].task_name}",
+            "due_date": items[i].due_date,
+            "assigned_to": user_id,
+            "status": TaskStatus.New,
+            "previous_status": TaskStatus.New,
+            "task_type": TaskType.Review,
+            "created_by": user_id,
+            "parent_task_id": task_ids[i],
+            "is_review_required": False,
+            "is_reviewed": False,
+            "is_delete": False,
+        } for i in review_items]
+        review_ids = dict(zip(review_items, insert_returning_ids(db, Task, review_rows)))
+
+        if task_ids:
+            db.execute(insert(ChatRoom), [{"task_id": task_id} for task_id in task_ids.values()])
+
+        # Checklists of every task, then the links to their tasks
+        owners = [(i, n) for i in created for n in range(len(items[i].checklist_names))]
+        checklist_ids = dict(zip(owners, insert_returning_ids(db, Checklist, [{
+            "checklist_name": items[i].checklist_names[n],
+            "is_completed": False,
+            "is_delete": False,
+            "created_by": user_id,
+        } for i, n in owners])))
+        links = [{"parent_task_id": task_ids[i], "checklist_id": checklist_ids[(i, n)], "sub_task_id": None} for i, n in owners]
+
+        # Subtask links: checklist -> subtask
+        subtask_edges = []  # (parent task, subtask, via), parents first
+        for i in created:
+            ref = items[i].parent_checklist
+            if ref is not None:
+                checklist_id, parent_id = checklist_ids[(ref.item, ref.checklist)], task_ids[ref.item]
+            elif items[i].checklist_id is not None:
+                checklist_id, parent_id = items[i].checklist_id, existing_parents[items[i].checklist_id].task_id
+            else:
+                continue
+            links.append({"parent_task_id": None, "checklist_id": checklist_id, "sub_task_id": task_ids[i]})
+            subtask_edges.append((parent_id, task_ids[i], VIA_CHECKLIST))
+        if links:
+            db.execute(insert(TaskChecklistLink), links)
+
+        # State the ORM flush listeners would have maintained
+        new_ids = list(task_ids.values()) + list(review_ids.values())
+        add_tasks(db, new_ids)
+        link_new_tasks(db, subtask_edges + [(task_ids[i], review_id, VIA_REVIEW) for i, review_id in review_ids.items()])
+        add_to_counts(db, task_rows + review_rows)
+        index_tasks(db.connection(), new_ids)
+        mark_progress_dirty(db, task_ids=task_ids.values())
+        touch_trees(db, task_ids=new_ids)
+        for task_id in task_ids.values():
+            log_task_field_change(db, task_id, "status", None, "To_Do", 1)
+        for review_id in review_ids.values():
+            log_task_field_change(db, review_id, "status", None, "New", 1)
+
+        # A new subtask reopens a completed existing checklist, once per checklist
+        reopened = {items[i].checklist_id for i in created if items[i].checklist_id is not None}
+        for checklist in db.query(Checklist).filter(Checklist.checklist_id.in_(reopened), Checklist.is_completed == True).all():
+            propagate_incomplete_upwards(checklist.checklist_id, db, Current_user)
+
+        db.commit()
+        logger.info(f"Batch created {len(task_ids)} tasks, {len(review_ids)} review tasks, {len(owners)} checklists; {len(errors)} failed")
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception:
+        db.rollback()
+        logger.exception("Unexpected error while batch creating tasks")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    results = []
+    for index, item in enumerate(items):
+        if index in errors:
+            results.append({"index": index, "created": False, "status_code": errors[index].status_code, "detail": errors[index].detail})
+            continue
+        ref = item.parent_checklist
+        results.append({
+            "index": index,
+            "created": True,
+            "task_id": task_ids[index],
+            "task_name": item.task_name,
+            "review_task_id": review_ids.get(index),
+            "parent_checklist_id": checklist_ids[(ref.item, ref.checklist)] if ref else item.checklist_id,
+            "checklists_created": [
+                {"checklist_id": checklist_ids[(index, n)], "checklist_name": name}
+                for n, name in enumerate(item.checklist_names)
+            ],
+        })
+    return {
+        "message": "Batch processed",
+        "created": len(task_ids),
+        "failed": len(errors),
+        "results": results
+    }
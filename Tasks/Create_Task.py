@@ -1,14 +1,17 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import or_, desc
-from models.models import Task, TaskStatus, Checklist, TaskChecklistLink, TaskType, ChatRoom, User, TaskTimeLog
+from sqlalchemy.sql import or_
+from models.models import Task, TaskStatus, Checklist, TaskChecklistLink, TaskType, ChatRoom
 from Logs.functions import log_task_field_change,log_checklist_field_change
 from database.database import get_db
 from Currentuser.currentUser import get_current_user
 from Tasks.inputs import CreateTask
 from logger.logger import get_logger
-from Checklist.functions import propagate_incomplete_upwards
+from Checklist.functions import propagate_incomplete_upwards, create_checklists
+from Checklist.progress import progress_label
+from Tasks.timers import open_timer
+from Currentuser.userDirectory import user_directory
 
 router = APIRouter()
 
@@ -44,22 +47,8 @@ def add_checklist_subtask(
         log_task_field_change(db, new_task.task_id, "status", None, "To_Do", 1)
        
         # Create checklists
-        checklists_created = []
-        for name in data.checklist_names:
-            checklist = Checklist(
-                checklist_name=name,
-                is_completed=False,
-                is_delete=False,
-                created_by=Current_user.employee_id
-            )
-            db.add(checklist)
-            db.flush()
-            checklists_created.append(checklist)
-            db.add(TaskChecklistLink(
-                parent_task_id=new_task.task_id,
-                checklist_id=checklist.checklist_id
-            ))
-            logger.info(f"Checklist {checklist.checklist_id} linked to task {new_task.task_id}")
+        checklists_created = create_checklists(db, new_task.task_id, data.checklist_names, Current_user.employee_id)
+        logger.info(f"Checklists {[c['checklist_id'] for c in checklists_created]} linked to task {new_task.task_id}")
 
         # Create review task if needed
         if data.is_review_required:
@@ -98,7 +87,7 @@ def add_checklist_subtask(
             if not parent_task:
                 raise HTTPException(status_code=403, detail="Task not found or unauthorized")
             
-            time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == parent_task.task_id,TaskTimeLog.end_time == None).order_by(desc(TaskTimeLog.start_time)).first()
+            time = open_timer(db, parent_task.task_id)
             if time is None:
                 return {"Start time": "No active time tracking found for this task."}
 
@@ -128,22 +117,10 @@ def add_checklist_subtask(
                 raise HTTPException(status_code=404, detail="Checklist not found")
 
             parent_task = db.query(Task).filter(Task.task_id == link.parent_task_id,or_(Task.created_by == Current_user.employee_id,Task.assigned_to == Current_user.employee_id),Task.is_delete == False).first()
-            # Parent task checklist progress
-            parent_task_checklists = db.query(TaskChecklistLink).filter(
-                TaskChecklistLink.parent_task_id == parent_task.task_id,
-                TaskChecklistLink.checklist_id.isnot(None)
-            ).all()
-
-            checklist_ids = [link.checklist_id for link in parent_task_checklists]
-            checklists = db.query(Checklist).filter(Checklist.checklist_id.in_(checklist_ids),Checklist.is_delete == False).all()
-
-            completed = sum(1 for c in checklists if c.is_completed)
-            total = len(checklists)
-            parent_checklist_progress = f"{completed}/{total}" if total > 0 else "0/0"
+            parent_checklist_progress = progress_label(parent_task)
         
 
-        users = db.query(User).filter().all()
-        user_map = {u.employee_id: u.username for u in users}
+        user_map = user_directory.names_for(db, [new_task.assigned_to, new_task.created_by])
         logger.info("Task and dependencies committed successfully")
         return {
             "message": "Task created successfully",
@@ -165,12 +142,12 @@ def add_checklist_subtask(
             "updated_at": new_task.updated_at,
             "task_type": new_task.task_type,
             "is_review_required": new_task.is_review_required,
-            "checklist_progress":f"0/{len(data.checklist_names)}" if len(data.checklist_names) > 0 else 2,
+            "checklist_progress": progress_label(new_task),
             "checklists_created": [{
-        "checklist_id": c.checklist_id,
-        "checklist_name": c.checklist_name,
-        "created_by": c.created_by,
-        "created_by_name": user_map.get(c.created_by)}
+        "checklist_id": c["checklist_id"],
+        "checklist_name": c["checklist_name"],
+        "created_by": c["created_by"],
+        "created_by_name": user_map.get(c["created_by"])}
     for c in checklists_created]}
 
     except Exception as e:
@@ -1,16 +1,15 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import or_, desc
-from sqlalchemy import func
-from models.models import Task, TaskStatus, TaskType, TaskChecklistLink, Checklist, TaskTimeLog
+from sqlalchemy.sql import or_
+from models.models import Task, TaskStatus, TaskType, TaskChecklistLink, Checklist
 from Logs.functions import log_task_field_change, log_checklist_field_change
 from database.database import get_db
 from Currentuser.currentUser import get_current_user
 from Tasks.inputs import UpdateTaskRequest, SendForReview
 from Tasks.functions import reverse_completion_from_review, propagate_completion_upwards,deduplicate_tasks
 from logger.logger import get_logger
-from datetime import datetime
+from Tasks.timers import open_timer, stop_timer, reopen_latest, latest_time_log, session_info
 
 router = APIRouter()
 
@@ -132,7 +131,7 @@ def update_task(task_data: UpdateTaskRequest, db: Session = Depends(get_db), Cur
         if is_assignee or is_creator:
             if task_data.is_reviewed is not None and task.task_type == TaskType.Review:
                 if task_data.is_reviewed:
-                    time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id,TaskTimeLog.end_time == None).order_by(desc(TaskTimeLog.start_time)).first()
+                    time = open_timer(db, task.task_id)
                     if time is None:
                         return {"Start time": "No active time tracking found for this task."}
                 checklists = db.query(Checklist).join(TaskChecklistLink).filter(
@@ -161,15 +160,13 @@ def update_task(task_data: UpdateTaskRequest, db: Session = Depends(get_db), Cur
                     log_task_field_change(db, task.task_id, "is_reviewed", False, True, Current_user.employee_id)
                     task.previous_status = task.status
                     task.status = TaskStatus.Completed.name
-                    time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id).order_by(desc(TaskTimeLog.start_time)).first()
-                    time.end_time = None
-                    db.flush()
+                    reopen_latest(db, task.task_id)
                     result = propagate_completion_upwards(task, db, Current_user.employee_id, logger, Current_user)
                     updated_tasks_raw = result.get("updated_tasks", [])
                     result = deduplicate_tasks(updated_tasks_raw)
                     result = [item for item in result if item.get("task_id") != task.task_id]
                 else:
-                    time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id).order_by(desc(TaskTimeLog.start_time)).first()
+                    time = latest_time_log(db, task.task_id)
                     if time is None:
                         return {"Start time": "No active time tracking found for this task."}
                     task.is_reviewed = False
@@ -183,33 +180,7 @@ def update_task(task_data: UpdateTaskRequest, db: Session = Depends(get_db), Cur
         db.commit()
         logger.info(f"Task {task_id} updated successfully with changes: {update_fields}")
 
-        def get_latest_time_log_info(task_id: int) -> dict:
-            latest_log_subq = db.query(
-                func.max(TaskTimeLog.start_time)
-            ).filter(
-                TaskTimeLog.task_id == task_id,
-                TaskTimeLog.user_id == Current_user.employee_id
-            ).scalar_subquery()
-
-            log = db.query(TaskTimeLog).filter(
-                TaskTimeLog.task_id == task_id,
-                TaskTimeLog.user_id == Current_user.employee_id,
-                TaskTimeLog.start_time == latest_log_subq
-            ).first()
-
-            if log:
-                return {
-                    "is_ongoing": log.end_time is None,
-                    "ongoing_start_time": log.start_time.isoformat(),
-                    "ongoing_end_time": log.end_time.isoformat() if log.end_time else None
-                }
-            else:
-                return {
-                    "is_ongoing": None,
-                    "ongoing_start_time": None,
-                    "ongoing_end_time": None
-                }
-        time_log_info = get_latest_time_log_info(task.task_id)
+        time_log_info = session_info(db, task.task_id, Current_user.employee_id)
         return {"message": "Task updated successfully", "updated_fields": update_fields,"status":task.status, "parent_task_chain": result,**time_log_info}
 
     except Exception as e:
@@ -233,7 +204,7 @@ def send_for_review(data: SendForReview, db: Session = Depends(get_db), Current_
             logger.warning(f"Task not found or unauthorized for user {Current_user.employee_id}")
             return {"message": "Task not found or unauthorized"}
         
-        time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id,TaskTimeLog.end_time == None).order_by(desc(TaskTimeLog.start_time)).first()
+        time = open_timer(db, task.task_id)
         if time is None:
             return {"Start time": "No active time tracking found for this task."}
 
@@ -241,10 +212,7 @@ def send_for_review(data: SendForReview, db: Session = Depends(get_db), Current_
             logger.warning("Attempted to send a non-review task for review")
             return {"message": "Only review tasks can send for further review."}
 
-        time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id,TaskTimeLog.end_time == None).first()
-        if time is not None:
-            time.end_time = datetime.now()
-            db.flush()
+        stop_timer(db, task.task_id)
         next_review = db.query(Task).filter(
             Task.parent_task_id == task.task_id,
             Task.task_type == TaskType.Review,
@@ -257,10 +225,7 @@ def send_for_review(data: SendForReview, db: Session = Depends(get_db), Current_
 
         task.is_review_required = True
         task.status = TaskStatus.In_Review
-        time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id,TaskTimeLog.end_time == None).first()
-        if time is not None:
-            time.end_time = datetime.now()
-            db.flush()
+        stop_timer(db, task.task_id)
         logger.info(f"Marked task {task.task_id} as in review")
 
         review_task = Task(
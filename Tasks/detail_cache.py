@@ -0,0 +1,86 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Serialized GET /task/task_id responses, per process. An entry is keyed by
+# everything the payload depends on: the task, the viewer (timer fields and
+# delete_allow are per user), the (root, version) of its tree from
+# Tasks/tree_versions.py and the user directory watermark (names). A write
+# moves the version, so stale entries are never looked up again and simply
+# age out of the LRU; nothing has to be invalidated across processes.
+#
+# The same key, hashed, is the response's strong ETag, so a client revalidating
+# with If-None-Match gets a 304 without the payload being rebuilt.
+
+TASK_DETAIL_CACHE_SIZE = int(os.getenv("TASK_DETAIL_CACHE_SIZE", "1024"))
+
+
+def detail_key(task_id, viewer_id, tree, names_watermark):
+    root_id, version = tree
+    stamp = names_watermark.isoformat() if names_watermark is not None else ""
+    return (task_id, viewer_id, root_id, version, stamp)
+
+
+def etag_for(key) -> str:
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+class DetailCache:
+    """Bounded LRU of detail_key() -> serialized task_details response body."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body: bytes):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+detail_cache = DetailCache(TASK_DETAIL_CACHE_SIZE)
@@ -1,9 +1,8 @@
-from models.models import TaskChecklistLink,Task,Checklist,TaskStatus, TaskType ,TaskUpdateLog, TaskTimeLog
+from models.models import TaskChecklistLink,Task,Checklist,TaskStatus, TaskType ,TaskUpdateLog
 from Logs.functions import log_task_field_change,log_checklist_field_change
 from logger.logger import get_logger
 from Checklist.functions import update_parent_task_status,propagate_incomplete_upwards
-from datetime import datetime
-from sqlalchemy import desc
+from Tasks.timers import stop_timer, reopen_latest
 
 def propagate_completion_upwards(task, db, updated_by, logger, Current_user):
     logger.info(f"Starting propagate_completion_upwards for task_id={task.task_id}")
@@ -25,10 +24,7 @@ def propagate_completion_upwards(task, db, updated_by, logger, Current_user):
 
             child.previous_status = child.status
             child.status = TaskStatus.Completed
-            time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id,TaskTimeLog.end_time == None).first()
-            if time is not None:
-                time.end_time = datetime.now()
-                db.flush()
+            stop_timer(db, task.task_id)
             db.flush()
             log_task_field_change(db, child.task_id, "status", child.previous_status, child.status, 1)
             logger.info(f"Child task {child.task_id} of review task {t.task_id} marked as Completed")
@@ -94,9 +90,7 @@ def reverse_completion_from_review(task, db, updated_by, logger, Current_user):
     def revert_review_chain_until_normal(task):
         while task and task.task_type == TaskType.Review:
             if task.status == TaskStatus.Completed or task.status == TaskStatus.In_Review:
-                time = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task.task_id).order_by(desc(TaskTimeLog.start_time)).first()
-                time.end_time = None
-                db.flush()
+                reopen_latest(db, task.task_id)
             task.is_reviewed = False
             task.status = task.previous_status
             db.flush()
@@ -0,0 +1,220 @@
+from sqlalchemy import event, inspect, select, insert, delete, and_, or_, case, literal, exists, union_all
+from sqlalchemy.orm import aliased
+from models.models import Task, TaskChecklistLink, TaskClosure, TaskType
+
+# `task_closure` holds one row per (ancestor, descendant) pair of live tasks,
+# plus a depth-0 "self" row for every task. Edges are:
+#   review    - Task.parent_task_id (review chain)
+#   checklist - parent task -> checklist -> subtask (TaskChecklistLink)
+# `via` is the edge kind when the whole path uses one kind, otherwise "mixed".
+#
+# Inserts are tracked from the ORM flush (new tasks and checklist->subtask
+# links); soft deletes prune the affected rows so lookups only see live tasks.
+
+VIA_SELF = "self"
+VIA_REVIEW = "review"
+VIA_CHECKLIST = "checklist"
+VIA_MIXED = "mixed"
+MAX_DEPTH = 100
+
+
+def task_edges(live_only=True):
+    """Derived table of (parent_id, child_id, via) hierarchy edges."""
+    child = aliased(Task)
+    review = select(
+        child.parent_task_id.label("parent_id"), child.task_id.label("child_id"), literal(VIA_REVIEW).label("via")
+    ).where(child.parent_task_id.isnot(None))
+
+    parent_link = aliased(TaskChecklistLink)
+    sub_link = aliased(TaskChecklistLink)
+    checklist = select(
+        parent_link.parent_task_id.label("parent_id"), sub_link.sub_task_id.label("child_id"), literal(VIA_CHECKLIST).label("via")
+    ).join(
+        sub_link, sub_link.checklist_id == parent_link.checklist_id
+    ).where(
+        parent_link.parent_task_id.isnot(None),
+        sub_link.sub_task_id.isnot(None)
+    )
+
+    if live_only:
+        review = review.where(child.is_delete == False, exists().where(Task.task_id == child.parent_task_id, Task.is_delete == False))
+        sub_task = aliased(Task)
+        parent_task = aliased(Task)
+        checklist = checklist.join(sub_task, sub_task.task_id == sub_link.sub_task_id).join(
+            parent_task, parent_task.task_id == parent_link.parent_task_id
+        ).where(sub_task.is_delete == False, parent_task.is_delete == False)
+
+    return union_all(review, checklist).subquery("task_edges")
+
+
+# ---------- maintenance ----------
+def add_task(conn, task_id):
+    conn.execute(insert(TaskClosure).values(ancestor_id=task_id, descendant_id=task_id, depth=0, via=VIA_SELF))
+
+
+def add_tasks(conn, task_ids):
+    """Self rows for tasks inserted with a bulk insert(); link them with link_task() afterwards."""
+    rows = [{"ancestor_id": t, "descendant_id": t, "depth": 0, "via": VIA_SELF} for t in task_ids]
+    if rows:
+        conn.execute(insert(TaskClosure), rows)
+
+
+def link_task(conn, parent_id, child_id, via):
+    """Connect every ancestor of `parent_id` to every descendant of `child_id` (both inclusive)."""
+    up = aliased(TaskClosure)
+    down = aliased(TaskClosure)
+    existing = aliased(TaskClosure)
+    combined_via = case(
+        (and_(up.via.in_([VIA_SELF, via]), down.via.in_([VIA_SELF, via])), literal(via)),
+        else_=literal(VIA_MIXED)
+    )
+    rows = select(
+        up.ancestor_id, down.descendant_id, up.depth + down.depth + 1, combined_via
+    ).select_from(up).join(
+        down, down.ancestor_id == child_id
+    ).where(
+        up.descendant_id == parent_id,
+        ~exists().where(existing.ancestor_id == up.ancestor_id, existing.descendant_id == down.descendant_id)
+    )
+    conn.execute(insert(TaskClosure).from_select(["ancestor_id", "descendant_id", "depth", "via"], rows))
+
+
+def link_new_tasks(conn, edges):
+    """
+    Closure rows for freshly inserted tasks, in two statements. `edges` are
+    (parent_id, child_id, via) with parents before their children, and each
+    child must not have descendants yet (self rows from add_tasks()).
+    """
+    edges = list(edges)
+    if not edges:
+        return
+    new_ids = {child_id for _, child_id, _ in edges}
+    ancestors = {}  # task_id -> [(ancestor_id, depth, via)], self row included
+    outside = {parent_id for parent_id, _, _ in edges} - new_ids
+    if outside:
+        for ancestor_id, descendant_id, depth, via in conn.execute(
+            select(TaskClosure.ancestor_id, TaskClosure.descendant_id, TaskClosure.depth, TaskClosure.via)
+            .where(TaskClosure.descendant_id.in_(outside))
+        ):
+            ancestors.setdefault(descendant_id, []).append((ancestor_id, depth, via))
+
+    rows = []
+    for parent_id, child_id, via in edges:
+        chain = [(child_id, 0, VIA_SELF)]
+        for ancestor_id, depth, up_via in ancestors.get(parent_id, [(parent_id, 0, VIA_SELF)]):
+            path_via = via if up_via in (VIA_SELF, via) else VIA_MIXED
+            chain.append((ancestor_id, depth + 1, path_via))
+            rows.append({"ancestor_id": ancestor_id, "descendant_id": child_id, "depth": depth + 1, "via": path_via})
+        ancestors[child_id] = chain
+    conn.execute(insert(TaskClosure), rows)
+
+
+def prune_tasks(conn, task_ids):
+    """Drop soft-deleted tasks from the hierarchy (their self rows stay)."""
+    task_ids = list(task_ids)
+    if task_ids:
+        conn.execute(
+            delete(TaskClosure).where(
+                or_(TaskClosure.ancestor_id.in_(task_ids), TaskClosure.descendant_id.in_(task_ids)),
+                TaskClosure.depth > 0
+            ).execution_options(synchronize_session=False)
+        )
+
+
+def _checklist_parent(conn, checklist_id):
+    return conn.execute(
+        select(TaskChecklistLink.parent_task_id).where(
+            TaskChecklistLink.checklist_id == checklist_id,
+            TaskChecklistLink.parent_task_id.isnot(None)
+        ).limit(1)
+    ).scalar()
+
+
+@event.listens_for(Task, "after_insert")
+def _task_inserted(mapper, connection, target):
+    add_task(connection, target.task_id)
+    if target.parent_task_id:
+        link_task(connection, target.parent_task_id, target.task_id, VIA_REVIEW)
+
+
+@event.listens_for(Task, "after_update")
+def _task_updated(mapper, connection, target):
+    if not inspect(target).attrs.is_delete.history.has_changes():
+        return
+    if target.is_delete:
+        prune_tasks(connection, [target.task_id])
+    elif target.parent_task_id:
+        # Re-enabled review task (Update_Task); it has no dependents, so relinking its parent is enough
+        link_task(connection, target.parent_task_id, target.task_id, VIA_REVIEW)
+
+
+@event.listens_for(TaskChecklistLink, "after_insert")
+def _subtask_linked(mapper, connection, target):
+    if target.sub_task_id and target.checklist_id:
+        parent_id = _checklist_parent(connection, target.checklist_id)
+        if parent_id:
+            link_task(connection, parent_id, target.sub_task_id, VIA_CHECKLIST)
+
+
+# ---------- queries ----------
+def get_ancestor_ids(db, task_id, via=None, include_self=False):
+    """Ancestors of `task_id`, nearest first; `via` restricts to paths of a single edge kind."""
+    query = select(TaskClosure.ancestor_id).where(TaskClosure.descendant_id == task_id)
+    if via:
+        query = query.where(TaskClosure.via.in_([via, VIA_SELF]))
+    if not include_self:
+        query = query.where(TaskClosure.depth > 0)
+    return list(db.execute(query.order_by(TaskClosure.depth)).scalars())
+
+
+def get_descendant_ids(db, task_ids, via=None, include_self=False):
+    """All descendants of one or more tasks, nearest first."""
+    if isinstance(task_ids, int):
+        task_ids = [task_ids]
+    query = select(TaskClosure.descendant_id).where(TaskClosure.ancestor_id.in_(task_ids))
+    if via:
+        query = query.where(TaskClosure.via.in_([via, VIA_SELF]))
+    if not include_self:
+        query = query.where(TaskClosure.depth > 0)
+    return list(dict.fromkeys(db.execute(query.order_by(TaskClosure.depth)).scalars()))
+
+
+def get_ancestors(db, task_id, via=None, include_self=False):
+    """Ancestor Task rows, nearest first, in one query."""
+    query = db.query(Task).join(
+        TaskClosure, TaskClosure.ancestor_id == Task.task_id
+    ).filter(TaskClosure.descendant_id == task_id)
+    if via:
+        query = query.filter(TaskClosure.via.in_([via, VIA_SELF]))
+    if not include_self:
+        query = query.filter(TaskClosure.depth > 0)
+    return query.order_by(TaskClosure.depth).all()
+
+
+def get_root_normal_task(db, task_id):
+    """The Normal task a review chain belongs to (the task itself when it isn't a review)."""
+    chain = get_ancestors(db, task_id, via=VIA_REVIEW, include_self=True)
+    for task in chain:
+        if task.task_type != TaskType.Review:
+            return task
+    return chain[-1] if chain else None
+
+
+# ---------- backfill ----------
+def rebuild(conn):
+    """Recompute the whole closure from tasks/task_checklist_link, one depth level per statement."""
+    conn.execute(delete(TaskClosure))
+    conn.execute(insert(TaskClosure).from_select(
+        ["ancestor_id", "descendant_id", "depth", "via"],
+        select(Task.task_id, Task.task_id, literal(0), literal(VIA_SELF))
+    ))
+    edges = task_edges()
+    for depth in range(MAX_DEPTH):
+        path = aliased(TaskClosure)
+        rows = select(
+            path.ancestor_id, edges.c.child_id, literal(depth + 1),
+            case((path.via.in_([VIA_SELF, edges.c.via]), edges.c.via), else_=literal(VIA_MIXED))
+        ).join(edges, edges.c.parent_id == path.descendant_id).where(path.depth == depth)
+        result = conn.execute(insert(TaskClosure).from_select(["ancestor_id", "descendant_id", "depth", "via"], rows))
+        if not result.rowcount:
+            break
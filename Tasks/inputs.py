@@ -14,6 +14,20 @@ class CreateTask(BaseModel):
     is_review_required : bool
 
 
+class BatchChecklistRef(BaseModel):
+    item: int        # index of an earlier task in the same batch
+    checklist: int   # index into that task's checklist_names
+
+
+class BatchCreateItem(CreateTask):
+    # Subtask of a checklist created earlier in the same batch (instead of checklist_id)
+    parent_checklist: Optional[BatchChecklistRef] = None
+
+
+class BatchCreateTasks(BaseModel):
+    tasks: List[BatchCreateItem]
+
+
 class UpdateTaskRequest(BaseModel):
     task_id: Optional[int] = None
     assigned_to: Optional[int] = None
@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import date, datetime
+from enum import Enum
+from sqlalchemy import and_, or_, false
+from fastapi import HTTPException
+
+# Keyset ("cursor") pagination. A listing is ordered by a list of sort keys,
+# the last of which must be unique (task_id); the cursor carries the sort
+# values of the last row returned and the next page starts right after it.
+# NULLs sort lowest, as they do on MySQL and SQLite.
+
+
+class SortKey:
+    __slots__ = ("name", "expr", "descending", "parse")
+
+    def __init__(self, name, expr, descending=False, parse=None):
+        self.name = name
+        self.expr = expr
+        self.descending = descending
+        self.parse = parse  # str -> value, for keys whose JSON form isn't the column value
+
+    def order_by(self):
+        return self.expr.desc() if self.descending else self.expr.asc()
+
+
+def parse_date(value):
+    return date.fromisoformat(value)
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value)
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def encode_cursor(row_values, scope: str) -> str:
+    payload = {"s": scope, "k": [_json_value(v) for v in row_values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys, scope: str) -> list:
+    """Sort values from `cursor`; 400 when it is malformed or was issued for another ordering."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["k"]
+        if payload["s"] != scope or len(values) != len(keys):
+            raise ValueError("cursor scope")
+        return [
+            key.parse(value) if key.parse and value is not None else value
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor for this sort order")
+
+
+def _equal(expr, value):
+    return expr.is_(None) if value is None else expr == value
+
+
+def _beyond(key, value):
+    if key.descending:
+        # NULLs come last when descending
+        return false() if value is None else or_(key.expr < value, key.expr.is_(None))
+    return key.expr.isnot(None) if value is None else key.expr > value
+
+
+def after(keys, values):
+    """WHERE clause selecting the rows that sort strictly after `values`."""
+    clauses = []
+    for i, (key, value) in enumerate(zip(keys, values)):
+        equal = [_equal(k.expr, v) for k, v in zip(keys[:i], values[:i])]
+        clauses.append(and_(*equal, _beyond(key, value)))
+    return or_(*clauses)
@@ -0,0 +1,138 @@
+import re
+from sqlalchemy import event, inspect, func, select, text, literal_column, bindparam
+from models.models import Task
+
+# Word-prefix search over tasks.task_name / tasks.description.
+#
+#   MySQL  - FULLTEXT indexes ft_tasks_task_name / ft_tasks_description
+#            (declared on the model, maintained by InnoDB), queried with
+#            MATCH ... AGAINST in boolean mode: every word must match as a prefix.
+#   SQLite - an FTS5 table `task_search` (rowid = task_id), kept in sync by the
+#            Task mapper events below.
+#
+# Terms the index can't answer (words shorter than InnoDB's minimum token
+# size, stopwords, no words at all) and other databases fall back to the
+# old LIKE '%term%' scan.
+
+SEARCH_COLUMNS = ("task_name", "description")
+MIN_WORD_LENGTH = 3  # innodb_ft_min_token_size
+# InnoDB's default stopword list; these are never indexed, so `+word*` can't match them
+STOPWORDS = frozenset((
+    "a about an are as at be by com de en for from how i in is it la of on or that the this "
+    "to was what when where who will with und www"
+).split())
+FTS_TABLE = "task_search"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_words(term: str):
+    """Lower-cased words of `term`, or None when the full-text index can't answer it."""
+    words = _WORD.findall((term or "").lower())
+    if not words or any(len(w) < MIN_WORD_LENGTH or w in STOPWORDS for w in words):
+        return None
+    return words
+
+
+def _like(column, term):
+    return func.lower(column).like(f"%{term.lower()}%")
+
+
+def _fts_column_query(name, words):
+    # e.g. task_name : ("weekly"* AND "report"*)
+    return f"{name} : (" + " AND ".join(f'"{w}"*' for w in words) + ")"
+
+
+def apply_search(query, dialect_name, **terms):
+    """
+    Filter an ORM query on Task by `task_name=` / `description=` search terms.
+
+    Returns (query, relevance): `relevance` is a SQL expression (higher is
+    better) when the full-text index was used, else None.
+    """
+    indexed = {}
+    for name, term in terms.items():
+        if not term:
+            continue
+        words = search_words(term) if dialect_name in ("mysql", "sqlite") else None
+        if words is None:
+            query = query.filter(_like(getattr(Task, name), term))
+        else:
+            indexed[name] = words
+    if not indexed:
+        return query, None
+
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import match
+        relevance = None
+        for name, words in indexed.items():
+            score = match(getattr(Task, name), against=" ".join(f"+{w}*" for w in words)).in_boolean_mode()
+            query = query.filter(score > 0)
+            relevance = score if relevance is None else relevance + score
+        return query, relevance
+
+    # SQLite FTS5: one MATCH with a column filter per searched column; bm25() is lower-is-better
+    expression = " AND ".join(_fts_column_query(name, words) for name, words in indexed.items())
+    fts = select(
+        literal_column("rowid").label("task_id"),
+        (-func.bm25(literal_column(FTS_TABLE))).label("relevance")
+    ).select_from(text(FTS_TABLE)).where(literal_column(FTS_TABLE).op("MATCH")(expression)).subquery("task_search_hits")
+    query = query.join(fts, fts.c.task_id == Task.task_id)
+    return query, fts.c.relevance
+
+
+# ---------- SQLite index ----------
+def create_sqlite_index(conn):
+    conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({', '.join(SEARCH_COLUMNS)})"))
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, task_name, description) SELECT task_id, task_name, description FROM tasks"
+    ))
+    conn.info.pop(FTS_TABLE, None)
+
+
+def index_tasks(conn, task_ids):
+    """Index tasks inserted with a bulk insert() (the mapper events only see ORM flushes)."""
+    task_ids = list(task_ids)
+    if task_ids and _has_sqlite_index(conn):
+        conn.execute(
+            text(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, task_name, description) "
+                "SELECT task_id, task_name, description FROM tasks WHERE task_id IN :ids"
+            ).bindparams(bindparam("ids", expanding=True)),
+            {"ids": task_ids}
+        )
+
+
+def _has_sqlite_index(connection):
+    if connection.dialect.name != "sqlite":
+        return False
+    if FTS_TABLE not in connection.info:
+        connection.info[FTS_TABLE] = inspect(connection).has_table(FTS_TABLE)
+    return connection.info[FTS_TABLE]
+
+
+def _index_task(connection, target):
+    connection.execute(
+        text(f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, task_name, description) VALUES (:id, :name, :description)"),
+        {"id": target.task_id, "name": target.task_name, "description": target.description}
+    )
+
+
+@event.listens_for(Task, "after_insert")
+def _task_inserted(mapper, connection, target):
+    if _has_sqlite_index(connection):
+        _index_task(connection, target)
+
+
+@event.listens_for(Task, "after_update")
+def _task_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[c].history.has_changes() for c in SEARCH_COLUMNS) and _has_sqlite_index(connection):
+        _index_task(connection, target)
+
+
+@event.listens_for(Task, "after_delete")
+def _task_deleted(mapper, connection, target):
+    if _has_sqlite_index(connection):
+        connection.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.task_id})
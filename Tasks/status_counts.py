@@ -0,0 +1,255 @@
+import argparse
+from collections import Counter
+from sqlalchemy import event, inspect, select, insert, delete, func, literal, union_all
+from sqlalchemy.orm import Session
+from models.models import Task, TaskStatus, User, UserTaskStatusCount
+from logger.logger import get_logger
+
+# `user_task_status_counts` holds the number of live tasks per (user, role,
+# status): role "created_by" counts the tasks a user created, "assigned_to"
+# the tasks assigned to them.
+#
+# ORM changes to a task's creator, assignee, status or is_delete are turned
+# into +1/-1 deltas at flush time and applied right before the transaction
+# commits, so concurrent writers only ever add to a row. Code that soft-deletes
+# tasks with Core update() must call remove_from_counts() before the update,
+# code that inserts them with Core insert() must call add_to_counts().
+# `python -m Tasks.status_counts reconcile` recomputes everything.
+
+CREATED_BY = "created_by"
+ASSIGNED_TO = "assigned_to"
+ROLES = (CREATED_BY, ASSIGNED_TO)
+_TRACKED = ("created_by", "assigned_to", "status", "is_delete")
+_DELTAS = "status_count_deltas"
+
+
+def _status_name(status):
+    return status.name if isinstance(status, TaskStatus) else status
+
+
+def _keys(values):
+    """Counter keys a task with these attribute values contributes to."""
+    if values["is_delete"] or values["status"] is None:
+        return []
+    status = _status_name(values["status"])
+    return [(values[role], role, status) for role in ROLES if values[role] is not None]
+
+
+def _add(db, keys, sign):
+    deltas = db.info.setdefault(_DELTAS, Counter())
+    for key in keys:
+        deltas[key] += sign
+
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the previous value on assignment, so a change of an expired attribute still has its old value in history
+for _attr in (Task.created_by, Task.assigned_to, Task.status, Task.is_delete):
+    event.listen(_attr, "set", _keep_old_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_status_changes(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Task):
+            _add(session, _keys({a: getattr(obj, a) for a in _TRACKED}), 1)
+    for obj in session.dirty:
+        if not isinstance(obj, Task):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[a].history.has_changes() for a in _TRACKED):
+            continue
+        _add(session, _keys({a: _old_value(state, a) for a in _TRACKED}), -1)
+        _add(session, _keys({a: state.attrs[a].value for a in _TRACKED}), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            state = inspect(obj)
+            _add(session, _keys({a: _old_value(state, a) for a in _TRACKED}), -1)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_before_commit(session):
+    session.flush()
+    deltas = session.info.pop(_DELTAS, None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_status_changes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_DELTAS, None)
+
+
+def add_to_counts(db: Session, tasks):
+    """Count tasks inserted with a bulk insert(); `tasks` are the inserted row dicts."""
+    for values in tasks:
+        _add(db, _keys({a: values.get(a) for a in _TRACKED}), 1)
+
+
+def remove_from_counts(db: Session, task_ids):
+    """Discount live tasks that are about to be soft-deleted with a bulk update()."""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    for role in ROLES:
+        user = getattr(Task, role)
+        rows = db.execute(
+            select(user, Task.status, func.count()).where(
+                Task.task_id.in_(task_ids),
+                Task.is_delete == False,
+                user.isnot(None)
+            ).group_by(user, Task.status)
+        ).all()
+        deltas = db.info.setdefault(_DELTAS, Counter())
+        for user_id, status, n in rows:
+            deltas[(user_id, role, _status_name(status))] -= n
+
+
+def _upsert(conn):
+    table = UserTaskStatusCount.__table__
+    if conn.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted["count"])
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    stmt = sqlite_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "role", "status"],
+        set_={"count": table.c.count + stmt.excluded["count"]}
+    )
+
+
+def apply_deltas(conn, deltas):
+    rows = [
+        {"user_id": user_id, "role": role, "status": status, "count": n}
+        for (user_id, role, status), n in sorted(deltas.items()) if n
+    ]
+    if rows:
+        conn.execute(_upsert(conn), rows)
+
+
+# ---------- reads ----------
+def status_summary(db, user_id) -> dict:
+    """The `summary` block of GET /tasks."""
+    summary = {
+        "created_by_me": {"total": 0, "status_counts": {}},
+        "assigned_to_me": {"total": 0, "status_counts": {}},
+    }
+    rows = db.execute(
+        select(UserTaskStatusCount.role, UserTaskStatusCount.status, UserTaskStatusCount.count).where(
+            UserTaskStatusCount.user_id == user_id,
+            UserTaskStatusCount.count > 0
+        )
+    ).all()
+    for role, status, n in rows:
+        block = summary[f"{role}_me"]
+        block["total"] += n
+        block["status_counts"][status] = n
+    return summary
+
+
+# ---------- reconciliation ----------
+def _grouped_counts(user_ids=None):
+    selects = []
+    for role in ROLES:
+        user = getattr(Task, role)
+        query = select(user, literal(role), Task.status, func.count()).where(
+            Task.is_delete == False,
+            user.isnot(None)
+        )
+        if user_ids is not None:
+            query = query.where(user.in_(user_ids))
+        selects.append(query.group_by(user, Task.status))
+    return union_all(*selects)
+
+
+def recount_users(conn, user_ids=None):
+    """Recompute the counters of `user_ids` (every user when None) with a GROUP BY."""
+    stmt = delete(UserTaskStatusCount)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        stmt = stmt.where(UserTaskStatusCount.user_id.in_(user_ids))
+    conn.execute(stmt)
+    conn.execute(insert(UserTaskStatusCount).from_select(
+        ["user_id", "role", "status", "count"], _grouped_counts(user_ids)
+    ))
+
+
+def find_drift(db, limit=100):
+    """(user_id, role, status, stored, actual) for every counter that disagrees with the tasks table."""
+    actual = {(u, r, _status_name(s)): n for u, r, s, n in db.execute(_grouped_counts())}
+    stored = {
+        (u, r, _status_name(s)): n
+        for u, r, s, n in db.execute(select(
+            UserTaskStatusCount.user_id, UserTaskStatusCount.role, UserTaskStatusCount.status, UserTaskStatusCount.count
+        ))
+    }
+    drift = [
+        (*key, stored.get(key, 0), actual.get(key, 0))
+        for key in sorted(actual.keys() | stored.keys())
+        if stored.get(key, 0) != actual.get(key, 0)
+    ]
+    return drift[:limit]
+
+
+def reconcile(db, batch_size=1000):
+    """Recount every user, committing per batch of users; returns the number of users processed."""
+    logger = get_logger("status_counts", "status_counts.log")
+    last_id, processed = 0, 0
+    while True:
+        ids = db.execute(
+            select(User.employee_id).where(User.employee_id > last_id).order_by(User.employee_id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        recount_users(db, ids)
+        db.commit()
+        last_id = ids[-1]
+        processed += len(ids)
+        logger.info(f"Reconciled task status counts for {processed} users (up to employee_id={last_id})")
+    return processed
+
+
+def main(argv=None):
+    from database.database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m Tasks.status_counts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("check", help="list counters that disagree with the tasks table")
+    rec = sub.add_parser("reconcile", help="recompute counters (all users, or --user-id)")
+    rec.add_argument("--user-id", type=int, action="append", default=[])
+    rec.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "check":
+            rows = find_drift(db)
+            for user_id, role, status, stored, actual in rows:
+                print(f"user {user_id} {role} {status}: stored {stored}, actual {actual}")
+            print(f"{len(rows)} drifted counter(s)")
+        elif args.user_id:
+            recount_users(db, args.user_id)
+            db.commit()
+        else:
+            print(f"Reconciled {reconcile(db, args.batch_size)} users")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from models.models import TaskTimeLog, Task
+from Tasks.timers import open_timer
 from database.database import get_db
 from Currentuser.currentUser import get_current_user
 
@@ -20,12 +22,7 @@ def start_task_timer(
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Check for an existing open session
-    existing_log = db.query(TaskTimeLog).filter(
-        TaskTimeLog.task_id == task_id,
-        TaskTimeLog.end_time == None
-    ).first()
-
-    if existing_log:
+    if open_timer(db, task_id) is not None:
         raise HTTPException(status_code=400, detail="Time tracking already in progress for this task")
 
     # Create a new log entry
@@ -38,8 +35,12 @@ def start_task_timer(
     )
 
     db.add(time_log)
-    
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request started a timer for this task first (active_timers primary key)
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Time tracking already in progress for this task")
     db.refresh(time_log)
 
     return {
@@ -0,0 +1,157 @@
+from datetime import datetime
+from sqlalchemy import event, inspect, select, insert, delete
+from sqlalchemy.orm import aliased
+from models.models import TaskTimeLog, ActiveTimer
+
+# `active_timers` has one row per task whose timer is running, pointing at the
+# open task_time_log row. The task id is the primary key, so a task can only
+# have one running timer, and "is it ongoing" is a primary-key probe.
+#
+# Rows follow TaskTimeLog through the ORM flush: a log inserted (or reopened)
+# with end_time NULL registers itself, setting its end_time removes it. Code
+# that changes end_time with Core update() must call rebuild() afterwards.
+
+
+def _register(conn, time_log_id):
+    conn.execute(insert(ActiveTimer).from_select(
+        ["task_id", "user_id", "time_log_id", "started_at"],
+        select(TaskTimeLog.task_id, TaskTimeLog.user_id, TaskTimeLog.id, TaskTimeLog.start_time)
+        .where(TaskTimeLog.id == time_log_id)
+    ))
+
+
+@event.listens_for(TaskTimeLog, "after_insert")
+def _time_log_inserted(mapper, connection, target):
+    if target.end_time is None:
+        # Raises IntegrityError when the task already has a running timer
+        _register(connection, target.id)
+
+
+@event.listens_for(TaskTimeLog, "after_update")
+def _time_log_updated(mapper, connection, target):
+    if not inspect(target).attrs.end_time.history.has_changes():
+        return
+    if target.end_time is None:
+        # Reopened session replaces whatever was registered for the task
+        connection.execute(delete(ActiveTimer).where(ActiveTimer.task_id == target.task_id))
+        _register(connection, target.id)
+    else:
+        connection.execute(delete(ActiveTimer).where(ActiveTimer.time_log_id == target.id))
+
+
+# ---------- lookups ----------
+def open_timer(db, task_id):
+    """The running TaskTimeLog of a task, or None."""
+    return db.query(TaskTimeLog).join(
+        ActiveTimer, ActiveTimer.time_log_id == TaskTimeLog.id
+    ).filter(ActiveTimer.task_id == task_id).first()
+
+
+def latest_time_log(db, task_id, user_id=None):
+    """Most recent session of a task (optionally for one user), open or not."""
+    query = db.query(TaskTimeLog).filter(TaskTimeLog.task_id == task_id)
+    if user_id is not None:
+        query = query.filter(TaskTimeLog.user_id == user_id)
+    return query.order_by(TaskTimeLog.start_time.desc()).first()
+
+
+def running_task_ids(db, user_id) -> set:
+    return set(db.execute(select(ActiveTimer.task_id).where(ActiveTimer.user_id == user_id)).scalars())
+
+
+def latest_sessions(db, user_id, task_ids) -> dict:
+    """{task_id: (start_time, end_time)} of `user_id`'s latest session on each task."""
+    task_ids = set(task_ids)
+    if not task_ids:
+        return {}
+    running = db.execute(
+        select(ActiveTimer.task_id, ActiveTimer.started_at).where(
+            ActiveTimer.task_id.in_(task_ids),
+            ActiveTimer.user_id == user_id
+        )
+    ).all()
+    sessions = {task_id: (started_at, None) for task_id, started_at in running}
+
+    # A task without a running timer for this user: its last session has ended
+    rest = task_ids - sessions.keys()
+    if rest:
+        log = aliased(TaskTimeLog)
+        last_id = select(log.id).where(
+            log.task_id == TaskTimeLog.task_id,
+            log.user_id == user_id
+        ).order_by(log.start_time.desc()).limit(1).correlate(TaskTimeLog).scalar_subquery()
+        rows = db.execute(
+            select(TaskTimeLog.task_id, TaskTimeLog.start_time, TaskTimeLog.end_time).where(
+                TaskTimeLog.task_id.in_(rest),
+                TaskTimeLog.user_id == user_id,
+                TaskTimeLog.id == last_id
+            )
+        ).all()
+        sessions.update((task_id, (start, end)) for task_id, start, end in rows)
+    return sessions
+
+
+def session_info(db, task_id, user_id) -> dict:
+    """The is_ongoing / ongoing_start_time / ongoing_end_time fields the task endpoints return."""
+    timer = db.get(ActiveTimer, task_id)
+    if timer is not None and timer.user_id == user_id:
+        return {"is_ongoing": True, "ongoing_start_time": timer.started_at.isoformat(), "ongoing_end_time": None}
+    log = latest_time_log(db, task_id, user_id)
+    if log:
+        return {
+            "is_ongoing": log.end_time is None,
+            "ongoing_start_time": log.start_time.isoformat(),
+            "ongoing_end_time": log.end_time.isoformat() if log.end_time else None
+        }
+    return {"is_ongoing": None, "ongoing_start_time": None, "ongoing_end_time": None}
+
+
+def session_infos(db, task_ids, user_id) -> dict:
+    """session_info() for many tasks in two queries: {task_id: fields}."""
+    sessions = latest_sessions(db, user_id, task_ids)
+    infos = {}
+    for task_id in task_ids:
+        start, end = sessions.get(task_id, (None, None))
+        infos[task_id] = {
+            "is_ongoing": end is None if start is not None else None,
+            "ongoing_start_time": start.isoformat() if start else None,
+            "ongoing_end_time": end.isoformat() if end else None
+        }
+    return infos
+
+
+# ---------- changes ----------
+def stop_timer(db, task_id, when=None):
+    """Close the task's running session, if any; returns it."""
+    log = open_timer(db, task_id)
+    if log is not None:
+        log.end_time = when or datetime.now()
+        db.flush()
+    return log
+
+
+def reopen_latest(db, task_id):
+    """Resume the task's most recent session (used when a completed task is reopened)."""
+    log = latest_time_log(db, task_id)
+    if log is not None:
+        log.end_time = None
+        db.flush()
+    return log
+
+
+# ---------- backfill ----------
+def rebuild(conn):
+    """Re-register every open session, keeping the newest one per task."""
+    conn.execute(delete(ActiveTimer))
+    newer = aliased(TaskTimeLog)
+    latest_open = select(newer.id).where(
+        newer.task_id == TaskTimeLog.task_id,
+        newer.end_time.is_(None)
+    ).order_by(newer.start_time.desc(), newer.id.desc()).limit(1).correlate(TaskTimeLog).scalar_subquery()
+    conn.execute(insert(ActiveTimer).from_select(
+        ["task_id", "user_id", "time_log_id", "started_at"],
+        select(TaskTimeLog.task_id, TaskTimeLog.user_id, TaskTimeLog.id, TaskTimeLog.start_time).where(
+            TaskTimeLog.end_time.is_(None),
+            TaskTimeLog.id == latest_open
+        )
+    ))
@@ -0,0 +1,131 @@
+from sqlalchemy import select, literal
+from sqlalchemy.orm import aliased
+from models.models import Task, Checklist, TaskChecklistLink
+from Checklist.progress import progress_label
+from Tasks.timers import session_infos
+
+# The checklist tree of GET /task/task_id, loaded level by level with IN
+# queries instead of per checklist / per subtask lookups:
+#   1. the task's live checklists (through their links)
+#   2. the live subtasks linked to any of those checklists
+#   3. the current user's latest session on every subtask (Tasks/timers.py)
+# Subtask progress comes from the denormalized counters, so their own
+# checklists are never loaded. Four statements whatever the size of the tree.
+#
+# The parent chain (review loop) is one WITH RECURSIVE over parent_task_id
+# that stops at the first deleted task, plus one query for the sessions.
+
+MAX_CHAIN_DEPTH = 100
+
+
+def load_checklists(db, task_id):
+    """Live checklists of `task_id`, in link order."""
+    return db.execute(
+        select(Checklist).join(
+            TaskChecklistLink, TaskChecklistLink.checklist_id == Checklist.checklist_id
+        ).where(
+            TaskChecklistLink.parent_task_id == task_id,
+            Checklist.is_delete == False
+        ).order_by(TaskChecklistLink.link_id)
+    ).scalars().all()
+
+
+def load_subtasks(db, checklist_ids) -> dict:
+    """{checklist_id: [live subtask Task, ...]} in link order."""
+    subtasks = {checklist_id: [] for checklist_id in checklist_ids}
+    if not subtasks:
+        return subtasks
+    rows = db.execute(
+        select(TaskChecklistLink.checklist_id, Task).join(
+            Task, Task.task_id == TaskChecklistLink.sub_task_id
+        ).where(
+            TaskChecklistLink.checklist_id.in_(subtasks.keys()),
+            Task.is_delete == False
+        ).order_by(TaskChecklistLink.link_id)
+    ).all()
+    for checklist_id, subtask in rows:
+        subtasks[checklist_id].append(subtask)
+    return subtasks
+
+
+def checklist_tree(db, task_id, user_id, user_map) -> list:
+    """The `checklists` block of task_details."""
+    checklists = load_checklists(db, task_id)
+    subtasks = load_subtasks(db, [c.checklist_id for c in checklists])
+    sessions = session_infos(db, [t.task_id for tasks in subtasks.values() for t in tasks], user_id)
+
+    tree = []
+    for checklist in checklists:
+        items = [{
+            "task_id": subtask.task_id,
+            "task_name": subtask.task_name,
+            "description": subtask.description,
+            "status": subtask.status,
+            "assigned_to": subtask.assigned_to,
+            "assigned_to_name": user_map.get(subtask.assigned_to),
+            "due_date": subtask.due_date,
+            "created_by": subtask.created_by,
+            "created_by_name": user_map.get(subtask.created_by),
+            "created_at": subtask.created_at,
+            "task_type": subtask.task_type,
+            "is_review_required": subtask.is_review_required,
+            "output": subtask.output,
+            "checklist_progress": progress_label(subtask),
+            **sessions[subtask.task_id]
+        } for subtask in subtasks[checklist.checklist_id]]
+
+        tree.append({
+            "checklist_id": checklist.checklist_id,
+            "checklist_name": checklist.checklist_name,
+            "is_completed": checklist.is_completed,
+            "subtasks": items,
+            "checkbox_status": False if items else True,
+            "created_by_name": user_map.get(checklist.created_by),
+            "created_by": checklist.created_by,
+            "created_at": checklist.created_at
+        })
+    return tree
+
+
+def load_parent_chain(db, task):
+    """Live ancestors of `task` through parent_task_id, nearest first, up to the first deleted one."""
+    if not task.parent_task_id:
+        return []
+    chain = select(Task.task_id, Task.parent_task_id, literal(1).label("depth")).where(
+        Task.task_id == task.parent_task_id,
+        Task.is_delete == False
+    ).cte("parent_chain", recursive=True)
+    parent = aliased(Task)
+    chain = chain.union_all(
+        select(parent.task_id, parent.parent_task_id, chain.c.depth + 1).join(
+            chain, parent.task_id == chain.c.parent_task_id
+        ).where(
+            parent.is_delete == False,
+            chain.c.depth < MAX_CHAIN_DEPTH
+        )
+    )
+    return db.execute(
+        select(Task).join(chain, chain.c.task_id == Task.task_id).order_by(chain.c.depth)
+    ).scalars().all()
+
+
+def parent_chain(db, chain, user_id, user_map) -> list:
+    """The `parent_task_chain` block of task_details (root first) for a chain from load_parent_chain()."""
+    sessions = session_infos(db, [t.task_id for t in chain], user_id)
+    return [{
+        "task_id": current_task.task_id,
+        "task_name": current_task.task_name,
+        "description": current_task.description,
+        "status": current_task.status,
+        "task_type": current_task.task_type,
+        "assigned_to": current_task.assigned_to,
+        "assigned_to_name": user_map.get(current_task.assigned_to),
+        "created_by": current_task.created_by,
+        "created_by_name": user_map.get(current_task.created_by),
+        "due_date": current_task.due_date,
+        "is_reviewed": current_task.is_reviewed,
+        "output": current_task.output,
+        "created_at": current_task.created_at,
+        "checklist_progress": progress_label(current_task),
+        **sessions[current_task.task_id]
+    } for current_task in reversed(chain)]
@@ -0,0 +1,146 @@
+from sqlalchemy import event, inspect, select, exists, func
+from sqlalchemy.orm import Session, aliased
+from models.models import Task, Checklist, TaskChecklistLink, TaskTimeLog, TaskClosure, TaskTreeVersion
+
+# `task_tree_versions` holds a change counter per task tree, keyed by the
+# tree's root in task_closure. GET /task/task_id renders a task together with
+# its checklists, subtasks, review chain and time logs, all of which live in
+# the same tree, so (root, version) identifies the state its payload was built
+# from; see Tasks/detail_cache.py.
+#
+# ORM changes to tasks, checklists, checklist links and time logs are picked
+# up from the flush, and every tree they touch is bumped once, right before
+# the transaction commits. Code that writes those tables with Core
+# insert()/update() must call touch_trees() - before prune_tasks() when it
+# soft-deletes tasks, since pruning detaches them from their old root.
+
+_PENDING_TASKS = "tree_version_tasks"
+_PENDING_CHECKLISTS = "tree_version_checklists"
+_ROOTS = "tree_version_roots"
+RESOLVE_CHUNK = 500
+
+
+def tree_roots(db, task_ids) -> set:
+    """Root task ids of the trees `task_ids` belong to (a task outside task_closure is its own root)."""
+    task_ids = sorted({t for t in task_ids if t is not None})
+    roots, found = set(), set()
+    above = aliased(TaskClosure)
+    for i in range(0, len(task_ids), RESOLVE_CHUNK):
+        chunk = task_ids[i:i + RESOLVE_CHUNK]
+        rows = db.execute(
+            select(TaskClosure.descendant_id, TaskClosure.ancestor_id).where(
+                TaskClosure.descendant_id.in_(chunk),
+                ~exists().where(above.descendant_id == TaskClosure.ancestor_id, above.depth > 0)
+            )
+        ).all()
+        found.update(descendant_id for descendant_id, _ in rows)
+        roots.update(ancestor_id for _, ancestor_id in rows)
+    return roots | (set(task_ids) - found)
+
+
+def _checklist_tasks(db, checklist_ids) -> set:
+    checklist_ids = sorted({c for c in checklist_ids if c is not None})
+    if not checklist_ids:
+        return set()
+    return set(db.execute(
+        select(TaskChecklistLink.parent_task_id).where(
+            TaskChecklistLink.checklist_id.in_(checklist_ids),
+            TaskChecklistLink.parent_task_id.isnot(None)
+        )
+    ).scalars())
+
+
+def touch_trees(db: Session, task_ids=(), checklist_ids=()):
+    """Bump, at commit, the trees of tasks/checklists changed outside the ORM unit of work."""
+    task_ids = {t for t in task_ids if t is not None} | _checklist_tasks(db, checklist_ids)
+    # Resolve now as well as at commit: the task may be detached from its current tree before then
+    db.info.setdefault(_ROOTS, set()).update(tree_roots(db, task_ids))
+    db.info.setdefault(_PENDING_TASKS, set()).update(task_ids)
+
+
+def tree_version(db, task_id):
+    """(root_task_id, version) of the tree `task_id` belongs to, in one query; None for an unknown task."""
+    row = db.execute(
+        select(TaskClosure.ancestor_id, func.coalesce(TaskTreeVersion.version, 0))
+        .outerjoin(TaskTreeVersion, TaskTreeVersion.root_task_id == TaskClosure.ancestor_id)
+        .where(TaskClosure.descendant_id == task_id)
+        .order_by(TaskClosure.depth.desc(), TaskClosure.ancestor_id)
+        .limit(1)
+    ).first()
+    return (row[0], row[1]) if row else None
+
+
+def _upsert(conn):
+    table = TaskTreeVersion.__table__
+    if conn.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        return mysql_insert(table).on_duplicate_key_update(version=table.c.version + 1)
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    return sqlite_insert(table).on_conflict_do_update(
+        index_elements=["root_task_id"],
+        set_={"version": table.c.version + 1}
+    )
+
+
+def bump_versions(conn, root_ids):
+    rows = [{"root_task_id": root_id, "version": 1} for root_id in sorted(root_ids)]
+    if rows:
+        conn.execute(_upsert(conn), rows)
+
+
+def _changed_ids(objects, tasks, checklists):
+    for obj in objects:
+        if isinstance(obj, Task):
+            tasks.add(obj.task_id)
+        elif isinstance(obj, TaskTimeLog):
+            tasks.add(obj.task_id)
+        elif isinstance(obj, Checklist):
+            checklists.add(obj.checklist_id)
+        elif isinstance(obj, TaskChecklistLink):
+            tasks.update((obj.parent_task_id, obj.sub_task_id))
+            checklists.add(obj.checklist_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _resolve_before_prune(session, flush_context, instances):
+    # Soft-deleting a task prunes its closure rows during the flush
+    deleted = [
+        obj.task_id for obj in session.dirty
+        if isinstance(obj, Task) and obj.task_id is not None
+        and inspect(obj).attrs.is_delete.history.has_changes()
+    ]
+    if deleted:
+        session.info.setdefault(_ROOTS, set()).update(tree_roots(session, deleted))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_tree_changes(session, flush_context):
+    tasks, checklists = set(), set()
+    _changed_ids(session.new | session.dirty | session.deleted, tasks, checklists)
+    tasks.discard(None)
+    checklists.discard(None)
+    if tasks:
+        session.info.setdefault(_PENDING_TASKS, set()).update(tasks)
+    if checklists:
+        session.info.setdefault(_PENDING_CHECKLISTS, set()).update(checklists)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session):
+    session.flush()
+    tasks = session.info.pop(_PENDING_TASKS, set())
+    checklists = session.info.pop(_PENDING_CHECKLISTS, set())
+    roots = session.info.pop(_ROOTS, set())
+    tasks |= _checklist_tasks(session, checklists)
+    if tasks:
+        roots |= tree_roots(session, tasks)
+    if roots:
+        bump_versions(session.connection(), roots)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_tree_changes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop(_PENDING_TASKS, None)
+        session.info.pop(_PENDING_CHECKLISTS, None)
+        session.info.pop(_ROOTS, None)
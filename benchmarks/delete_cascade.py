@@ -0,0 +1,239 @@
+"""
+Delete-cascade resolution: recursive CTE vs the breadth-first walk it replaced.
+
+    python benchmarks/delete_cascade.py [--tasks 10000] [--seed 1] [--starts 30]
+
+Builds a synthetic task tree on a throwaway SQLite database (checklists,
+subtasks hanging from them, multi-round review chains, some deleted reviews),
+then resolves `get_related_tasks_checklists_logic` for the root and for a
+sample of task and checklist starts with both implementations. Prints
+statements and wall time for each, and exits non-zero if any result differs.
+
+`legacy_related` and `build_tree` are also used by tests/test_delete_cascade.py.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_related(session, task_id, checklist_id):
+    """The pre-CTE implementation: one query per task, review task and checklist visited."""
+    from sqlalchemy import select
+    from models.models import Task, TaskChecklistLink, TaskType
+
+    tasks_to_process = set()
+    processed_tasks = set()
+    processed_checklists = set()
+
+    if task_id:
+        tasks_to_process.add(task_id)
+    elif checklist_id:
+        results = session.execute(
+            select(TaskChecklistLink.sub_task_id)
+            .where(TaskChecklistLink.checklist_id == checklist_id)
+        ).scalars().all()
+        results = [task for task in results if task is not None]
+        if results:
+            tasks_to_process.update(results)
+            processed_checklists.add(checklist_id)
+        else:
+            return {"tasks": [], "checklists": [checklist_id]}
+
+    while tasks_to_process:
+        new_tasks = set()
+        new_checklists = set()
+
+        for tid in tasks_to_process:
+            if tid in processed_tasks:
+                continue
+            processed_tasks.add(tid)
+
+            review_stack = [tid]
+            while review_stack:
+                current = review_stack.pop()
+                review_tasks = session.execute(
+                    select(Task.task_id)
+                    .where(
+                        Task.parent_task_id == current,
+                        Task.task_type == TaskType.Review,
+                        Task.is_delete == False
+                    )
+                ).scalars().all()
+
+                for review_task_id in review_tasks:
+                    if review_task_id not in processed_tasks:
+                        processed_tasks.add(review_task_id)
+                        review_stack.append(review_task_id)
+
+                        review_checklists = session.execute(
+                            select(TaskChecklistLink.checklist_id)
+                            .where(TaskChecklistLink.sub_task_id == review_task_id)
+                        ).scalars().all()
+                        for cid in review_checklists:
+                            if cid and cid not in processed_checklists:
+                                processed_checklists.add(cid)
+
+            results = session.execute(
+                select(TaskChecklistLink.checklist_id, TaskChecklistLink.sub_task_id)
+                .where(TaskChecklistLink.parent_task_id == tid)
+            ).all()
+
+            for checklist_id, sub_task_id in results:
+                if checklist_id and checklist_id not in processed_checklists:
+                    new_checklists.add(checklist_id)
+                    processed_checklists.add(checklist_id)
+                if sub_task_id and sub_task_id not in processed_tasks:
+                    new_tasks.add(sub_task_id)
+
+        for checklist_id in new_checklists:
+            results = session.execute(
+                select(TaskChecklistLink.sub_task_id)
+                .where(TaskChecklistLink.checklist_id == checklist_id)
+            ).scalars().all()
+            for sub_task_id in results:
+                if sub_task_id and sub_task_id not in processed_tasks:
+                    new_tasks.add(sub_task_id)
+
+        tasks_to_process = new_tasks
+
+    return {
+        "tasks": list(processed_tasks),
+        "checklists": list(processed_checklists)
+    }
+
+
+def build_tree(db, n_tasks, seed=1):
+    """
+    Insert a random task forest of about `n_tasks` normal tasks (plus review
+    tasks) with Core inserts; returns {"root", "tasks", "reviews", "checklists"}.
+    Task 0 is the root of the big tree; about 5% of the others start trees of
+    their own. Nothing is committed.
+    """
+    from models.models import Task, Checklist, TaskChecklistLink, TaskStatus, TaskType
+    from database.bulk import insert_returning_ids
+
+    rng = random.Random(seed)
+    task_row = {"description": "bench", "status": TaskStatus.To_Do, "is_delete": False}
+    tasks = insert_returning_ids(db, Task, [
+        {**task_row, "task_name": f"Task {i}", "task_type": TaskType.Normal} for i in range(n_tasks)
+    ])
+
+    # Review rounds: a review of a task, then reviews of that review; some were deleted
+    reviews, live_reviews, reviewed = [], [], [t for t in tasks if rng.random() < 0.15]
+    while reviewed:
+        rows = [{**task_row, "task_name": f"Review {t}", "task_type": TaskType.Review, "parent_task_id": t,
+                 "is_delete": rng.random() < 0.1} for t in reviewed]
+        ids = insert_returning_ids(db, Task, rows)
+        reviews += ids
+        live_reviews += [i for i, row in zip(ids, rows) if not row["is_delete"]]
+        reviewed = [i for i, row in zip(ids, rows) if not row["is_delete"] and rng.random() < 0.4]
+
+    checklist_counts = [rng.choice((0, 1, 1, 2, 3)) for _ in tasks]
+    linked_reviews = [r for r in live_reviews if rng.random() < 0.3]
+    checklists = insert_returning_ids(db, Checklist, [
+        {"checklist_name": f"Checklist {i}", "is_completed": False, "is_delete": False}
+        for i in range(sum(checklist_counts) + len(linked_reviews))
+    ])
+    offsets = [0, *itertools.accumulate(checklist_counts)]
+    links = [
+        {"parent_task_id": task_id, "checklist_id": checklist_id, "sub_task_id": None}
+        for index, task_id in enumerate(tasks)
+        for checklist_id in checklists[offsets[index]:offsets[index + 1]]
+    ]
+
+    # Each task hangs from a checklist of an earlier task (or, rarely, directly from it)
+    for index, task_id in enumerate(tasks[1:], start=1):
+        if rng.random() < 0.05:
+            continue
+        parent = rng.randrange(index)
+        if checklist_counts[parent] and rng.random() < 0.97:
+            checklist_id = checklists[offsets[parent] + rng.randrange(checklist_counts[parent])]
+            links.append({"parent_task_id": None, "checklist_id": checklist_id, "sub_task_id": task_id})
+        else:
+            links.append({"parent_task_id": tasks[parent], "checklist_id": None, "sub_task_id": task_id})
+    # Review tasks hanging from a checklist of their own. The old walk marks such a
+    # checklist visited without expanding it, so it is never shared with regular subtasks
+    for review_id, checklist_id in zip(linked_reviews, checklists[offsets[-1]:]):
+        links.append({"parent_task_id": None, "checklist_id": checklist_id, "sub_task_id": review_id})
+    insert_returning_ids(db, TaskChecklistLink, links)
+    return {"root": tasks[0], "tasks": tasks, "reviews": reviews, "checklists": checklists}
+
+
+def as_sets(result):
+    return set(result["tasks"]), set(result["checklists"])
+
+
+def _timed(fn, db, task_id, checklist_id):
+    from database.query_stats import track_queries
+
+    with track_queries() as stats:
+        started = time.perf_counter()
+        result = fn(db, task_id, checklist_id)
+        elapsed = time.perf_counter() - started
+    return result, stats.count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/delete_cascade.py")
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--starts", type=int, default=30, help="random task and checklist starts to compare")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="delete_cascade_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)  # get_logger() writes to ./logger
+    from database.migrations import upgrade
+    from database.database import SessionLocal
+    from Delete.functions import get_related_tasks_checklists_logic
+    upgrade()
+
+    db = SessionLocal()
+    try:
+        tree = build_tree(db, args.tasks, args.seed)
+        db.commit()
+        print(f"{len(tree['tasks'])} tasks, {len(tree['reviews'])} review tasks, {len(tree['checklists'])} checklists")
+
+        results = []
+        for label, fn in (("old BFS", legacy_related), ("recursive CTE", get_related_tasks_checklists_logic)):
+            result, statements, elapsed = _timed(fn, db, tree["root"], None)
+            results.append(as_sets(result))
+            print(f"root delete  {label:14} {statements:7} statements  {elapsed:7.3f} s  "
+                  f"({len(result['tasks'])} tasks, {len(result['checklists'])} checklists)")
+        mismatches = 0
+        if results[0] != results[1]:
+            mismatches += 1
+            print(f"MISMATCH task_id={tree['root']} (root)")
+
+        rng = random.Random(args.seed)
+        starts = [(t, None) for t in rng.sample(tree["tasks"] + tree["reviews"], args.starts)]
+        starts += [(None, c) for c in rng.sample(tree["checklists"], args.starts)]
+        totals = {"old BFS": [0, 0.0], "recursive CTE": [0, 0.0]}
+        for task_id, checklist_id in starts:
+            old, old_statements, old_elapsed = _timed(legacy_related, db, task_id, checklist_id)
+            new, new_statements, new_elapsed = _timed(get_related_tasks_checklists_logic, db, task_id, checklist_id)
+            totals["old BFS"][0] += old_statements
+            totals["old BFS"][1] += old_elapsed
+            totals["recursive CTE"][0] += new_statements
+            totals["recursive CTE"][1] += new_elapsed
+            if as_sets(old) != as_sets(new):
+                mismatches += 1
+                print(f"MISMATCH task_id={task_id} checklist_id={checklist_id}")
+        for label, (statements, elapsed) in totals.items():
+            print(f"{len(starts)} starts {label:14} {statements:7} statements  {elapsed:7.3f} s")
+        print(f"{len(starts) + 1 - mismatches}/{len(starts) + 1} results identical (root included)")
+    finally:
+        db.close()
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
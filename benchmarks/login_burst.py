@@ -0,0 +1,138 @@
+"""
+Latency of an unrelated route (GET /tasks) while a burst of concurrent logins runs.
+
+    python benchmarks/login_burst.py [--logins 60] [--pool-size 2] [--queue-limit 64]
+
+Starts the app under uvicorn (one worker) on a throwaway SQLite database,
+probes GET /api/v1/tasks/tasks every 10 ms while idle and during the burst,
+and prints p50 / p99 / max of the probes plus the login status codes (503 =
+PASSWORD_QUEUE_LIMIT reached). A DB connection held while bcrypt runs shows
+up as a probe max close to the whole burst duration.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def serve(port, workdir):
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)  # get_logger() writes to ./logger
+    from database.migrations import upgrade
+    upgrade()
+    import uvicorn
+    import main
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _summary(label, samples):
+    return (f"{label:6} p50 {statistics.median(samples):8.1f} ms  p99 {_percentile(samples, 0.99):8.1f} ms  "
+            f"max {max(samples):8.1f} ms  probes {len(samples)}")
+
+
+async def run(base, logins):
+    import httpx
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        await client.post(f"{base}/auth/signup", json={
+            "username": "bench", "email": "bench@example.com", "password": "pw", "designation": "dev"
+        })
+        response = await client.post(f"{base}/auth/login", data={"username": "bench", "password": "pw"})
+        client.cookies.set("access_token", response.cookies.get("access_token"))
+        for i in range(5):
+            await client.post(f"{base}/tasks/Create_Task", json={
+                "task_name": f"Task {i}", "description": "d", "due_date": "2026-01-01",
+                "assigned_to": 1, "is_review_required": False, "checklist_names": ["a"]
+            })
+
+        async def probe(samples, until):
+            while not until():
+                started = time.perf_counter()
+                response = await client.get(f"{base}/tasks/tasks")
+                assert response.status_code == 200, response.text
+                samples.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.01)
+
+        idle = []
+        idle_until = time.perf_counter() + 3
+        await probe(idle, lambda: time.perf_counter() > idle_until)
+
+        limits = httpx.Limits(max_connections=logins + 10)
+        async with httpx.AsyncClient(timeout=120, limits=limits) as burst_client:
+            started = time.perf_counter()
+            burst = asyncio.ensure_future(asyncio.gather(*[
+                burst_client.post(f"{base}/auth/login", data={"username": "bench", "password": "pw"})
+                for _ in range(logins)
+            ]))
+            await asyncio.sleep(0.05)
+            busy = []
+            await probe(busy, burst.done)
+            statuses = Counter(r.status_code for r in burst.result())
+            elapsed = time.perf_counter() - started
+
+    print(_summary("idle", idle))
+    print(_summary("burst", busy))
+    print(f"{logins} logins in {elapsed:.1f} s, status codes {dict(sorted(statuses.items()))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/login_burst.py")
+    parser.add_argument("--logins", type=int, default=60)
+    parser.add_argument("--pool-size", type=int, default=2, help="PASSWORD_POOL_SIZE")
+    parser.add_argument("--queue-limit", type=int, default=64, help="PASSWORD_QUEUE_LIMIT")
+    parser.add_argument("--serve", nargs=2, metavar=("PORT", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(int(args.serve[0]), args.serve[1])
+        return
+
+    workdir = tempfile.mkdtemp(prefix="login_burst_")
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        PASSWORD_POOL_SIZE=str(args.pool_size),
+        PASSWORD_QUEUE_LIMIT=str(args.queue_limit),
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", str(port), workdir],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise SystemExit("server did not start")
+                time.sleep(0.2)
+        asyncio.run(run(f"http://127.0.0.1:{port}/api/v1", args.logins))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
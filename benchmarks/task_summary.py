@@ -0,0 +1,158 @@
+"""
+The `summary` block of GET /tasks for users with many tasks: ORM lists counted
+in Python vs one conditional-aggregation query vs the user_task_status_counts
+rollup.
+
+    python benchmarks/task_summary.py [--tasks 12000] [--repeat 5]
+
+Signs up two users on a throwaway SQLite database and bulk-inserts `--tasks`
+tasks for each (random statuses, half of them assigned to the other user, 5%
+deleted). Prints the best wall time and statement count of `--repeat` runs
+of each summary for one of the users, then of their GET /tasks page with and
+without `include_summary`. Exits non-zero if the three summaries differ.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def orm_lists(db, user_id):
+    """The pre-rollup code: both task lists loaded as ORM objects and counted in Python."""
+    from models.models import Task
+
+    summary = {}
+    for role in ("created_by", "assigned_to"):
+        tasks = db.query(Task).filter(getattr(Task, role) == user_id, Task.is_delete == False).all()
+        counts = defaultdict(int)
+        for t in tasks:
+            counts[t.status] += 1
+        summary[f"{role}_me"] = {"total": len(tasks), "status_counts": dict(counts)}
+    return summary
+
+
+def conditional_aggregation(db, user_id):
+    """Counts per (role, status) from one SUM(CASE ...) ... GROUP BY status over the tasks table."""
+    from sqlalchemy import select, func, case, or_
+    from models.models import Task
+
+    rows = db.execute(
+        select(
+            Task.status,
+            func.sum(case((Task.created_by == user_id, 1), else_=0)),
+            func.sum(case((Task.assigned_to == user_id, 1), else_=0))
+        ).where(
+            or_(Task.created_by == user_id, Task.assigned_to == user_id),
+            Task.is_delete == False
+        ).group_by(Task.status)
+    ).all()
+    summary = {"created_by_me": {"total": 0, "status_counts": {}}, "assigned_to_me": {"total": 0, "status_counts": {}}}
+    for status, created, assigned in rows:
+        for block, n in ((summary["created_by_me"], created), (summary["assigned_to_me"], assigned)):
+            if n:
+                block["total"] += n
+                block["status_counts"][status] = n
+    return summary
+
+
+def _best(fn, repeat):
+    from database.query_stats import track_queries
+
+    best, statements, result = None, None, None
+    for _ in range(repeat):
+        with track_queries() as stats:
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        statements = stats.count
+    return result, best, statements
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/task_summary.py")
+    parser.add_argument("--tasks", type=int, default=12000, help="tasks created by each of the two users")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="task_summary_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)  # get_logger() writes to ./logger
+    from database.migrations import upgrade
+    upgrade()
+
+    import main as app_main
+    from fastapi.testclient import TestClient
+    from fastapi.encoders import jsonable_encoder
+    from database.database import SessionLocal
+    from database.bulk import insert_returning_ids
+    from Authentication.functions import decode_token, shutdown_password_pool
+    from models.models import Task, TaskStatus
+    from Tasks.status_counts import add_to_counts, status_summary
+
+    client = TestClient(app_main.app)
+    user_ids = []
+    for name in ("bench_a", "bench_b"):
+        client.post("/api/v1/auth/signup", json={
+            "username": name, "email": f"{name}@example.com", "password": "pw", "designation": "dev"
+        })
+        response = client.post("/api/v1/auth/login", data={"username": name, "password": "pw"})
+        client.cookies.set("access_token", response.cookies.get("access_token"))
+        user_ids.append(decode_token(response.cookies.get("access_token"))["employee_id"])
+    user_id = user_ids[-1]  # the client stays logged in as the last user
+
+    rng = random.Random(args.seed)
+    statuses = list(TaskStatus)
+    db = SessionLocal()
+    mismatch = False
+    try:
+        for creator, other in (user_ids, user_ids[::-1]):
+            rows = [{
+                "task_name": f"Task {i}", "description": "bench", "status": rng.choice(statuses),
+                "created_by": creator, "assigned_to": other if rng.random() < 0.5 else creator,
+                "is_delete": rng.random() < 0.05
+            } for i in range(args.tasks)]
+            insert_returning_ids(db, Task, rows)
+            add_to_counts(db, rows)
+        db.commit()
+        print(f"{2 * args.tasks} tasks, user {user_id}: "
+              f"{db.query(Task).filter(Task.created_by == user_id, Task.is_delete == False).count()} created, "
+              f"{db.query(Task).filter(Task.assigned_to == user_id, Task.is_delete == False).count()} assigned")
+
+        results = []
+        for label, fn in (("ORM lists", orm_lists), ("conditional aggregation", conditional_aggregation),
+                          ("rollup table", status_summary)):
+            result, best, statements = _best(lambda: fn(db, user_id), args.repeat)
+            results.append(jsonable_encoder(result))
+            print(f"summary  {label:24} {best * 1000:8.2f} ms  {statements:3} statements")
+        if any(result != results[0] for result in results[1:]):
+            mismatch = True
+            print("MISMATCH between the summaries")
+
+        for label, url in (("GET /tasks", "/api/v1/tasks/tasks"),
+                           ("GET /tasks include_summary=false", "/api/v1/tasks/tasks?include_summary=false")):
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(url).raise_for_status()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            statements = int(response.headers["X-DB-Queries"])
+            print(f"page     {label:32} {best * 1000:8.2f} ms  {statements:3} statements")
+    finally:
+        db.close()
+        shutdown_password_pool()
+    if mismatch:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Task update logs: one ORM add + flush per entry vs the buffered multi-row insert at commit.
+
+    python benchmarks/update_logs.py [--logs 300] [--repeat 5]
+
+Writes `--logs` task log entries in one transaction on a throwaway SQLite
+database both ways and prints the best wall time and statement count of
+`--repeat` runs. SQLite has no network round trip, so on MySQL the gap per
+flushed entry is larger than shown here.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def flush_per_log(db, task_id, user_id, n):
+    from datetime import datetime
+    from models.models import TaskUpdateLog
+
+    for i in range(n):
+        db.add(TaskUpdateLog(task_id=task_id, field_name="status", old_value=str(i), new_value=str(i + 1),
+                             updated_by=user_id, updated_at=datetime.now()))
+        db.flush()
+    db.commit()
+
+
+def buffered(db, task_id, user_id, n):
+    from Logs.functions import log_task_field_change
+
+    for i in range(n):
+        log_task_field_change(db, task_id, "status", str(i), str(i + 1), user_id)
+    db.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/update_logs.py")
+    parser.add_argument("--logs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="update_logs_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)  # get_logger() writes to ./logger
+    from database.migrations import upgrade
+    from database.database import SessionLocal
+    from database.query_stats import track_queries
+    from models.models import Task, User
+    upgrade()
+
+    db = SessionLocal()
+    try:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        task = Task(task_name="Bench", created_by=user.employee_id, assigned_to=user.employee_id)
+        db.add(task)
+        db.commit()
+        task_id, user_id = task.task_id, user.employee_id
+
+        for label, fn in (("flush per log", flush_per_log), ("buffered", buffered)):
+            best, statements = None, None
+            for _ in range(args.repeat):
+                with track_queries() as stats:
+                    started = time.perf_counter()
+                    fn(db, task_id, user_id, args.logs)
+                    elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+                statements = stats.count
+            print(f"{label:14} {args.logs} logs  {best * 1000:8.1f} ms  {statements:5} statements")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
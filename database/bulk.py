@@ -0,0 +1,41 @@
+from sqlalchemy import insert, select, func, text
+
+# Multi-row INSERTs that hand back the new primary keys, in row order.
+#
+#   RETURNING (SQLite 3.35+, MariaDB, PostgreSQL) - INSERT ... RETURNING,
+#       batched by SQLAlchemy's insertmanyvalues. Auto-increment ids are handed
+#       out in VALUES order, so the returned ids sorted ascending line up with
+#       the rows (asking SQLAlchemy to sort them instead makes it fall back to
+#       one INSERT per row on tables without a sentinel column).
+#   MySQL - no RETURNING. A single multi-row INSERT ... VALUES is a "simple
+#       insert" to InnoDB, which reserves its auto-increment ids as one block:
+#       LAST_INSERT_ID() is the first id, the rest follow at
+#       @@auto_increment_increment. The range is checked (all rows visible to
+#       this transaction) before it is used.
+#
+# Rows bypass the ORM unit of work, so mapper/flush listeners don't see them;
+# callers take care of any denormalized state themselves.
+
+
+def _increment(conn):
+    if "auto_increment_increment" not in conn.info:
+        conn.info["auto_increment_increment"] = conn.execute(text("SELECT @@auto_increment_increment")).scalar()
+    return conn.info["auto_increment_increment"]
+
+
+def insert_returning_ids(db, model, rows) -> list:
+    """Insert `rows` (list of dicts) into `model`'s table; returns their primary keys in the same order."""
+    if not rows:
+        return []
+    pk = model.__mapper__.primary_key[0]
+    conn = db.connection()
+    if conn.dialect.insert_returning and conn.dialect.insert_executemany_returning:
+        return sorted(db.execute(insert(model).returning(pk), rows).scalars())
+
+    first_id = db.execute(insert(model).values(rows)).lastrowid
+    step = _increment(conn)
+    ids = [first_id + i * step for i in range(len(rows))]
+    found = db.execute(select(func.count(pk)).where(pk.in_(ids))).scalar()
+    if found != len(ids):
+        raise RuntimeError(f"Non-contiguous ids from multi-row insert into {model.__tablename__}")
+    return ids
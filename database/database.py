@@ -1,36 +1,156 @@
 import os
+from contextlib import contextmanager
 import urllib.parse
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+from fastapi.concurrency import run_in_threadpool
+from database.pool_stats import PoolTelemetry, TimedQueuePool, TimedAsyncQueuePool
+from database.query_stats import instrument
+from database.routing import ReplicaSet, RoutingSession, principal_key, track_writes
 
 # Load environment variables
 load_dotenv()
 
-DB_USER = urllib.parse.quote_plus(os.getenv("DB_USER"))
-DB_PASSWORD = urllib.parse.quote_plus(os.getenv("DB_PASSWORD"))
+DB_USER = urllib.parse.quote_plus(os.getenv("DB_USER", ""))
+DB_PASSWORD = urllib.parse.quote_plus(os.getenv("DB_PASSWORD", ""))
 DB_HOST = os.getenv("DB_HOST")
 
-# Database connection URL (Fixed for employeee_task)
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/employeee_task"
+# Database connection URL (Fixed for employeee_task); DATABASE_URL overrides it (e.g. SQLite in tests)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/employeee_task"
+
+# Async driver URL, only used when DB_ASYNC=true (aiomysql in production, aiosqlite in tests)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/employeee_task"
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+# Pool tuning; recycle stays below MySQL's wait_timeout so idle connections aren't dropped server-side
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+}
 
 # Create the engine and session maker
-engine = create_engine(DATABASE_URL, pool_size=10, max_overflow=5)
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+pool_telemetry = {"sync": PoolTelemetry("sync").attach(engine)}
+instrument(engine)
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autocommit=False, autoflush=False)
+    pool_telemetry["async"] = PoolTelemetry("async").attach(async_engine.sync_engine)
+    instrument(async_engine.sync_engine)
+
+
+# Optional read replicas: DB_REPLICA_HOSTS=host1,host2 (same credentials/schema as the primary)
+# or DB_REPLICA_URLS=url1,url2 for full URLs (e.g. SQLite files in tests)
+def _replica_urls():
+    hosts = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+    urls = [f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{host}/employeee_task" for host in hosts]
+    return urls + [u.strip() for u in os.getenv("DB_REPLICA_URLS", "").split(",") if u.strip()]
+
+def _async_url(url):
+    url = make_url(url)
+    return url.set(drivername={"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}[url.get_backend_name()])
+
+replica_set = ReplicaSet()
+for i, url in enumerate(_replica_urls(), start=1):
+    replica_engine = create_engine(url, poolclass=TimedQueuePool, **POOL_OPTIONS)
+    pool_telemetry[f"replica{i}"] = PoolTelemetry(f"replica{i}").attach(replica_engine)
+    instrument(replica_engine)
+    async_replica_engine = None
+    if DB_ASYNC:
+        async_replica_engine = create_async_engine(_async_url(url), poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+        pool_telemetry[f"replica{i}_async"] = PoolTelemetry(f"replica{i}_async").attach(async_replica_engine.sync_engine)
+        instrument(async_replica_engine.sync_engine)
+    replica_set.add(f"replica{i}", replica_engine, async_replica_engine)
+track_writes(replica_set)
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+AsyncReadSessionLocal = None
+if DB_ASYNC:
+    AsyncReadSessionLocal = async_sessionmaker(async_engine, sync_session_class=RoutingSession, autocommit=False, autoflush=False)
+
+
+def _read_session_info(connection, use_async=False):
+    principal = principal_key(connection)
+    info = {"principal": principal}
+    if not replica_set.is_pinned(principal):
+        replica = replica_set.choose()
+        if replica is not None:
+            info["replica"] = replica.async_engine.sync_engine if use_async else replica.engine
+    return info
 
 # Function to get the database session (for FastAPI)
-def get_db():
-    db = SessionLocal()
+def get_db(connection: HTTPConnection):
+    db = SessionLocal(info={"principal": principal_key(connection)})
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async variant for `async def` routes: an AsyncSession when DB_ASYNC is enabled,
+# otherwise a regular Session whose work is pushed to the threadpool by run_db()
+async def get_async_db(connection: HTTPConnection):
+    info = {"principal": principal_key(connection)}
+    if AsyncSessionLocal is None:
+        db = SessionLocal(info=info)
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+    else:
+        async with AsyncSessionLocal(info=info) as db:
+            yield db
+
+# Read-only variants for GET endpoints: served by a replica unless the caller wrote recently
+def get_read_db(connection: HTTPConnection):
+    db = ReadSessionLocal(info=_read_session_info(connection))
     try:
         yield db
     finally:
         db.close()
 
-# Function to get the database session dynamically (without yield)
+async def get_async_read_db(connection: HTTPConnection):
+    if AsyncReadSessionLocal is None:
+        # choose() may run a blocking health probe
+        info = await run_in_threadpool(_read_session_info, connection)
+        db = ReadSessionLocal(info=info)
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+    else:
+        info = await run_in_threadpool(_read_session_info, connection, True)
+        async with AsyncReadSessionLocal(info=info) as db:
+            yield db
+
+# Run sync ORM code `fn(session, *args)` from an async route without blocking the event loop
+async def run_db(db, fn, *args, **kwargs):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+# Session for code outside a request (scripts, background jobs); always closed on exit
+@contextmanager
 def get_dynamic_db():
-    db = SessionLocal()  # Create session
     try:
-        return db  # Return the session directly
+        db = SessionLocal()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database connection failed: {e}")
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def pool_stats() -> dict:
+    return {name: telemetry.stats() for name, telemetry in pool_telemetry.items()}
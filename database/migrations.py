@@ -0,0 +1,201 @@
+"""
+Versioned schema migrations.
+
+    python -m database.migrations upgrade          # apply everything pending
+    python -m database.migrations upgrade --to 2   # stop at a given version
+    python -m database.migrations current          # show the applied version
+
+Each step is recorded in `schema_version` once it succeeds. MySQL DDL is not
+transactional, so steps are written to be re-runnable (they check the live
+schema before creating or dropping anything).
+"""
+import argparse
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, TIMESTAMP, MetaData, inspect, text
+from sqlalchemy.schema import CreateColumn
+from models.models import Base
+from database.database import engine
+from logger.logger import get_logger
+
+logger = get_logger("migrations", "migrations.log")
+
+_version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", TIMESTAMP, nullable=False),
+)
+
+
+# ---------- helpers for steps ----------
+def _index_names(conn, table_name):
+    return {ix["name"] for ix in inspect(conn).get_indexes(table_name)}
+
+
+def create_index_if_missing(conn, table_name, index_name):
+    index = next(ix for ix in Base.metadata.tables[table_name].indexes if ix.name == index_name)
+    if index_name not in _index_names(conn, table_name):
+        index.create(conn)
+        logger.info(f"Created index {index_name} on {table_name}")
+
+
+def drop_index_if_exists(conn, table_name, index_name):
+    if index_name in _index_names(conn, table_name):
+        if conn.dialect.name == "mysql":
+            conn.execute(text(f"DROP INDEX `{index_name}` ON `{table_name}`"))
+        else:
+            conn.execute(text(f'DROP INDEX "{index_name}"'))
+        logger.info(f"Dropped index {index_name} on {table_name}")
+
+
+def add_column_if_missing(conn, table_name, column_name):
+    if column_name in {c["name"] for c in inspect(conn).get_columns(table_name)}:
+        return False
+    column = Base.metadata.tables[table_name].c[column_name]
+    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {CreateColumn(column).compile(dialect=conn.dialect)}"))
+    logger.info(f"Added column {table_name}.{column_name}")
+    return True
+
+
+def create_tables_if_missing(conn, *table_names):
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in table_names], checkfirst=True)
+
+
+# ---------- steps ----------
+def _baseline(conn):
+    # Tables that existed before migrations were introduced; a no-op on existing databases
+    create_tables_if_missing(
+        conn,
+        "users", "tasks", "checklist", "task_checklist_link", "task_update_logs",
+        "checklist_update_logs", "chat_rooms", "chat_messages", "chat_message_reads",
+        "task_time_log", "email_outbox",
+    )
+
+
+def _hot_path_indexes(conn):
+    create_index_if_missing(conn, "tasks", "ix_tasks_assignee_live_status")
+    create_index_if_missing(conn, "tasks", "ix_tasks_creator_live_status")
+    create_index_if_missing(conn, "task_time_log", "ix_task_time_log_task_user_start")
+    create_index_if_missing(conn, "task_checklist_link", "ix_task_checklist_link_parent_checklist")
+    create_index_if_missing(conn, "chat_messages", "ix_chat_messages_room_timestamp")
+    # Never usable for lookups on a LONGTEXT column, only slows checklist writes
+    drop_index_if_exists(conn, "checklist", "ix_checklist_checklist_name")
+
+
+def _checklist_progress_counters(conn):
+    from Checklist.progress import recount_progress
+    add_column_if_missing(conn, "tasks", "checklist_total")
+    add_column_if_missing(conn, "tasks", "checklist_completed")
+    task_ids = conn.execute(text("SELECT task_id FROM tasks")).scalars().all()
+    recount_progress(conn, task_ids)
+
+
+def _task_closure(conn):
+    from Tasks.hierarchy import rebuild
+    create_tables_if_missing(conn, "task_closure")
+    rebuild(conn)
+
+
+def _active_timers(conn):
+    from Tasks.timers import rebuild
+    create_tables_if_missing(conn, "active_timers")
+    rebuild(conn)
+
+
+def _user_task_status_counts(conn):
+    from Tasks.status_counts import recount_users
+    create_tables_if_missing(conn, "user_task_status_counts")
+    recount_users(conn)
+
+
+def _task_search_index(conn):
+    if conn.dialect.name == "mysql":
+        create_index_if_missing(conn, "tasks", "ft_tasks_task_name")
+        create_index_if_missing(conn, "tasks", "ft_tasks_description")
+    elif conn.dialect.name == "sqlite":
+        from Tasks.search import create_sqlite_index
+        create_sqlite_index(conn)
+
+
+def _update_log_archive(conn):
+    create_tables_if_missing(conn, "task_update_log_archive", "checklist_update_log_archive")
+
+
+def _task_tree_versions(conn):
+    # Trees without a row are at version 0; no backfill needed
+    create_tables_if_missing(conn, "task_tree_versions")
+
+
+MIGRATIONS = [
+    (1, "baseline", _baseline),
+    (2, "hot_path_composite_indexes", _hot_path_indexes),
+    (3, "task_checklist_progress_counters", _checklist_progress_counters),
+    (4, "task_closure", _task_closure),
+    (5, "active_timers", _active_timers),
+    (6, "user_task_status_counts", _user_task_status_counts),
+    (7, "task_search_index", _task_search_index),
+    (8, "update_log_archive", _update_log_archive),
+    (9, "task_tree_versions", _task_tree_versions),
+]
+
+
+# ---------- runner ----------
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0]
+
+
+def upgrade(target: int = None, bind=engine):
+    target = latest_version() if target is None else target
+    with bind.begin() as conn:
+        _version_metadata.create_all(conn, checkfirst=True)
+        version = current_version(conn)
+    for number, name, step in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        logger.info(f"Applying migration {number}: {name}")
+        with bind.begin() as conn:
+            step(conn)
+            conn.execute(schema_version.insert().values(version=number, name=name, applied_at=datetime.now()))
+        version = number
+    logger.info(f"Schema at version {version}")
+    return version
+
+
+def check_schema_version(bind=engine):
+    """Log (don't fail) at startup when the database is behind the code; run `upgrade` to fix."""
+    try:
+        with bind.connect() as conn:
+            version = current_version(conn)
+    except Exception as e:
+        logger.warning(f"Could not read schema version: {e}")
+        return None
+    if version < latest_version():
+        logger.warning(f"Database schema is at version {version}, code expects {latest_version()}; "
+                       f"run `python -m database.migrations upgrade`")
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m database.migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("upgrade", help="apply pending migrations")
+    up.add_argument("--to", type=int, default=None, help="target version (default: latest)")
+    sub.add_parser("current", help="print the applied schema version")
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        upgrade(args.to)
+    else:
+        with engine.connect() as conn:
+            print(f"{current_version(conn)} (latest {latest_version()})")
+
+
+if __name__ == "__main__":
+    main()
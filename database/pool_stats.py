@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from logger.logger import get_logger
+
+DB_POOL_LONG_HOLD = float(os.getenv("DB_POOL_LONG_HOLD", "10"))  # seconds a checkout may be held before warning
+
+# Upper bounds (ms) of the checkout-wait histogram buckets; anything slower lands in "+Inf"
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolTelemetry:
+    """Checkout wait histogram, in-use counts and long-held connection tracking for one engine."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.logger = get_logger("database", "database.log")
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._held = {}  # id(connection_record) -> (checked out at, thread name)
+        self.pool = None
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.in_use_peak = 0
+        self.long_held = 0
+        self.connects = 0
+        self.invalidated = 0
+
+    def record_wait(self, seconds: float, failed: bool = False):
+        ms = seconds * 1000
+        with self._lock:
+            self._buckets[bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if failed:
+                self.checkout_failures += 1
+
+    def attach(self, engine):
+        self.pool = engine.pool
+        engine.pool._telemetry = self
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        return self
+
+    # ---------- pool events ----------
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self._held[id(connection_record)] = (time.monotonic(), threading.current_thread().name)
+            self.in_use_peak = max(self.in_use_peak, len(self._held))
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            held = self._held.pop(id(connection_record), None)
+        if held is None:
+            return
+        duration = time.monotonic() - held[0]
+        if duration > DB_POOL_LONG_HOLD:
+            with self._lock:
+                self.long_held += 1
+            self.logger.warning(f"[{self.name}] connection held for {duration:.1f}s (checked out by {held[1]})")
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated += 1
+
+    # ---------- reporting ----------
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            labels = [f"le_{b}ms" for b in WAIT_BUCKETS_MS] + ["+Inf"]
+            histogram = dict(zip(labels, self._buckets))
+            held_too_long = sorted(
+                (round(now - since, 1), thread) for since, thread in self._held.values()
+                if now - since > DB_POOL_LONG_HOLD
+            )
+            stats = {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else None,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_histogram": histogram,
+                "in_use": len(self._held),
+                "in_use_peak": self.in_use_peak,
+                "long_held_total": self.long_held,
+                "currently_long_held": [{"held_seconds": s, "thread": t} for s, t in reversed(held_too_long)],
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+            }
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return stats
+
+
+class _TimedDoGet:
+    """Mixin timing how long callers wait for a pooled connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        failed = False
+        try:
+            return super()._do_get()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            telemetry = getattr(self, "_telemetry", None)
+            if telemetry is not None:
+                telemetry.record_wait(time.perf_counter() - start, failed)
+
+    def recreate(self):
+        # Keep telemetry across pool recreation (engine.dispose())
+        pool = super().recreate()
+        pool._telemetry = getattr(self, "_telemetry", None)
+        if pool._telemetry is not None:
+            pool._telemetry.pool = pool
+        return pool
+
+
+class TimedQueuePool(_TimedDoGet, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedDoGet, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,107 @@
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from fastapi import Request
+from logger.logger import get_logger
+
+DB_REPEAT_WARN = int(os.getenv("DB_REPEAT_WARN", "10"))  # same statement shape more often than this -> N+1 warning
+
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:%s|\?|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with IN-lists of any length collapsed, so `IN (?, ?)` and `IN (?)` count as one shape."""
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def repeated(self, threshold: int = DB_REPEAT_WARN):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+# Mutable holder so work done in threadpools / run_sync (which copy the context) is still counted
+_current = ContextVar("db_query_stats", default=None)
+# Process-wide collectors for query_budget(); TestClient runs the app on another thread/event loop
+_budgets = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None or _budgets:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    collectors = [current] + _budgets if current is not None else _budgets
+    if not collectors:
+        return
+    starts = conn.info.get("query_start")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    shape = statement_shape(statement)
+    for stats in collectors:
+        stats.seconds += elapsed
+        stats.count += 1
+        stats.shapes[shape] += 1
+
+
+def instrument(engine):
+    """Count statements and time on `engine` (pass `async_engine.sync_engine` for async engines)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: int = None):
+    """
+    Fail (AssertionError) when the wrapped block issues more than `max_queries`
+    statements, or repeats one statement shape more than `max_repeats` times.
+    Counts every statement in the process while active, so it is meant for tests.
+
+        with query_budget(12):
+            client.get("/api/v1/tasks/task/task_id?task_id=1")
+    """
+    stats = QueryStats()
+    _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        _budgets.remove(stats)
+    assert stats.count <= max_queries, f"{stats.count} queries issued, budget is {max_queries}"
+    if max_repeats is not None:
+        repeated = stats.repeated(max_repeats)
+        assert not repeated, f"statement repeated {repeated[0][1]} times: {repeated[0][0][:200]}"
+
+
+async def db_query_middleware(request: Request, call_next):
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time"] = f"{stats.seconds * 1000:.1f}ms"
+    for shape, n in stats.repeated():
+        get_logger("database", "database.log").warning(
+            f"Possible N+1 on {request.method} {request.url.path}: statement ran {n} times: {shape[:300]}"
+        )
+    return response
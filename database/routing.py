@@ -0,0 +1,175 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from logger.logger import get_logger
+
+DB_REPLICA_RETRY = float(os.getenv("DB_REPLICA_RETRY", "30"))          # seconds before re-probing a failed replica
+DB_READ_YOUR_WRITES = float(os.getenv("DB_READ_YOUR_WRITES", "5"))     # seconds a writer's reads stay on the primary
+
+
+class Replica:
+    def __init__(self, name: str, engine, async_engine=None):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.retry_at = 0.0
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaSet:
+    """
+    Round-robin over healthy read replicas.
+
+    A replica is taken out of rotation when a statement on it fails with a
+    disconnect/operational error and re-probed with `SELECT 1` once
+    DB_REPLICA_RETRY seconds have passed. When none are healthy, reads go
+    to the primary.
+    """
+
+    def __init__(self):
+        self.logger = get_logger("database", "database.log")
+        self.replicas = []
+        self._cycle = None
+        self._lock = threading.Lock()
+        self._pins = {}  # principal key -> monotonic time the pin expires
+        self.primary_fallbacks = 0
+        self.pinned_reads = 0
+
+    def add(self, name: str, engine, async_engine=None):
+        replica = Replica(name, engine, async_engine)
+        self.replicas.append(replica)
+        self._cycle = itertools.cycle(self.replicas)
+        for eng in filter(None, (engine, async_engine and async_engine.sync_engine)):
+            event.listen(eng, "handle_error", self._error_handler(replica))
+        return replica
+
+    def _error_handler(self, replica):
+        def handle_error(context):
+            if context.is_disconnect:
+                self.mark_down(replica, context.original_exception)
+        return handle_error
+
+    def mark_down(self, replica, error=None):
+        with self._lock:
+            if replica.healthy:
+                self.logger.warning(f"Replica {replica.name} taken out of rotation: {error}")
+            replica.healthy = False
+            replica.failures += 1
+            replica.retry_at = time.monotonic() + DB_REPLICA_RETRY
+
+    def _probe(self, replica) -> bool:
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            self.mark_down(replica, e)
+            return False
+        with self._lock:
+            replica.healthy = True
+        self.logger.info(f"Replica {replica.name} back in rotation")
+        return True
+
+    def choose(self):
+        """Next healthy replica, or None to use the primary. May block briefly on a health probe."""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = next(self._cycle)
+                due = not replica.healthy and time.monotonic() >= replica.retry_at
+                if due:
+                    # Push retry_at forward so concurrent callers don't all probe at once
+                    replica.retry_at = time.monotonic() + DB_REPLICA_RETRY
+            if replica.healthy or (due and self._probe(replica)):
+                with self._lock:
+                    replica.reads += 1
+                return replica
+        if self.replicas:
+            with self._lock:
+                self.primary_fallbacks += 1
+        return None
+
+    # ---------- read-your-writes ----------
+    def pin(self, principal: str):
+        with self._lock:
+            self._pins[principal] = time.monotonic() + DB_READ_YOUR_WRITES
+            if len(self._pins) > 10000:
+                now = time.monotonic()
+                self._pins = {k: v for k, v in self._pins.items() if v > now}
+
+    def is_pinned(self, principal) -> bool:
+        if principal is None:
+            return False
+        with self._lock:
+            until = self._pins.get(principal)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._pins[principal]
+                return False
+            self.pinned_reads += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": [
+                    {"name": r.name, "healthy": r.healthy, "reads": r.reads, "failures": r.failures}
+                    for r in self.replicas
+                ],
+                "primary_fallbacks": self.primary_fallbacks,
+                "pinned_reads": self.pinned_reads,
+                "active_pins": len(self._pins),
+            }
+
+
+def principal_key(connection) -> str:
+    """Identify the caller by its access-token cookie; the pin is per logged-in session."""
+    token = connection.cookies.get("access_token") if connection is not None else None
+    return hashlib.sha256(token.encode("utf-8")).hexdigest() if token else None
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from `info["replica"]` when set, and sends anything
+    that flushes (or is flushed by autoflush), Core insert()/update()/delete(),
+    and every read after the session wrote something to the primary bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if (replica is not None and not self._flushing and not self.info.get("wrote")
+                and not (self.new or self.dirty or self.deleted) and not getattr(clause, "is_dml", False)):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def track_writes(replica_set: ReplicaSet):
+    """Pin a principal's reads to the primary for a short window after it commits a write."""
+
+    @event.listens_for(Session, "after_flush")
+    def _mark_written(session, flush_context):
+        session.info["wrote"] = True
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _mark_bulk_written(orm_execute_state):
+        # Core-style update()/delete()/insert() through the session never flush
+        if not orm_execute_state.is_select:
+            orm_execute_state.session.info["wrote"] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _pin_writer(session):
+        if session.info.pop("wrote", False):
+            # The rest of this session reads its own writes from the primary too
+            session.info.pop("replica", None)
+            if session.info.get("principal"):
+                replica_set.pin(session.info["principal"])
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def _forget_writes(session, previous_transaction):
+        if not session.in_transaction():
+            session.info.pop("wrote", None)
@@ -1,8 +1,9 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from models.models import Base
-from database.database import engine
+from database.query_stats import db_query_middleware
 from Tasks.Create_Task import router as create_task_router
+from Tasks.Batch_Create import router as batch_create_router
 from Tasks.Update_Task import router as update_task_router
 from Tasks.Print_Task import router as print_task_router
 from Checklist.Create_Checklist import router as create_checklist_router
@@ -13,11 +14,22 @@ from Authentication.authy import router as auth_router
 from Chat.chat import router as chat_router
 from Logs.logs import router as logs_router
 from Tasks.time_traking import router as time_tracking_router
+from Monitoring.stats import router as stats_router
+from Authentication.functions import shutdown_password_pool
+from Authentication.mailer import start_outbox_sender, stop_outbox_sender
+from database.migrations import check_schema_version
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema changes are applied with `python -m database.migrations upgrade`, not at boot
+    check_schema_version()
+    start_outbox_sender()
+    yield
+    stop_outbox_sender()
+    shutdown_password_pool()
 
-app = FastAPI(root_path="/taskmanager")
+
+app = FastAPI(root_path="/taskmanager", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -34,8 +46,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time"],
 )
 
+# Per-request statement count / DB time headers and N+1 warnings
+app.middleware("http")(db_query_middleware)
+
 
 # Prefix for all routes
 API_PREFIX = "/api/v1"
@@ -44,6 +60,7 @@ API_PREFIX = "/api/v1"
 app.include_router(auth_router, prefix=f"{API_PREFIX}/auth", tags=["Authentication"])
 app.include_router(chat_router, prefix=f"{API_PREFIX}/chat", tags=["Chat"])
 app.include_router(create_task_router, prefix=f"{API_PREFIX}/tasks", tags=["Tasks"])
+app.include_router(batch_create_router, prefix=f"{API_PREFIX}/tasks", tags=["Tasks"])
 app.include_router(update_task_router, prefix=f"{API_PREFIX}/tasks", tags=["Tasks"])
 app.include_router(print_task_router, prefix=f"{API_PREFIX}/tasks", tags=["Tasks"])
 app.include_router(create_checklist_router, prefix=f"{API_PREFIX}/checklist", tags=["Checklist"])
@@ -52,4 +69,5 @@ app.include_router(checklist_status_router, prefix=f"{API_PREFIX}/checklist", ta
 app.include_router(delete_router, prefix=f"{API_PREFIX}/delete", tags=["Delete"])
 app.include_router(logs_router, prefix=f"{API_PREFIX}/logs", tags=["Logs"])
 app.include_router(time_tracking_router, prefix=f"{API_PREFIX}/tasks", tags=["Tasks"])
+app.include_router(stats_router, prefix=f"{API_PREFIX}/internal", tags=["Internal"])
 
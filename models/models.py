@@ -1,14 +1,19 @@
 from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import (
-    Column, Integer, String, Text, Enum, Boolean, Date, TIMESTAMP, ForeignKey, func, UniqueConstraint
+    Column, Integer, String, Text, Enum, Boolean, Date, TIMESTAMP, ForeignKey, func, UniqueConstraint, JSON, Index,
+    LargeBinary
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.mysql import LONGTEXT, JSON
+from sqlalchemy.dialects.mysql import LONGTEXT, LONGBLOB
 from enum import Enum as PyEnum
 
 Base = declarative_base()
 
+# LONGTEXT on MySQL, plain TEXT elsewhere (SQLite in tests)
+LongText = Text().with_variant(LONGTEXT(), "mysql")
+LongBlob = LargeBinary().with_variant(LONGBLOB(), "mysql")
+
 # Updated TaskStatus Enum
 class TaskStatus(PyEnum):
     To_Do = "To_Do"
@@ -18,6 +23,11 @@ class TaskStatus(PyEnum):
     Completed = "Completed"
     New = "New"
 
+class EmailStatus(PyEnum):
+    Pending = "Pending"
+    Sent = "Sent"
+    Failed = "Failed"
+
 # Updated TaskType Enum
 class TaskType(PyEnum):
     Normal = "Normal"
@@ -45,7 +55,7 @@ class Task(Base):
     assigned_to = Column(Integer, ForeignKey("users.employee_id"), nullable=True, index=True)
     created_by = Column(Integer, ForeignKey("users.employee_id"), nullable=True, index=True)
     task_name = Column(String(60), nullable=False, index=True)
-    description = Column(LONGTEXT, nullable=True)
+    description = Column(LongText, nullable=True)
     status = Column(Enum(TaskStatus), nullable=False, default=TaskStatus.To_Do.name, index=True)
     previous_status = Column(Enum(TaskStatus), nullable=True, index=True)
     task_type = Column(Enum(TaskType), nullable=False, default=TaskType.Normal.name, index=True)
@@ -55,18 +65,29 @@ class Task(Base):
     is_reviewed = Column(Boolean, default=False)
     parent_task_id = Column(Integer, ForeignKey("tasks.task_id"), nullable=True, index=True)
 
-    output = Column(LONGTEXT, nullable=True)
+    output = Column(LongText, nullable=True)
     is_delete = Column(Boolean, default=False, index=True)
+    # Maintained by Checklist/progress.py; non-deleted checklists linked with parent_task_id = this task
+    checklist_total = Column(Integer, nullable=False, default=0, server_default="0")
+    checklist_completed = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp(), index=True)
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     chat_room = relationship('ChatRoom', uselist=False, back_populates='task')
 
+    __table_args__ = (
+        Index("ix_tasks_assignee_live_status", "assigned_to", "is_delete", "status"),
+        Index("ix_tasks_creator_live_status", "created_by", "is_delete", "status"),
+        # Word-prefix search (Tasks/search.py); SQLite uses an FTS5 table instead
+        Index("ft_tasks_task_name", "task_name", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        Index("ft_tasks_description", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
 class Checklist(Base):
     __tablename__ = "checklist"
 
     checklist_id = Column(Integer, primary_key=True, autoincrement=True)
-    checklist_name = Column(LONGTEXT, nullable=False, index=True)
+    checklist_name = Column(LongText, nullable=False)
     is_completed = Column(Boolean, default=False, index=True)
     created_by = Column(Integer, ForeignKey("users.employee_id"), nullable=True, index=True)
     is_delete = Column(Boolean, default=False, index=True)
@@ -81,14 +102,18 @@ class TaskChecklistLink(Base):
     checklist_id = Column(Integer, ForeignKey("checklist.checklist_id", ondelete="CASCADE"), nullable=True, index=True)
     sub_task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), nullable=True, index=True)
 
+    __table_args__ = (
+        Index("ix_task_checklist_link_parent_checklist", "parent_task_id", "checklist_id"),
+    )
+
 class TaskUpdateLog(Base):
     __tablename__ = "task_update_logs"
 
     log_id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), nullable=False, index=True)
     field_name = Column(String(100), nullable=False)
-    old_value = Column(LONGTEXT)
-    new_value = Column(LONGTEXT)
+    old_value = Column(LongText)
+    new_value = Column(LongText)
     updated_by = Column(Integer, ForeignKey("users.employee_id"), nullable=False, index=True)
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), index=True)
 
@@ -132,6 +157,10 @@ class ChatMessage(Base):
     chat_room = relationship('ChatRoom', back_populates='messages')
     sender = relationship('User')
 
+    __table_args__ = (
+        Index("ix_chat_messages_room_timestamp", "chat_room_id", "timestamp"),
+    )
+
 class ChatMessageRead(Base):
     __tablename__ = 'chat_message_reads'
     id = Column(Integer, primary_key=True, index=True)
@@ -154,4 +183,87 @@ class TaskTimeLog(Base):
     is_paused = Column(Boolean, default=False)
 
     task = relationship("Task", backref="time_logs")
-    user = relationship("User", backref="time_logs")
\ No newline at end of file
+    user = relationship("User", backref="time_logs")
+
+    __table_args__ = (
+        Index("ix_task_time_log_task_user_start", "task_id", "user_id", "start_time"),
+    )
+
+
+# Transitive closure of the task hierarchy (review chains and checklist subtasks); see Tasks/hierarchy.py
+class TaskClosure(Base):
+    __tablename__ = "task_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+    via = Column(String(10), nullable=False)  # self | review | checklist | mixed
+
+    __table_args__ = (
+        Index("ix_task_closure_descendant_depth", "descendant_id", "depth"),
+    )
+
+
+# One row per task with a running timer (an open task_time_log row); see Tasks/timers.py
+class ActiveTimer(Base):
+    __tablename__ = "active_timers"
+
+    task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.employee_id", ondelete="CASCADE"), nullable=False, index=True)
+    time_log_id = Column(Integer, ForeignKey("task_time_log.id", ondelete="CASCADE"), nullable=False, unique=True)
+    started_at = Column(TIMESTAMP, nullable=False)
+
+# Live task counts per user, role and status for the /tasks summary; see Tasks/status_counts.py
+class UserTaskStatusCount(Base):
+    __tablename__ = "user_task_status_counts"
+
+    user_id = Column(Integer, ForeignKey("users.employee_id", ondelete="CASCADE"), primary_key=True)
+    role = Column(String(20), primary_key=True)  # created_by | assigned_to
+    status = Column(Enum(TaskStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+# Change counter per task tree, keyed by the tree's root task; drives the task_details ETag, see Tasks/tree_versions.py
+class TaskTreeVersion(Base):
+    __tablename__ = "task_tree_versions"
+
+    root_task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Cold storage for old task_update_logs / checklist_update_logs rows: zlib-compressed
+# JSON chunks of log rows, one owner (task or checklist) per chunk; see Logs/archive.py
+class TaskUpdateLogArchive(Base):
+    __tablename__ = "task_update_log_archive"
+
+    archive_id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, ForeignKey("tasks.task_id", ondelete="CASCADE"), nullable=False, index=True)
+    row_count = Column(Integer, nullable=False)
+    first_updated_at = Column(TIMESTAMP, nullable=True)
+    last_updated_at = Column(TIMESTAMP, nullable=True)
+    payload = Column(LongBlob, nullable=False)
+    archived_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+
+class ChecklistUpdateLogArchive(Base):
+    __tablename__ = "checklist_update_log_archive"
+
+    archive_id = Column(Integer, primary_key=True, autoincrement=True)
+    checklist_id = Column(Integer, ForeignKey("checklist.checklist_id", ondelete="CASCADE"), nullable=False, index=True)
+    row_count = Column(Integer, nullable=False)
+    first_updated_at = Column(TIMESTAMP, nullable=True)
+    last_updated_at = Column(TIMESTAMP, nullable=True)
+    payload = Column(LongBlob, nullable=False)
+    archived_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    email_id = Column(Integer, primary_key=True, autoincrement=True)
+    to_email = Column(String(100), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(Enum(EmailStatus), nullable=False, default=EmailStatus.Pending.name, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp(), index=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    sent_at = Column(TIMESTAMP, nullable=True)
@@ -0,0 +1,81 @@
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+import pytest
+from sqlalchemy import make_url
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--db-async", action="store_true",
+                     help="run with DB_ASYNC=true: async routes get an AsyncSession on aiosqlite")
+    parser.addoption("--db-replica", action="store_true",
+                     help="run with a second SQLite file as read replica (DB_REPLICA_URLS)")
+
+
+def pytest_configure(config):
+    # database.database reads DB_ASYNC and the replica settings at import time, so they are fixed per pytest run
+    os.environ["DB_ASYNC"] = "true" if config.getoption("--db-async") else "false"
+    os.environ["DB_REPLICA_HOSTS"] = ""
+    os.environ["DB_REPLICA_URLS"] = ""
+    if config.getoption("--db-replica"):
+        os.environ["DB_REPLICA_URLS"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='replica_'), 'replica.db')}"
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """TestClient for the app on a fresh, fully migrated SQLite database."""
+    workdir = tmp_path_factory.mktemp("app")
+    previous_cwd = os.getcwd()
+    # get_logger() writes to ./logger; keep test runs out of the repo's log files
+    os.chdir(workdir)
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'test.db'}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir / 'test.db'}"
+    try:
+        from database.migrations import upgrade
+        upgrade()
+        # A replica starts as a copy of the migrated primary and never sees its later writes
+        for url in filter(None, os.environ["DB_REPLICA_URLS"].split(",")):
+            shutil.copyfile(workdir / "test.db", make_url(url).database)
+
+        import main
+        from fastapi.testclient import TestClient
+        from Authentication.functions import shutdown_password_pool
+        # No `with`: the lifespan would start the outbox sender, whose polling queries query_budget() would count
+        yield TestClient(main.app)
+        shutdown_password_pool()
+    finally:
+        os.chdir(previous_cwd)
+
+
+@pytest.fixture
+def login(client):
+    """Sign up a new user and log the client in as them; returns their employee_id."""
+    from Authentication.functions import decode_token
+
+    def _login(username=None):
+        username = username or f"user_{uuid.uuid4().hex[:8]}"
+        client.post("/api/v1/auth/signup", json={
+            "username": username, "email": f"{username}@example.com", "password": "pw", "designation": "dev"
+        })
+        response = client.post("/api/v1/auth/login", data={"username": username, "password": "pw"})
+        assert response.status_code == 200, response.text
+        token = response.cookies.get("access_token")
+        client.cookies.set("access_token", token)
+        return decode_token(token)["employee_id"]
+
+    return _login
+
+
+@pytest.fixture
+def query_budget():
+    """
+    `with query_budget(n):` fails the test when the block issues more than `n`
+    SQL statements (or, with `max_repeats`, repeats one statement shape more
+    often); see database.query_stats.query_budget.
+    """
+    from database.query_stats import query_budget as budget
+    return budget
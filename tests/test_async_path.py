@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.mark.skipif(os.environ.get("DB_ASYNC") == "true", reason="this is the DB_ASYNC run")
+def test_suite_passes_with_db_async():
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:warnings", "--db-async", TESTS_DIR],
+        capture_output=True, text=True, timeout=600
+    )
+    assert result.returncode == 0, result.stdout[-4000:]
+
+
+@pytest.mark.skipif(os.environ.get("DB_ASYNC") != "true", reason="needs --db-async")
+def test_async_routes_run_on_the_async_engine(client, login):
+    from database.database import pool_stats
+
+    login()
+    before = pool_stats()["async"]["checkouts"]
+    assert client.get("/api/v1/tasks/tasks").status_code == 200
+    assert pool_stats()["async"]["checkouts"] > before
@@ -0,0 +1,72 @@
+import uuid
+from sqlalchemy import select, text, or_
+
+
+def _batch(user_id, word):
+    base = {"description": f"{word} batch", "due_date": "2026-01-01", "assigned_to": user_id, "is_review_required": False}
+    return [
+        {**base, "task_name": f"{word} root", "checklist_names": ["a", "b"], "is_review_required": True},
+        {**base, "task_name": f"{word} child", "checklist_names": ["c"], "parent_checklist": {"item": 0, "checklist": 1},
+         "is_review_required": True},
+        {**base, "task_name": f"{word} grandchild", "checklist_names": ["d"], "parent_checklist": {"item": 1, "checklist": 0}},
+        {**base, "task_name": f"{word} broken", "checklist_names": ["z"], "parent_checklist": {"item": 0, "checklist": 5}},
+        {**base, "task_name": f"{word} orphan", "checklist_names": [], "parent_checklist": {"item": 3, "checklist": 0}},
+        {**base, "task_name": f"{word} leaf", "checklist_names": [], "parent_checklist": {"item": 2, "checklist": 0}},
+        {**base, "task_name": f"{word} other", "checklist_names": ["e"], "is_review_required": True},
+    ]
+
+
+def _closure_rows(conn, task_ids):
+    from models.models import TaskClosure
+
+    return set(conn.execute(
+        select(TaskClosure.ancestor_id, TaskClosure.descendant_id, TaskClosure.depth, TaskClosure.via).where(
+            or_(TaskClosure.ancestor_id.in_(task_ids), TaskClosure.descendant_id.in_(task_ids))
+        )
+    ).all())
+
+
+def test_batch_create_keeps_derived_state_in_sync(client, login):
+    from database.database import engine, SessionLocal
+    from Tasks import hierarchy, status_counts
+    from Checklist import progress
+
+    user_id = login()
+    word = f"batch{uuid.uuid4().hex[:8]}"
+    response = client.post("/api/v1/tasks/batch_create", json={"tasks": _batch(user_id, word)})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    results = body["results"]
+
+    assert [r["created"] for r in results] == [True, True, True, False, False, True, True]
+    assert [r.get("status_code") for r in results if not r["created"]] == [400, 424]
+    assert (body["created"], body["failed"]) == (5, 2)
+    tasks = [r["task_id"] for r in results if r["created"]]
+    reviews = [r["review_task_id"] for r in results if r["created"] and r["review_task_id"]]
+    assert len(reviews) == 3
+    new_ids = tasks + reviews
+
+    # task_closure as maintained by the batch == recomputed from scratch
+    with engine.connect() as conn:
+        maintained = _closure_rows(conn, new_ids)
+        hierarchy.rebuild(conn)
+        rebuilt = _closure_rows(conn, new_ids)
+        conn.rollback()
+    assert maintained == rebuilt
+    root, child, grandchild, leaf = (results[i]["task_id"] for i in (0, 1, 2, 5))
+    assert (root, leaf, 3, hierarchy.VIA_CHECKLIST) in maintained
+    assert (child, results[1]["review_task_id"], 1, hierarchy.VIA_REVIEW) in maintained
+
+    with SessionLocal() as db:
+        assert [row for row in progress.find_drift(db, limit=None) if row[0] in new_ids] == []
+        assert [row for row in status_counts.find_drift(db, limit=None) if row[0] == user_id] == []
+
+    # Searchable through the full-text index, not only the LIKE fallback
+    with engine.connect() as conn:
+        indexed = set(conn.execute(
+            text("SELECT rowid FROM task_search WHERE task_search MATCH :q"), {"q": f"{word}*"}
+        ).scalars())
+    assert set(new_ids) <= indexed
+    # Review tasks are named "Review - <task name>" and assigned to the batch's creator
+    listed = client.get(f"/api/v1/tasks/tasks?task_name={word}&filter_by=assigned_to").json()["tasks"]
+    assert {t["task_id"] for t in listed} == set(new_ids)
@@ -0,0 +1,84 @@
+def _create_tree(client, user_id):
+    """
+    Root (review required) with checklists a, b; S1 and S2 hang from a, S3
+    from b; G and H hang from S1.x. Timers run on every task. Returns
+    {name: task result} from batch_create.
+    """
+    base = {"description": "d", "due_date": "2026-01-01", "assigned_to": user_id, "is_review_required": False}
+    names = ["Root", "S1", "S2", "S3", "G", "H"]
+    tasks = [
+        {**base, "task_name": "Root", "checklist_names": ["a", "b"], "is_review_required": True},
+        {**base, "task_name": "S1", "checklist_names": ["x", "y"], "parent_checklist": {"item": 0, "checklist": 0}},
+        {**base, "task_name": "S2", "checklist_names": ["x", "y"], "parent_checklist": {"item": 0, "checklist": 0}},
+        {**base, "task_name": "S3", "checklist_names": ["x"], "parent_checklist": {"item": 0, "checklist": 1}},
+        {**base, "task_name": "G", "checklist_names": ["z"], "parent_checklist": {"item": 1, "checklist": 0}},
+        {**base, "task_name": "H", "checklist_names": ["z"], "parent_checklist": {"item": 1, "checklist": 0}},
+    ]
+    results = client.post("/api/v1/tasks/batch_create", json={"tasks": tasks}).json()["results"]
+    for result in results:
+        assert client.post(f"/api/v1/tasks/start_timer?task_id={result['task_id']}").status_code == 200
+    return dict(zip(names, results))
+
+
+def _checklist(tree, task, name):
+    return next(c["checklist_id"] for c in tree[task]["checklists_created"] if c["checklist_name"] == name)
+
+
+def _state(tree):
+    """Statuses, progress and checklist flags of every task in `tree`, keyed by name."""
+    from database.database import SessionLocal
+    from models.models import Task, Checklist
+    from Checklist.progress import progress_label
+
+    with SessionLocal() as db:
+        state = {}
+        for name, result in tree.items():
+            task = db.get(Task, result["task_id"])
+            review = db.get(Task, result["review_task_id"]) if result["review_task_id"] else None
+            state[name] = (
+                task.status.name, progress_label(task), review.status.name if review else None,
+                [db.get(Checklist, c["checklist_id"]).is_completed for c in result["checklists_created"]],
+            )
+        return state
+
+
+# (task, checklist, is_completed) per round; S1.x is only ever settled through G and H
+ROUNDS = [
+    [("S1", "y", True), ("S2", "x", True), ("S2", "y", True), ("S3", "x", True), ("G", "z", True), ("H", "z", True)],
+    [("H", "z", False), ("S3", "x", False), ("S2", "y", False)],
+    [("H", "z", True), ("S3", "x", True), ("S2", "y", True)],
+]
+
+
+def test_bulk_mark_matches_the_same_single_calls_in_sequence(client, login):
+    user_id = login()
+    bulk_tree, single_tree = _create_tree(client, user_id), _create_tree(client, user_id)
+
+    for changes in ROUNDS:
+        response = client.post("/api/v1/checklist/bulk_mark", json={"items": [
+            {"checklist_id": _checklist(bulk_tree, task, name), "is_completed": done} for task, name, done in changes
+        ]})
+        assert response.status_code == 200, response.text
+        for task, name, done in changes:
+            response = client.post("/api/v1/checklist/mark_checklist_complete", json={
+                "checklist_id": _checklist(single_tree, task, name), "is_completed": done
+            })
+            assert response.status_code == 200, response.text
+
+        assert _state(bulk_tree) == _state(single_tree)
+
+    # The last round completed everything again
+    assert _state(bulk_tree)["Root"][:3] == ("In_Review", "2/2", "To_Do")
+
+
+def test_bulk_mark_settles_each_task_once(client, login, query_budget):
+    user_id = login()
+    tree = _create_tree(client, user_id)
+    items = [{"checklist_id": _checklist(tree, task, name), "is_completed": done} for task, name, done in ROUNDS[0]]
+
+    # Six tasks complete and Root's review task moves to To_Do: no statement may run more than
+    # once per task. Walking up once per parent settled S1 and Root repeatedly (91 statements).
+    with query_budget(75, max_repeats=len(tree) + 1):
+        response = client.post("/api/v1/checklist/bulk_mark", json={"items": items})
+    assert response.status_code == 200, response.text
+    assert {t["task_name"]: t["status"] for t in response.json()["tasks"]}["Root"] == "In_Review"
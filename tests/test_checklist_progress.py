@@ -0,0 +1,56 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import select, update
+
+LONG_AGO = datetime(2020, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def drifted_task(client, login):
+    """A task with two checklists whose counters were zeroed and updated_at set far in the past."""
+    from database.database import engine
+    from models.models import Task
+
+    user_id = login()
+    response = client.post("/api/v1/tasks/batch_create", json={"tasks": [{
+        "task_name": "Counted", "description": "d", "due_date": "2026-01-01",
+        "assigned_to": user_id, "is_review_required": False, "checklist_names": ["a", "b"],
+    }]})
+    task_id = response.json()["results"][0]["task_id"]
+    with engine.begin() as conn:
+        conn.execute(update(Task).where(Task.task_id == task_id).values(
+            checklist_total=0, checklist_completed=0, updated_at=LONG_AGO
+        ))
+    return task_id
+
+
+def _counters(task_id):
+    from database.database import engine
+    from models.models import Task
+
+    with engine.connect() as conn:
+        return conn.execute(
+            select(Task.checklist_total, Task.checklist_completed, Task.updated_at).where(Task.task_id == task_id)
+        ).one()
+
+
+def test_recount_in_a_session_keeps_updated_at(drifted_task):
+    from database.database import SessionLocal
+    from Checklist.progress import recount_progress
+
+    with SessionLocal() as db:
+        recount_progress(db, [drifted_task])
+        db.commit()
+
+    assert tuple(_counters(drifted_task)) == (2, 0, LONG_AGO)
+
+
+def test_recount_on_a_connection_keeps_updated_at(drifted_task):
+    # The migration backfill recounts through a bare Connection
+    from database.database import engine
+    from Checklist.progress import recount_progress
+
+    with engine.begin() as conn:
+        recount_progress(conn, [drifted_task])
+
+    assert tuple(_counters(drifted_task)) == (2, 0, LONG_AGO)
@@ -0,0 +1,33 @@
+import random
+import pytest
+from benchmarks.delete_cascade import legacy_related, build_tree, as_sets
+
+
+@pytest.fixture
+def tree_session(client):
+    """Session for a generated tree; everything is rolled back afterwards."""
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    db.close()
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_cte_matches_the_old_breadth_first_walk(tree_session, seed):
+    from Delete.functions import get_related_tasks_checklists_logic
+
+    tree = build_tree(tree_session, 400, seed)
+    rng = random.Random(seed)
+    starts = [(tree["root"], None)]
+    starts += [(t, None) for t in rng.sample(tree["tasks"], 40) + rng.sample(tree["reviews"], 20)]
+    starts += [(None, c) for c in rng.sample(tree["checklists"], 40)]
+
+    for task_id, checklist_id in starts:
+        expected = as_sets(legacy_related(tree_session, task_id, checklist_id))
+        assert as_sets(get_related_tasks_checklists_logic(tree_session, task_id, checklist_id)) == expected, \
+            f"task_id={task_id} checklist_id={checklist_id}"
+
+    root_tasks, root_checklists = as_sets(get_related_tasks_checklists_logic(tree_session, tree["root"], None))
+    assert len(root_tasks) > 100 and len(root_checklists) > 100  # the generated tree is not trivial
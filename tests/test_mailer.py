@@ -0,0 +1,181 @@
+import socket
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import object_session
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class StandInRelay:
+    """aiosmtpd handler: accepts every recipient except retry@ (451) and bounce@ (550)."""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("retry@"):
+            return "451 4.3.0 Try again later"
+        if address.startswith("bounce@"):
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+@pytest.fixture
+def relay(client, monkeypatch):
+    from Authentication import mailer
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    handler = StandInRelay()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(mailer, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(mailer, "SMTP_PORT", port)
+    monkeypatch.setattr(mailer, "SMTP_STARTTLS", False)
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def outbox(client):
+    from database.database import SessionLocal
+    from models.models import EmailOutbox, EmailStatus
+    from Authentication.mailer import queue_email
+
+    db = SessionLocal()
+    # Leave nothing due from other tests in the way of the batch
+    db.query(EmailOutbox).filter(EmailOutbox.status == EmailStatus.Pending).update(
+        {EmailOutbox.status: EmailStatus.Failed}
+    )
+    db.commit()
+
+    def _queue(to_email, attempts=0):
+        email = queue_email(db, to_email, "Subject", "Body")
+        email.attempts = attempts
+        db.commit()
+        return email.email_id
+
+    def _row(email_id):
+        db.expire_all()
+        return db.get(EmailOutbox, email_id)
+
+    _queue.row = _row
+    yield _queue
+    db.close()
+
+
+def _process(sender):
+    try:
+        return sender.process_batch()
+    finally:
+        sender.stop()
+
+
+def test_sent_message_is_marked_sent(relay, outbox):
+    from Authentication.mailer import OutboxSender
+    from models.models import EmailStatus
+
+    email_id = outbox("ok@example.com")
+    sender = OutboxSender()
+    assert _process(sender) == 1
+
+    row = outbox.row(email_id)
+    assert relay.received == ["ok@example.com"]
+    assert row.status == EmailStatus.Sent
+    assert row.attempts == 1
+    assert row.sent_at is not None
+    assert sender.stats()["sent"] == 1
+
+
+def test_claim_is_committed_before_sending(relay, outbox, monkeypatch):
+    from Authentication import mailer
+    from models.models import EmailStatus
+
+    email_id = outbox("ok@example.com")
+    seen = {}
+    sender = mailer.OutboxSender()
+    deliver = sender._deliver
+
+    def deliver_and_inspect(email):
+        # Read through a separate session: the lease must already be committed
+        row = outbox.row(email_id)
+        seen["status"], seen["next_attempt_at"] = row.status, row.next_attempt_at
+        deliver(email)
+
+    monkeypatch.setattr(sender, "_deliver", deliver_and_inspect)
+    _process(sender)
+
+    assert seen["status"] == EmailStatus.Pending
+    assert seen["next_attempt_at"] > datetime.now() + timedelta(seconds=mailer.EMAIL_LEASE_SECONDS - 60)
+    assert outbox.row(email_id).status == EmailStatus.Sent
+
+
+def test_temporary_failure_is_retried_with_backoff(relay, outbox):
+    from Authentication import mailer
+    from models.models import EmailStatus
+
+    first = outbox("retry@example.com")
+    second = outbox("retry@example.com", attempts=2)
+    sender = mailer.OutboxSender()
+    started = datetime.now().replace(microsecond=0)
+    assert _process(sender) == 2
+
+    for email_id, attempts in ((first, 1), (second, 3)):
+        row = outbox.row(email_id)
+        delay = mailer.EMAIL_BACKOFF_BASE * 2 ** (attempts - 1)
+        assert row.status == EmailStatus.Pending
+        assert row.attempts == attempts
+        assert "Try again later" in row.last_error
+        assert started + timedelta(seconds=delay) <= row.next_attempt_at <= datetime.now() + timedelta(seconds=delay)
+    assert relay.received == []
+    assert sender.stats()["retried"] == 2
+
+    # Not due yet: the next batch leaves them alone
+    assert _process(mailer.OutboxSender()) == 0
+
+
+def test_last_attempt_fails_permanently(relay, outbox):
+    from Authentication import mailer
+    from models.models import EmailStatus
+
+    email_id = outbox("bounce@example.com", attempts=mailer.EMAIL_MAX_ATTEMPTS - 1)
+    delivered = outbox("ok@example.com")
+    sender = mailer.OutboxSender()
+    assert _process(sender) == 2
+
+    row = outbox.row(email_id)
+    assert row.status == EmailStatus.Failed
+    assert row.attempts == mailer.EMAIL_MAX_ATTEMPTS
+    assert "No such user" in row.last_error
+    # The failure dropped the connection; the next message still went out on a new one
+    assert outbox.row(delivered).status == EmailStatus.Sent
+    assert relay.received == ["ok@example.com"]
+    assert sender.stats()["failed"] == 1
+
+
+def test_expired_lease_does_not_overwrite_a_newer_claim(relay, outbox):
+    from Authentication import mailer
+    from models.models import EmailStatus
+
+    email_id = outbox("ok@example.com")
+    sender = mailer.OutboxSender()
+    batch, lease_until = sender._claim()
+    assert [email.email_id for email in batch] == [email_id]
+
+    # Another worker took the row over after the lease ran out
+    row = outbox.row(email_id)
+    row.next_attempt_at = lease_until + timedelta(seconds=60)
+    object_session(row).commit()
+
+    sender._record_sent(batch[0], lease_until)
+    sender.stop()
+    row = outbox.row(email_id)
+    assert row.status == EmailStatus.Pending
+    assert row.attempts == 0
+    assert sender.stats()["sent"] == 0
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import text
+
+
+def test_budget_fails_when_exceeded(client, query_budget):
+    from database.database import engine
+
+    with pytest.raises(AssertionError, match="3 queries issued, budget is 2"):
+        with query_budget(2):
+            with engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text("SELECT 1"))
+
+
+def test_budget_fails_on_repeated_statement(client, query_budget):
+    from database.database import engine
+
+    with pytest.raises(AssertionError, match="statement repeated 3 times"):
+        with query_budget(10, max_repeats=2):
+            with engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text("SELECT 1"))
+
+
+def test_task_list_stays_within_budget(client, login, query_budget):
+    user_id = login()
+    tasks = [{
+        "task_name": f"Task {i}",
+        "description": "d",
+        "due_date": "2026-01-01",
+        "assigned_to": user_id,
+        "is_review_required": False,
+        "checklist_names": ["a", "b"],
+    } for i in range(30)]
+    assert client.post("/api/v1/tasks/batch_create", json={"tasks": tasks}).json()["created"] == 30
+
+    with query_budget(8, max_repeats=1) as stats:
+        response = client.get("/api/v1/tasks/tasks")
+    assert response.status_code == 200
+    assert len(response.json()["tasks"]) == 30
+    assert response.headers["X-DB-Queries"] == str(stats.count)
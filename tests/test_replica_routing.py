@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from sqlalchemy import update
+
+replica_only = pytest.mark.skipif(not os.environ.get("DB_REPLICA_URLS"), reason="needs --db-replica")
+
+
+@pytest.mark.skipif(bool(os.environ.get("DB_REPLICA_URLS")), reason="this is the replica run")
+def test_routing_with_a_replica():
+    args = ["--db-async"] if os.environ.get("DB_ASYNC") == "true" else []
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "-p", "no:warnings",
+         "--db-replica", *args, os.path.abspath(__file__)],
+        capture_output=True, text=True, timeout=600
+    )
+    assert result.returncode == 0, result.stdout[-4000:]
+
+
+@pytest.fixture
+def replica(client):
+    from database.database import replica_set
+
+    replica = replica_set.replicas[0]
+    yield replica
+    replica.healthy = True
+
+
+def _create_task(client, login):
+    """Log in as a new user and create one task on the primary; returns its task_id."""
+    user_id = login()
+    response = client.post("/api/v1/tasks/batch_create", json={"tasks": [{
+        "task_name": "Routed", "description": "d", "due_date": "2026-01-01",
+        "assigned_to": user_id, "is_review_required": False, "checklist_names": ["a"],
+    }]})
+    return response.json()["results"][0]["task_id"]
+
+
+def _listed_task_ids(client):
+    response = client.get("/api/v1/tasks/tasks?filter_by=assigned_to")
+    assert response.status_code == 200, response.text
+    return [t["task_id"] for t in response.json()["tasks"]]
+
+
+@replica_only
+def test_get_reads_are_served_by_the_replica(client, login, replica, monkeypatch):
+    from database import routing
+    monkeypatch.setattr(routing, "DB_READ_YOUR_WRITES", 0)  # no read-your-writes window
+    reads = replica.reads
+    task_id = _create_task(client, login)
+
+    # The replica is a snapshot from before the task existed
+    assert task_id not in _listed_task_ids(client)
+    assert replica.reads > reads
+
+
+@replica_only
+def test_reads_stay_on_the_primary_right_after_a_write(client, login, replica, monkeypatch):
+    from database import routing
+    from database.database import replica_set
+    monkeypatch.setattr(routing, "DB_READ_YOUR_WRITES", 1)
+    task_id = _create_task(client, login)
+
+    pinned = replica_set.pinned_reads
+    assert task_id in _listed_task_ids(client)
+    assert replica_set.pinned_reads == pinned + 1
+
+    time.sleep(1.1)
+    assert task_id not in _listed_task_ids(client)
+
+
+@replica_only
+def test_flush_and_core_dml_go_to_the_primary(client, replica):
+    from database.database import ReadSessionLocal, SessionLocal
+    from models.models import EmailOutbox
+    from Authentication.mailer import queue_email
+
+    db = ReadSessionLocal(info={"replica": replica.engine})
+    try:
+        email = queue_email(db, "routed@example.com", "Subject", "Body")
+        db.flush()
+        email_id = email.email_id
+        # After the flush, reads in the same transaction must see the row
+        assert db.get(EmailOutbox, email_id, populate_existing=True) is not None
+        db.commit()
+
+        updated = db.execute(
+            update(EmailOutbox).where(EmailOutbox.email_id == email_id).values(subject="Updated")
+        ).rowcount
+        db.commit()
+        assert updated == 1
+    finally:
+        db.close()
+
+    with SessionLocal() as primary:
+        assert primary.get(EmailOutbox, email_id).subject == "Updated"
+    with ReadSessionLocal(info={"replica": replica.engine}) as stale:
+        assert stale.get(EmailOutbox, email_id) is None
+
+
+@replica_only
+def test_reads_fall_back_to_the_primary_while_the_replica_is_down(client, login, replica, monkeypatch):
+    from database import routing
+    from database.database import replica_set
+    monkeypatch.setattr(routing, "DB_READ_YOUR_WRITES", 0)
+    task_id = _create_task(client, login)
+
+    replica_set.mark_down(replica, "test")
+    fallbacks = replica_set.primary_fallbacks
+    assert task_id in _listed_task_ids(client)
+    assert replica_set.primary_fallbacks == fallbacks + 1
+
+    # Once the retry delay has passed, a SELECT 1 probe puts it back in rotation
+    replica.retry_at = 0
+    assert task_id not in _listed_task_ids(client)
+    assert replica.healthy
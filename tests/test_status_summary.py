@@ -0,0 +1,74 @@
+def _create(client, assigned_to, checklist_names, is_review_required=False, checklist_id=None):
+    response = client.post("/api/v1/tasks/Create_Task", json={
+        "task_name": "Task", "description": "d", "due_date": "2026-01-01", "assigned_to": assigned_to,
+        "checklist_names": checklist_names, "is_review_required": is_review_required, "checklist_id": checklist_id
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _counted(db, user_id):
+    """The GET /tasks summary for `user_id`, counted from the tasks table."""
+    from models.models import Task
+
+    summary = {}
+    for role in ("created_by", "assigned_to"):
+        counts = {}
+        for task in db.query(Task).filter(getattr(Task, role) == user_id, Task.is_delete == False):
+            counts[task.status.name] = counts.get(task.status.name, 0) + 1
+        summary[f"{role}_me"] = {"total": sum(counts.values()), "status_counts": counts}
+    return summary
+
+
+def _assert_in_sync(client, user_id, other_id):
+    from database.database import SessionLocal
+    from Tasks.status_counts import find_drift
+
+    with SessionLocal() as db:
+        assert [row for row in find_drift(db, limit=None) if row[0] in (user_id, other_id)] == []
+        expected = _counted(db, user_id)
+    response = client.get("/api/v1/tasks/tasks")
+    assert response.status_code == 200, response.text
+    assert response.json()["summary"] == expected
+    return expected
+
+
+def test_status_counts_follow_api_changes(client, login):
+    other_id = login()
+    user_id = login()
+
+    # Create: a root assigned to someone else (with a review task), a subtask under it, a task of my own
+    root = _create(client, other_id, ["a", "b"], is_review_required=True)
+    own = _create(client, user_id, ["x"])
+    client.post(f"/api/v1/tasks/start_timer?task_id={root['task_id']}")
+    subtask = _create(client, user_id, ["y"], checklist_id=root["checklists_created"][0]["checklist_id"])
+    _assert_in_sync(client, user_id, other_id)
+
+    # Status changes: both of my tasks complete, then one moves to the other user
+    for task in (own, subtask):
+        client.post(f"/api/v1/tasks/start_timer?task_id={task['task_id']}")
+        response = client.post("/api/v1/checklist/mark_checklist_complete", json={
+            "checklist_id": task["checklists_created"][0]["checklist_id"], "is_completed": True
+        })
+        assert response.status_code == 200, response.text
+    assert _assert_in_sync(client, user_id, other_id)["assigned_to_me"]["status_counts"]["Completed"] == 2
+    assert client.post("/api/v1/tasks/update_task", json={"task_id": own["task_id"], "assigned_to": other_id}).status_code == 200
+    _assert_in_sync(client, user_id, other_id)
+
+    # Delete: the root takes its subtask and review task with it
+    response = client.post("/api/v1/delete/delete", json={"task_id": root["task_id"]})
+    assert response.status_code == 200, response.text
+    assert _assert_in_sync(client, user_id, other_id)["assigned_to_me"]["total"] == 0
+
+
+def test_include_summary_false_omits_the_summary(client, login):
+    user_id = login()
+    for _ in range(3):
+        _create(client, user_id, ["x"])
+
+    full = client.get("/api/v1/tasks/tasks").json()
+    page = client.get("/api/v1/tasks/tasks?include_summary=false").json()
+    assert full["summary"]["created_by_me"]["total"] == 3
+    assert page["summary"] is None
+    assert {k: v for k, v in page.items() if k != "summary"} == {k: v for k, v in full.items() if k != "summary"}
+
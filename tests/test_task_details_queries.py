@@ -0,0 +1,126 @@
+import pytest
+
+TASK_DETAILS_BUDGET = 12
+
+
+def _create_tree(client, user_id, n_checklists, subtasks_per_checklist):
+    """A root task with `n_checklists` checklists, each holding subtasks with checklists of their own."""
+    base = {"description": "d", "due_date": "2026-01-01", "assigned_to": user_id, "is_review_required": False}
+    tasks = [{**base, "task_name": "Root", "checklist_names": [f"c{i}" for i in range(n_checklists)]}]
+    for i in range(n_checklists * subtasks_per_checklist):
+        tasks.append({
+            **base,
+            "task_name": f"Subtask {i}",
+            "checklist_names": ["x", "y"],
+            "parent_checklist": {"item": 0, "checklist": i % n_checklists},
+            "is_review_required": i % 3 == 0,
+        })
+    response = client.post("/api/v1/tasks/batch_create", json={"tasks": tasks}).json()
+    assert response["created"] == len(tasks)
+    return response["results"]
+
+
+@pytest.mark.parametrize("n_checklists, subtasks_per_checklist", [(2, 0), (2, 1), (20, 2)])
+def test_task_details_query_count_is_bounded(client, login, query_budget, n_checklists, subtasks_per_checklist):
+    from Tasks.detail_cache import detail_cache
+
+    user_id = login()
+    task_ids = [result["task_id"] for result in _create_tree(client, user_id, n_checklists, subtasks_per_checklist)]
+    for task_id in task_ids[1:4]:
+        client.post(f"/api/v1/tasks/start_timer?task_id={task_id}")
+    url = f"/api/v1/tasks/task/task_id?task_id={task_ids[0]}"
+    client.get(url)  # warm the user directory
+    detail_cache.clear()
+
+    with query_budget(TASK_DETAILS_BUDGET, max_repeats=2):
+        response = client.get(url)
+
+    body = response.json()
+    assert response.status_code == 200, body
+    assert len(body["checklists"]) == n_checklists
+    assert sum(len(c["subtasks"]) for c in body["checklists"]) == n_checklists * subtasks_per_checklist
+
+
+def test_task_details_review_chain_query_count_is_bounded(client, login, query_budget):
+    from Tasks.detail_cache import detail_cache
+
+    user_id = login()
+    subtask = next(r for r in reversed(_create_tree(client, user_id, 20, 2)) if r["review_task_id"])
+    url = f"/api/v1/tasks/task/task_id?task_id={subtask['review_task_id']}"
+    client.get(url)
+    detail_cache.clear()
+
+    with query_budget(TASK_DETAILS_BUDGET, max_repeats=2):
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert [t["task_id"] for t in response.json()["parent_task_chain"]] == [subtask["task_id"]]
+
+
+def _legacy_parent_chain(db, task_id, user_id):
+    """parent_task_chain as the old per-level get_parent_chain built it: one task query per level, root first."""
+    from models.models import Task
+    from Currentuser.userDirectory import user_directory
+    from Checklist.progress import progress_label
+    from Tasks.timers import session_info
+
+    user_map = user_directory.snapshot(db)
+    chain = []
+    current_task_id = db.get(Task, task_id).parent_task_id
+    while current_task_id:
+        current_task = db.query(Task).filter(Task.task_id == current_task_id, Task.is_delete == False).first()
+        if not current_task:
+            break
+        chain.append({
+            "task_id": current_task.task_id,
+            "task_name": current_task.task_name,
+            "description": current_task.description,
+            "status": current_task.status,
+            "task_type": current_task.task_type,
+            "assigned_to": current_task.assigned_to,
+            "assigned_to_name": user_map.get(current_task.assigned_to),
+            "created_by": current_task.created_by,
+            "created_by_name": user_map.get(current_task.created_by),
+            "due_date": current_task.due_date,
+            "is_reviewed": current_task.is_reviewed,
+            "output": current_task.output,
+            "created_at": current_task.created_at,
+            "checklist_progress": progress_label(current_task),
+            **session_info(db, current_task.task_id, user_id)
+        })
+        current_task_id = current_task.parent_task_id
+    return chain[::-1]
+
+
+def test_task_details_multi_round_review_chain(client, login, query_budget):
+    from fastapi.encoders import jsonable_encoder
+    from database.database import SessionLocal
+    from Tasks.detail_cache import detail_cache
+
+    user_id = login()
+    subtask = next(r for r in _create_tree(client, user_id, 2, 1) if r["review_task_id"])
+    reviews = [subtask["review_task_id"]]
+    for _ in range(8):
+        # Each review round is sent on for another one, which stops its timer
+        client.post(f"/api/v1/tasks/start_timer?task_id={reviews[-1]}")
+        response = client.post("/api/v1/tasks/send_for_review", json={"task_id": reviews[-1], "assigned_to": user_id})
+        reviews.append(response.json()["review_task_id"])
+    client.post(f"/api/v1/tasks/start_timer?task_id={reviews[-1]}")
+
+    db = SessionLocal()
+    try:
+        for review_id in (reviews[-1], reviews[3]):
+            url = f"/api/v1/tasks/task/task_id?task_id={review_id}"
+            client.get(url)
+            detail_cache.clear()
+
+            with query_budget(TASK_DETAILS_BUDGET, max_repeats=2):
+                response = client.get(url)
+
+            assert response.status_code == 200
+            chain = response.json()["parent_task_chain"]
+            index = reviews.index(review_id)
+            assert [t["task_id"] for t in chain] == [subtask["task_id"], *reviews[:index]]
+            assert chain == jsonable_encoder(_legacy_parent_chain(db, review_id, user_id))
+    finally:
+        db.close()
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+
+
+@pytest.fixture
+def task(client, login):
+    """(task_id, checklist_id, user_id) of a fresh task with one checklist."""
+    from database.database import SessionLocal
+    from models.models import TaskChecklistLink
+
+    user_id = login()
+    response = client.post("/api/v1/tasks/batch_create", json={"tasks": [{
+        "task_name": "Logged", "description": "d", "due_date": "2026-01-01",
+        "assigned_to": user_id, "is_review_required": False, "checklist_names": ["a"],
+    }]})
+    task_id = response.json()["results"][0]["task_id"]
+    with SessionLocal() as db:
+        checklist_id = db.execute(
+            select(TaskChecklistLink.checklist_id).where(TaskChecklistLink.parent_task_id == task_id)
+        ).scalar_one()
+    return task_id, checklist_id, user_id
+
+
+def _log_counts(task_id, checklist_id):
+    from database.database import engine
+    from models.models import TaskUpdateLog, ChecklistUpdateLog
+
+    with engine.connect() as conn:
+        return (
+            conn.execute(select(func.count()).where(TaskUpdateLog.task_id == task_id)).scalar(),
+            conn.execute(select(func.count()).where(ChecklistUpdateLog.checklist_id == checklist_id)).scalar(),
+        )
+
+
+def _log_changes(db, task_id, checklist_id, user_id):
+    from Logs.functions import log_task_field_change, log_checklist_field_change
+
+    log_task_field_change(db, task_id, "status", "To_Do", "In_Progress", user_id)
+    log_task_field_change(db, task_id, "output", None, "done", user_id)
+    log_task_field_change(db, task_id, "task_name", "same", "same", user_id)  # unchanged: not logged
+    log_checklist_field_change(db, checklist_id, "is_completed", False, True, user_id)
+
+
+def test_buffered_logs_are_written_at_commit(task):
+    from database.database import SessionLocal
+    from database.query_stats import track_queries
+
+    task_id, checklist_id, user_id = task
+    before = _log_counts(task_id, checklist_id)
+    with SessionLocal() as db:
+        with track_queries() as stats:
+            _log_changes(db, task_id, checklist_id, user_id)
+            db.flush()
+        assert stats.count == 0  # nothing is written before the commit
+        assert _log_counts(task_id, checklist_id) == before
+
+        with track_queries() as stats:
+            db.commit()
+
+    assert _log_counts(task_id, checklist_id) == (before[0] + 2, before[1] + 1)
+    # One multi-row INSERT per table
+    inserts = {shape.split()[2]: n for shape, n in stats.shapes.items() if shape.startswith("INSERT INTO")}
+    assert inserts == {"task_update_logs": 1, "checklist_update_logs": 1}
+
+
+def test_buffered_logs_are_dropped_on_rollback(task):
+    from database.database import SessionLocal
+
+    task_id, checklist_id, user_id = task
+    before = _log_counts(task_id, checklist_id)
+    with SessionLocal() as db:
+        _log_changes(db, task_id, checklist_id, user_id)
+        db.rollback()
+        # Nothing queued before the rollback leaks into the session's next commit
+        db.commit()
+
+    assert _log_counts(task_id, checklist_id) == before